@@ -0,0 +1,83 @@
+"""
+Сравнение скорости `FastJSONRenderer`/`FastJSONParser` со стандартными JSON рендерером и парсером DRF.
+
+Запуск: python benchmarks/json_renderer.py
+
+"""
+import datetime
+import decimal
+import io
+import os
+import sys
+import timeit
+import uuid
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+    USE_TZ=True,
+)
+django.setup()
+
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+
+from drf_auto.encoders import BACKEND_CLASSES, JSON_BACKEND_ORDER
+from drf_auto.parsers.fast import FastJSONParser
+from drf_auto.renderers import FastJSONRenderer
+
+
+def build_data(size=1000):
+    # Похоже на ответ списка: ReturnList из ReturnDict с Decimal, datetime, UUID и изредка ленивыми строками.
+    # Вычисление ленивой строки (перевод) дорогое само по себе и от рендерера не зависит.
+    now = timezone.now()
+    return ReturnList([
+        ReturnDict([
+            ('id', index),
+            ('uuid', uuid.UUID(int=index)),
+            ('title', 'Книга {}'.format(index)),
+            ('price', decimal.Decimal('10.{:02d}'.format(index % 100))),
+            ('created', now - datetime.timedelta(minutes=index)),
+            ('published', datetime.date(2020, 1, 1) + datetime.timedelta(days=index)),
+            ('status', gettext_lazy('Active') if index % 50 == 0 else 'active'),
+            ('tags', ['a', 'b', 'c']),
+            ('rating', index / 7),
+            ('is_public', bool(index % 2)),
+        ], serializer=None)
+        for index in range(size)
+    ], serializer=None)
+
+
+def main(number=50):
+    data = build_data()
+    expected = JSONRenderer().render(data)
+    renderers = [('drf', JSONRenderer())]
+    parsers = [('drf', JSONParser())]
+    for name in JSON_BACKEND_ORDER:
+        if BACKEND_CLASSES[name][1] is None:
+            print('{:<8} не установлен'.format(name))
+            continue
+        renderers.append((name, type('Renderer', (FastJSONRenderer,), {'backend': name})()))
+        parsers.append((name, type('Parser', (FastJSONParser,), {'backend': name})()))
+
+    for name, renderer in renderers:
+        content = renderer.render(data)
+        assert JSONParser().parse(io.BytesIO(content)) == JSONParser().parse(io.BytesIO(expected)), name
+        seconds = min(timeit.repeat(lambda: renderer.render(data), number=number, repeat=3))
+        print('render {:<8} {:8.2f} мс'.format(name, seconds / number * 10 ** 3))
+
+    for name, parser in parsers:
+        seconds = min(timeit.repeat(lambda: parser.parse(io.BytesIO(expected)), number=number, repeat=3))
+        print('parse  {:<8} {:8.2f} мс'.format(name, seconds / number * 10 ** 3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Сравнение скорости создания сериалайзера с `CachedFieldsSerializerMixin` и без него.
+
+Запуск: python benchmarks/serializer_fields.py
+
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import django
+from django.conf import settings
+
+settings.configure(
+    INSTALLED_APPS=['django.contrib.contenttypes', 'django.contrib.auth', 'rest_framework'],
+    DATABASES={'default': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'}},
+)
+django.setup()
+
+from django.contrib.auth.models import Group, User
+from rest_framework import serializers
+
+from drf_auto.serializers.mixins import CachedFieldsSerializerMixin
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class UserSerializer(serializers.ModelSerializer):
+    groups = GroupSerializer(many=True)
+    full_name = serializers.SerializerMethodField()
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'email', 'first_name', 'last_name', 'is_staff', 'date_joined', 'groups',
+                  'full_name')
+
+    def get_full_name(self, obj):
+        return obj.get_full_name()
+
+
+class CachedGroupSerializer(CachedFieldsSerializerMixin, GroupSerializer):
+    class Meta(GroupSerializer.Meta):
+        pass
+
+
+class CachedUserSerializer(CachedFieldsSerializerMixin, UserSerializer):
+    groups = CachedGroupSerializer(many=True)
+
+    class Meta(UserSerializer.Meta):
+        pass
+
+
+def build(serializer_class):
+    # Так же, как это делают Rest генерики: новый сериалайзер на ответ, затем обращение к филдам.
+    return serializer_class(User(username='user'), context={}).fields
+
+
+def main(number=2000):
+    assert list(build(UserSerializer)) == list(build(CachedUserSerializer))
+    for serializer_class in (UserSerializer, CachedUserSerializer):
+        seconds = min(timeit.repeat(lambda: build(serializer_class), number=number, repeat=3))
+        print('{:<24} {:8.1f} мкс на сериалайзер'.format(serializer_class.__name__, seconds / number * 10 ** 6))
+
+
+if __name__ == '__main__':
+    main()
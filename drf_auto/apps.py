@@ -4,4 +4,9 @@ from django.utils.translation import ugettext_lazy as _
 
 class DRFAutoConfig(AppConfig):
     name = "drf_auto"
+    default_auto_field = "django.db.models.AutoField"
     verbose_name = _("DRFAuto")
+
+    def ready(self):
+        from .sync import register_models
+        register_models()
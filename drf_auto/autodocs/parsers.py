@@ -66,8 +66,11 @@ class BaseParser(object):
 class StandardParser(BaseParser):
     """
     Стандартный парсер сериалайзеров.
+    use_doc_method_fields: Подменять ли `SerializerMethodField` сериалайзерами для документации из `Meta`.
 
     """
+    use_doc_method_fields = True
+
     def get_serializer_fields(self, serializer=None, exclude_fields=None, *args, **kwargs):
         """
         Возвращает список фидлов у сериалайзера.
@@ -106,7 +109,8 @@ class StandardParser(BaseParser):
 
                 label = None
 
-                if extra_fields and isinstance(field, serializers.SerializerMethodField):
+                if self.use_doc_method_fields and extra_fields and \
+                        isinstance(field, serializers.SerializerMethodField):
                     # Пробуем достать из мета класса.
                     ser = extra_fields.get(key, None)
                     if ser:
@@ -170,6 +174,8 @@ class StandardParser(BaseParser):
         return {
             # Если нет field_name [предположительно] это корневой список без имени.
             'name': key if key is not None else (field.field_name if field.field_name else '[list]'),
+            # Филд еще не привязан к сериалайзеру, поэтому source может быть не заполнен.
+            'source': field.source if field.source else key,
             'type': str(field.__class__.__name__),
             'sub_fields': sub_fields,
             'required': field.required,
@@ -0,0 +1,718 @@
+"""
+Компактные бинарные форматы: MessagePack и CBOR.
+Если установлены msgpack или cbor2, кодируем через них, иначе через реализацию на чистом python.
+Обе реализации совместимы между собой, поэтому стороны могут использовать любую из них.
+
+Decimal, datetime, date и UUID передаются своими типами:
+в MessagePack через timestamp (-1) и свои расширения, в CBOR через стандартные теги.
+naive datetime передается как UTC.
+Вложенность при разборе ограничена `AUTO_REST.BINARY.MAX_DEPTH`: реализации на чистом python проверяют ее по ходу
+разбора, а результат msgpack и cbor2 проверяется после (их собственные лимиты вложенности намного больше).
+Длины строк, массивов и словарей в msgpack не могут быть больше длины самих данных.
+
+"""
+import datetime
+import decimal
+import io
+import struct
+import uuid
+
+from django.utils.dateparse import parse_date, parse_datetime
+
+from .encoders import encode_datetime, encode_default
+from .settings import DefaultSettings
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import cbor2
+except ImportError:
+    cbor2 = None
+
+
+# Коды расширений MessagePack. -1 - стандартный timestamp.
+EXT_TIMESTAMP = -1
+EXT_DECIMAL = 1
+EXT_UUID = 2
+EXT_DATE = 3
+
+# Теги CBOR (RFC 8949, RFC 8943).
+TAG_DATETIME = 0
+TAG_EPOCH = 1
+TAG_POSITIVE_BIGNUM = 2
+TAG_NEGATIVE_BIGNUM = 3
+TAG_DECIMAL = 4
+TAG_UUID = 37
+TAG_EPOCH_DATE = 100
+TAG_DATE = 1004
+
+EPOCH = datetime.datetime(1970, 1, 1, tzinfo=datetime.timezone.utc)
+EPOCH_DATE = datetime.date(1970, 1, 1)
+
+# Значения с вложенными элементами в разобранных данных.
+_CONTAINERS = (dict, list, tuple) if cbor2 is None else (dict, list, tuple, cbor2.CBORTag)
+
+# Ошибки разбора, которые отдаются как ValueError: неверные значения, даты вне диапазона (OverflowError)
+# и слишком глубокая вложенность (RecursionError, в python 3.4 это RuntimeError).
+DECODE_ERRORS = (ValueError, OverflowError, RuntimeError)
+
+
+def to_aware(value):
+    """
+    naive datetime считаем UTC.
+
+    """
+    return value if value.tzinfo is not None else value.replace(tzinfo=datetime.timezone.utc)
+
+
+class MessagePackCodec(object):
+    """
+    MessagePack.
+
+    """
+    name = 'msgpack'
+
+    def dumps(self, data):
+        """
+        :param data: Данные.
+
+        :rtype: bytes
+
+        """
+        if msgpack is not None:
+            return msgpack.packb(data, default=_msgpack_default, use_bin_type=True)
+        out = bytearray()
+        _msgpack_encode(data, out)
+        return bytes(out)
+
+    def loads(self, content):
+        """
+        :param bytes content: Закодированные данные.
+
+        :return: Данные.
+
+        :raises:
+            ValueError: Неверные данные.
+
+        """
+        if msgpack is not None:
+            size = len(content)
+            try:
+                data = msgpack.unpackb(
+                    content, raw=False, ext_hook=_msgpack_from_ext, timestamp=3, strict_map_key=False,
+                    max_str_len=size, max_bin_len=size, max_array_len=size, max_map_len=size, max_ext_len=size
+                )
+            except (msgpack.UnpackException, TypeError) + DECODE_ERRORS as e:
+                raise ValueError(str(e) or e.__class__.__name__)
+            check_depth(data)
+            return data
+        return _Decoder(content, _msgpack_decode).decode()
+
+
+class CBORCodec(object):
+    """
+    CBOR.
+
+    """
+    name = 'cbor'
+
+    def dumps(self, data):
+        """
+        :param data: Данные.
+
+        :rtype: bytes
+
+        """
+        if cbor2 is not None:
+            return cbor2.dumps(data, default=_cbor_default, timezone=datetime.timezone.utc)
+        out = bytearray()
+        _cbor_encode(data, out)
+        return bytes(out)
+
+    def loads(self, content):
+        """
+        :param bytes content: Закодированные данные.
+
+        :return: Данные.
+
+        :raises:
+            ValueError: Неверные данные.
+
+        """
+        if cbor2 is not None:
+            stream = io.BytesIO(content)
+            try:
+                data = cbor2.load(stream)
+            except (cbor2.CBORError, TypeError) + DECODE_ERRORS as e:
+                raise ValueError(str(e) or e.__class__.__name__)
+            # cbor2 сам лишние данные не замечает.
+            if stream.tell() != len(content):
+                raise ValueError('Лишние данные после позиции {}.'.format(stream.tell()))
+            check_depth(data)
+            return data
+        return _Decoder(content, _cbor_decode).decode()
+
+
+CODECS = {
+    'msgpack': MessagePackCodec(),
+    'cbor': CBORCodec(),
+}
+
+
+def get_binary_codec(name):
+    """
+    Возвращает кодек бинарного формата.
+
+    :param str name: msgpack или cbor.
+
+    :rtype: MessagePackCodec
+
+    """
+    return CODECS[name]
+
+
+def check_depth(data, max_depth=None):
+    """
+    Проверяет вложенность уже разобранных данных так же, как ее считает `_Decoder`:
+    значение верхнего уровня - 1, элементы непустого контейнера - на 1 глубже самого контейнера.
+
+    :param data: Данные.
+    :param int max_depth: Максимальная вложенность. None - берется из настроек.
+
+    :raises:
+        ValueError: Слишком глубокая вложенность.
+
+    """
+    max_depth = max_depth or DefaultSettings.AUTO_REST.BINARY.MAX_DEPTH
+    stack = [(data, 1)] if isinstance(data, _CONTAINERS) else []
+    while stack:
+        value, depth = stack.pop()
+        if isinstance(value, dict):
+            items = list(value)
+            items.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            items = value
+        else:
+            # Неизвестный тег cbor2.
+            items = (value.value,)
+        if items and depth >= max_depth:
+            raise ValueError('Слишком глубокая вложенность: больше {}.'.format(max_depth))
+        stack.extend((item, depth + 1) for item in items if isinstance(item, _CONTAINERS))
+
+
+class _Decoder(object):
+    """
+    Чтение бинарных данных для реализаций на чистом python.
+
+    """
+    def __init__(self, content, decode_item, max_depth=None):
+        """
+        :param bytes content: Закодированные данные.
+        :param callable decode_item: Функция (decoder) -> значение.
+        :param int max_depth: Максимальная вложенность. None - берется из настроек.
+
+        """
+        self.content = bytes(content)
+        self.pos = 0
+        self.decode_item = decode_item
+        self.depth = 0
+        self.max_depth = max_depth or DefaultSettings.AUTO_REST.BINARY.MAX_DEPTH
+
+    def decode(self):
+        try:
+            value = self.item()
+        except (struct.error, IndexError, TypeError, UnicodeDecodeError, OverflowError, RuntimeError) as e:
+            raise ValueError('Неверные данные: {}.'.format(e))
+        if self.pos != len(self.content):
+            raise ValueError('Лишние данные после позиции {}.'.format(self.pos))
+        return value
+
+    def item(self):
+        """
+        Разбирает следующее значение, следя за вложенностью.
+
+        :raises:
+            ValueError: Слишком глубокая вложенность.
+
+        """
+        self.depth += 1
+        if self.depth > self.max_depth:
+            raise ValueError('Слишком глубокая вложенность: больше {}.'.format(self.max_depth))
+        value = self.decode_item(self)
+        self.depth -= 1
+        return value
+
+    def read(self, size):
+        end = self.pos + size
+        if end > len(self.content):
+            raise ValueError('Данные закончились раньше времени.')
+        chunk = self.content[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def read_byte(self):
+        return self.read(1)[0]
+
+    def unpack(self, fmt, size):
+        return struct.unpack(fmt, self.read(size))[0]
+
+
+# MessagePack.
+
+def _msgpack_to_ext(value):
+    """
+    Расширение MessagePack для значения.
+
+    :return: (код, данные) или None.
+    :rtype: tuple
+
+    """
+    if isinstance(value, datetime.datetime):
+        return EXT_TIMESTAMP, _pack_timestamp(to_aware(value))
+    if isinstance(value, datetime.date):
+        return EXT_DATE, value.isoformat().encode('ascii')
+    if isinstance(value, decimal.Decimal):
+        return EXT_DECIMAL, str(value).encode('ascii')
+    if isinstance(value, uuid.UUID):
+        return EXT_UUID, value.bytes
+    return None
+
+
+def _msgpack_from_ext(code, data):
+    """
+    Значение из расширения MessagePack.
+
+    """
+    if code == EXT_TIMESTAMP:
+        return _unpack_timestamp(data)
+    if code == EXT_DATE:
+        return _parse_or_fail(parse_date, data)
+    if code == EXT_DECIMAL:
+        try:
+            return decimal.Decimal(data.decode('ascii'))
+        except (decimal.InvalidOperation, UnicodeDecodeError):
+            raise ValueError('Неверный Decimal.')
+    if code == EXT_UUID:
+        return uuid.UUID(bytes=bytes(data))
+    raise ValueError('Неизвестное расширение MessagePack {}.'.format(code))
+
+
+def _msgpack_default(value):
+    """
+    `default` для msgpack.
+
+    """
+    if isinstance(value, datetime.datetime):
+        return msgpack.Timestamp.from_datetime(to_aware(value))
+    ext = _msgpack_to_ext(value)
+    if ext is not None:
+        return msgpack.ExtType(*ext)
+    return encode_default(value)
+
+
+def _pack_timestamp(value):
+    """
+    Самый короткий из форматов timestamp 32, 64 и 96.
+
+    """
+    delta = value - EPOCH
+    seconds = delta.days * 86400 + delta.seconds
+    nanoseconds = delta.microseconds * 1000
+    if seconds >> 34 == 0:
+        data64 = nanoseconds << 34 | seconds
+        if data64 & 0xffffffff00000000 == 0:
+            return struct.pack('>I', data64)
+        return struct.pack('>Q', data64)
+    return struct.pack('>Iq', nanoseconds, seconds)
+
+
+def _unpack_timestamp(data):
+    if len(data) == 4:
+        seconds, nanoseconds = struct.unpack('>I', data)[0], 0
+    elif len(data) == 8:
+        data64 = struct.unpack('>Q', data)[0]
+        seconds, nanoseconds = data64 & 0x00000003ffffffff, data64 >> 34
+    elif len(data) == 12:
+        nanoseconds, seconds = struct.unpack('>Iq', data)
+    else:
+        raise ValueError('Неверный timestamp.')
+    return EPOCH + datetime.timedelta(seconds=seconds, microseconds=nanoseconds // 1000)
+
+
+def _msgpack_encode(value, out):
+    if value is None:
+        out.append(0xc0)
+    elif value is True:
+        out.append(0xc3)
+    elif value is False:
+        out.append(0xc2)
+    elif isinstance(value, int):
+        _msgpack_int(value, out)
+    elif isinstance(value, float):
+        out.append(0xcb)
+        out += struct.pack('>d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        size = len(data)
+        if size < 32:
+            out.append(0xa0 | size)
+        else:
+            _msgpack_size(size, out, 0xd9, 0xda, 0xdb)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _msgpack_size(len(data), out, 0xc4, 0xc5, 0xc6)
+        out += data
+    elif isinstance(value, dict):
+        size = len(value)
+        if size < 16:
+            out.append(0x80 | size)
+        else:
+            _msgpack_size(size, out, None, 0xde, 0xdf)
+        for key, item in value.items():
+            _msgpack_encode(key, out)
+            _msgpack_encode(item, out)
+    elif isinstance(value, (list, tuple)):
+        size = len(value)
+        if size < 16:
+            out.append(0x90 | size)
+        else:
+            _msgpack_size(size, out, None, 0xdc, 0xdd)
+        for item in value:
+            _msgpack_encode(item, out)
+    else:
+        ext = _msgpack_to_ext(value)
+        if ext is None:
+            _msgpack_encode(encode_default(value), out)
+        else:
+            _msgpack_ext(ext[0], ext[1], out)
+
+
+def _msgpack_int(value, out):
+    if 0 <= value < 0x80:
+        out.append(value)
+    elif -32 <= value < 0:
+        out.append(value & 0xff)
+    elif value >= 0:
+        for limit, marker, fmt in ((0xff, 0xcc, '>B'), (0xffff, 0xcd, '>H'), (0xffffffff, 0xce, '>I'),
+                                   (0xffffffffffffffff, 0xcf, '>Q')):
+            if value <= limit:
+                out.append(marker)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError('Целое не влезает в 64 бита.')
+    else:
+        for limit, marker, fmt in ((-0x80, 0xd0, '>b'), (-0x8000, 0xd1, '>h'), (-0x80000000, 0xd2, '>i'),
+                                   (-0x8000000000000000, 0xd3, '>q')):
+            if value >= limit:
+                out.append(marker)
+                out += struct.pack(fmt, value)
+                return
+        raise OverflowError('Целое не влезает в 64 бита.')
+
+
+def _msgpack_size(size, out, marker8, marker16, marker32):
+    if marker8 is not None and size < 0x100:
+        out.append(marker8)
+        out.append(size)
+    elif size < 0x10000:
+        out.append(marker16)
+        out += struct.pack('>H', size)
+    else:
+        out.append(marker32)
+        out += struct.pack('>I', size)
+
+
+def _msgpack_ext(code, data, out):
+    size = len(data)
+    fixext = {1: 0xd4, 2: 0xd5, 4: 0xd6, 8: 0xd7, 16: 0xd8}.get(size)
+    if fixext is not None:
+        out.append(fixext)
+    else:
+        _msgpack_size(size, out, 0xc7, 0xc8, 0xc9)
+    out += struct.pack('>b', code)
+    out += data
+
+
+def _msgpack_decode(decoder):
+    byte = decoder.read_byte()
+    if byte <= 0x7f:
+        return byte
+    if byte >= 0xe0:
+        return byte - 0x100
+    if 0x80 <= byte <= 0x8f:
+        return _msgpack_map(decoder, byte & 0x0f)
+    if 0x90 <= byte <= 0x9f:
+        return [decoder.item() for _ in range(byte & 0x0f)]
+    if 0xa0 <= byte <= 0xbf:
+        return decoder.read(byte & 0x1f).decode('utf-8')
+    if byte == 0xc0:
+        return None
+    if byte == 0xc2:
+        return False
+    if byte == 0xc3:
+        return True
+    if byte in _MSGPACK_NUMBERS:
+        fmt, size = _MSGPACK_NUMBERS[byte]
+        return decoder.unpack(fmt, size)
+    if byte in _MSGPACK_SIZES:
+        kind, fmt, size = _MSGPACK_SIZES[byte]
+        length = decoder.unpack(fmt, size)
+        if kind == 'str':
+            return decoder.read(length).decode('utf-8')
+        if kind == 'bin':
+            return decoder.read(length)
+        if kind == 'array':
+            return [decoder.item() for _ in range(length)]
+        if kind == 'map':
+            return _msgpack_map(decoder, length)
+        code = decoder.unpack('>b', 1)
+        return _msgpack_from_ext(code, decoder.read(length))
+    if 0xd4 <= byte <= 0xd8:
+        code = decoder.unpack('>b', 1)
+        return _msgpack_from_ext(code, decoder.read(1 << (byte - 0xd4)))
+    raise ValueError('Неверный байт MessagePack 0x{:02x}.'.format(byte))
+
+
+def _msgpack_map(decoder, size):
+    result = {}
+    for _ in range(size):
+        key = decoder.item()
+        result[key] = decoder.item()
+    return result
+
+
+_MSGPACK_NUMBERS = {
+    0xca: ('>f', 4), 0xcb: ('>d', 8),
+    0xcc: ('>B', 1), 0xcd: ('>H', 2), 0xce: ('>I', 4), 0xcf: ('>Q', 8),
+    0xd0: ('>b', 1), 0xd1: ('>h', 2), 0xd2: ('>i', 4), 0xd3: ('>q', 8),
+}
+
+_MSGPACK_SIZES = {
+    0xc4: ('bin', '>B', 1), 0xc5: ('bin', '>H', 2), 0xc6: ('bin', '>I', 4),
+    0xc7: ('ext', '>B', 1), 0xc8: ('ext', '>H', 2), 0xc9: ('ext', '>I', 4),
+    0xd9: ('str', '>B', 1), 0xda: ('str', '>H', 2), 0xdb: ('str', '>I', 4),
+    0xdc: ('array', '>H', 2), 0xdd: ('array', '>I', 4),
+    0xde: ('map', '>H', 2), 0xdf: ('map', '>I', 4),
+}
+
+
+# CBOR.
+
+def _cbor_default(encoder, value):
+    """
+    `default` для cbor2: то, что он не умеет сам (ленивые строки, time, timedelta и прочее).
+
+    """
+    encoder.encode(encode_default(value))
+
+
+def _cbor_encode(value, out):
+    if value is None:
+        out.append(0xf6)
+    elif value is True:
+        out.append(0xf5)
+    elif value is False:
+        out.append(0xf4)
+    elif isinstance(value, int):
+        if value >= 0:
+            if value < 0x10000000000000000:
+                _cbor_head(0, value, out)
+            else:
+                _cbor_head(6, TAG_POSITIVE_BIGNUM, out)
+                _cbor_encode(_int_to_bytes(value), out)
+        else:
+            value = -1 - value
+            if value < 0x10000000000000000:
+                _cbor_head(1, value, out)
+            else:
+                _cbor_head(6, TAG_NEGATIVE_BIGNUM, out)
+                _cbor_encode(_int_to_bytes(value), out)
+    elif isinstance(value, float):
+        out.append(0xfb)
+        out += struct.pack('>d', value)
+    elif isinstance(value, str):
+        data = value.encode('utf-8')
+        _cbor_head(3, len(data), out)
+        out += data
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        data = bytes(value)
+        _cbor_head(2, len(data), out)
+        out += data
+    elif isinstance(value, dict):
+        _cbor_head(5, len(value), out)
+        for key, item in value.items():
+            _cbor_encode(key, out)
+            _cbor_encode(item, out)
+    elif isinstance(value, (list, tuple)):
+        _cbor_head(4, len(value), out)
+        for item in value:
+            _cbor_encode(item, out)
+    elif isinstance(value, datetime.datetime):
+        _cbor_head(6, TAG_DATETIME, out)
+        _cbor_encode(encode_datetime(to_aware(value)), out)
+    elif isinstance(value, datetime.date):
+        _cbor_head(6, TAG_DATE, out)
+        _cbor_encode(value.isoformat(), out)
+    elif isinstance(value, decimal.Decimal) and value.is_finite():
+        sign, digits, exponent = value.as_tuple()
+        mantissa = int(''.join(str(digit) for digit in digits) or '0')
+        _cbor_head(6, TAG_DECIMAL, out)
+        _cbor_encode([exponent, -mantissa if sign else mantissa], out)
+    elif isinstance(value, decimal.Decimal):
+        _cbor_encode(float(value), out)
+    elif isinstance(value, uuid.UUID):
+        _cbor_head(6, TAG_UUID, out)
+        _cbor_encode(value.bytes, out)
+    else:
+        _cbor_encode(encode_default(value), out)
+
+
+def _cbor_head(major, argument, out):
+    major <<= 5
+    if argument < 24:
+        out.append(major | argument)
+    elif argument < 0x100:
+        out.append(major | 24)
+        out.append(argument)
+    elif argument < 0x10000:
+        out.append(major | 25)
+        out += struct.pack('>H', argument)
+    elif argument < 0x100000000:
+        out.append(major | 26)
+        out += struct.pack('>I', argument)
+    else:
+        out.append(major | 27)
+        out += struct.pack('>Q', argument)
+
+
+def _cbor_decode(decoder):
+    byte = decoder.read_byte()
+    major, info = byte >> 5, byte & 0x1f
+
+    if major == 7:
+        return _cbor_simple(decoder, info)
+    if info == 31:
+        return _cbor_indefinite(decoder, major)
+    argument = _cbor_argument(decoder, info)
+
+    if major == 0:
+        return argument
+    if major == 1:
+        return -1 - argument
+    if major == 2:
+        return decoder.read(argument)
+    if major == 3:
+        return decoder.read(argument).decode('utf-8')
+    if major == 4:
+        return [decoder.item() for _ in range(argument)]
+    if major == 5:
+        result = {}
+        for _ in range(argument):
+            key = decoder.item()
+            result[key] = decoder.item()
+        return result
+    return _cbor_tag(argument, decoder.item())
+
+
+def _cbor_argument(decoder, info):
+    if info < 24:
+        return info
+    if info == 24:
+        return decoder.read_byte()
+    if info == 25:
+        return decoder.unpack('>H', 2)
+    if info == 26:
+        return decoder.unpack('>I', 4)
+    if info == 27:
+        return decoder.unpack('>Q', 8)
+    raise ValueError('Неверная длина CBOR {}.'.format(info))
+
+
+def _cbor_indefinite(decoder, major):
+    """
+    Элементы неопределенной длины, до байта 0xff.
+
+    """
+    items = []
+    while decoder.content[decoder.pos:decoder.pos + 1] != b'\xff':
+        if decoder.pos >= len(decoder.content):
+            raise ValueError('Данные закончились раньше времени.')
+        items.append(decoder.item())
+    decoder.pos += 1
+
+    if major == 2:
+        return b''.join(items)
+    if major == 3:
+        return ''.join(items)
+    if major == 4:
+        return items
+    if major == 5:
+        return dict(zip(items[::2], items[1::2]))
+    raise ValueError('Неопределенная длина у типа CBOR {}.'.format(major))
+
+
+def _cbor_simple(decoder, info):
+    if info == 20:
+        return False
+    if info == 21:
+        return True
+    if info in (22, 23):
+        return None
+    if info == 25:
+        return _half_to_float(decoder.unpack('>H', 2))
+    if info == 26:
+        return decoder.unpack('>f', 4)
+    if info == 27:
+        return decoder.unpack('>d', 8)
+    raise ValueError('Неподдерживаемое простое значение CBOR {}.'.format(info))
+
+
+def _cbor_tag(tag, value):
+    if tag == TAG_DATETIME:
+        return _parse_or_fail(parse_datetime, value)
+    if tag == TAG_EPOCH:
+        return EPOCH + datetime.timedelta(seconds=value)
+    if tag == TAG_POSITIVE_BIGNUM:
+        return int.from_bytes(value, 'big')
+    if tag == TAG_NEGATIVE_BIGNUM:
+        return -1 - int.from_bytes(value, 'big')
+    if tag == TAG_DECIMAL:
+        exponent, mantissa = value
+        digits = tuple(int(digit) for digit in str(abs(mantissa)))
+        return decimal.Decimal((1 if mantissa < 0 else 0, digits, exponent))
+    if tag == TAG_UUID:
+        return uuid.UUID(bytes=value)
+    if tag == TAG_EPOCH_DATE:
+        return EPOCH_DATE + datetime.timedelta(days=value)
+    if tag == TAG_DATE:
+        return _parse_or_fail(parse_date, value)
+    # Неизвестные теги пропускаем, значение отдаем как есть.
+    return value
+
+
+def _half_to_float(half):
+    sign = -1.0 if half >> 15 else 1.0
+    exponent = (half >> 10) & 0x1f
+    fraction = half & 0x3ff
+    if exponent == 0:
+        return sign * fraction * 2.0 ** -24
+    if exponent == 31:
+        return sign * float('inf') if fraction == 0 else float('nan')
+    return sign * (1 + fraction / 1024.0) * 2.0 ** (exponent - 15)
+
+
+def _int_to_bytes(value):
+    return value.to_bytes((value.bit_length() + 7) // 8 or 1, 'big')
+
+
+def _parse_or_fail(parse, value):
+    if isinstance(value, bytes):
+        value = value.decode('ascii')
+    result = parse(value)
+    if result is None:
+        raise ValueError('Неверное значение `{}`.'.format(value))
+    return result
@@ -0,0 +1,379 @@
+"""
+Кэширование готовых ответов Rest генериков.
+Инвалидация через поколения моделей: каждое сохранение или удаление объекта модели меняет ее поколение,
+а поколения всех моделей ответа входят в ключ кэша.
+
+"""
+import hashlib
+import logging
+import threading
+import time
+import uuid
+
+from django.apps import apps
+from django.core.cache import caches
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.http import HttpResponse
+
+from .settings import DefaultSettings
+
+
+logger = logging.getLogger(__name__)
+
+# Модель -> алиасы кэшей, в которых лежат ее поколения.
+_registry = {}
+_registry_lock = threading.Lock()
+
+
+class CachePolicy(object):
+    """
+    Описание того, как кэшировать ответ view.
+
+    >>> class BookView(RestRetrieveAPIView):
+    >>>     queryset = Book.objects.all()
+    >>>     cache_policy = CachePolicy(timeout=30, vary_on_user=True, dependencies=['app.Author'])
+
+    """
+    def __init__(self, timeout=None, vary_on_headers=None, vary_on_user=False, vary_on_query_params=None,
+                 cache_alias=None, dependencies=None, stale_while_revalidate=None):
+        """
+        :param int timeout: Сколько секунд ответ считается свежим.
+        :param iter vary_on_headers: Заголовки запроса, от которых зависит ответ.
+        :param bool vary_on_user: Зависит ли ответ от пользователя.
+        :param iter vary_on_query_params: Параметры запроса, от которых зависит ответ. None - от всех.
+        :param str cache_alias: Алиас кэша из `settings.CACHES`.
+        :param iter dependencies: Модели (или `app_label.Model`), изменения которых тоже сбрасывают кэш.
+        :param int stale_while_revalidate: Сколько секунд после истечения можно отдавать устаревший ответ,
+                                           пока один запрос его пересчитывает.
+
+        """
+        settings = DefaultSettings.AUTO_REST.CACHE
+        self.timeout = timeout if timeout is not None else settings.TIMEOUT
+        self.vary_on_headers = tuple(vary_on_headers or ())
+        self.vary_on_user = vary_on_user
+        self.vary_on_query_params = tuple(vary_on_query_params) if vary_on_query_params is not None else None
+        self.cache_alias = cache_alias or settings.CACHE_ALIAS
+        self.dependencies = tuple(dependencies or ())
+        self.stale_while_revalidate = stale_while_revalidate if stale_while_revalidate is not None \
+            else settings.STALE_WHILE_REVALIDATE
+
+    @property
+    def cache(self):
+        return caches[self.cache_alias]
+
+    def get_models(self, model=None):
+        """
+        Все модели, от которых зависит ответ.
+
+        :param django.db.models.Model model: Модель queryset view.
+
+        :return: Список моделей.
+        :rtype: list
+
+        """
+        result = [model] if model is not None else []
+        for dependency in self.dependencies:
+            result.append(apps.get_model(dependency) if isinstance(dependency, str) else dependency)
+        return result
+
+    def register(self, model=None):
+        """
+        Подписывает модели ответа на инвалидацию.
+
+        :param django.db.models.Model model: Модель queryset view.
+
+        """
+        for item in self.get_models(model):
+            register_model(item, self.cache_alias)
+
+    def get_key(self, request, model=None, vary_on_user=False):
+        """
+        Формирует ключ кэша для запроса.
+
+        :param rest_framework.request.Request request: Запрос.
+        :param django.db.models.Model model: Модель queryset view.
+        :param bool vary_on_user: Включить ли в ключ пользователя, даже если политика этого не требует.
+
+        :return: Ключ кэша.
+        :rtype: str
+
+        """
+        digest = build_request_key(
+            request, vary_on_query_params=self.vary_on_query_params, vary_on_headers=self.vary_on_headers,
+            vary_on_user=self.vary_on_user or vary_on_user,
+            extra=get_model_versions(self.get_models(model), self.cache)
+        )
+        return '{}:response:{}'.format(DefaultSettings.AUTO_REST.CACHE.KEY_PREFIX, digest)
+
+    def get(self, key):
+        """
+        Достает ответ из кэша.
+
+        :param str key: Ключ кэша.
+
+        :return: Запись кэша и флаг, свежая ли она. Или (None, False).
+        :rtype: tuple
+
+        """
+        entry = self.cache.get(key)
+        if entry is None:
+            return None, False
+        return entry, entry['expires'] > time.time()
+
+    def lock(self, key):
+        """
+        Пытается захватить право пересчитать устаревший ответ. Остальные в это время получают устаревший.
+
+        :param str key: Ключ кэша.
+
+        :return: Захватили ли.
+        :rtype: bool
+
+        """
+        return self.cache.add(key + ':lock', 1, DefaultSettings.AUTO_REST.CACHE.LOCK_TIMEOUT)
+
+    def set(self, key, response):
+        """
+        Кладет отрендеренный ответ в кэш.
+
+        :param str key: Ключ кэша.
+        :param django.http.HttpResponse response: Отрендеренный ответ.
+
+        """
+        entry = response_to_entry(response)
+        entry['expires'] = time.time() + self.timeout
+        self.cache.set(key, entry, self.timeout + self.stale_while_revalidate)
+
+    def unlock(self, key):
+        """
+        Отпускает право пересчитать устаревший ответ.
+
+        :param str key: Ключ кэша.
+
+        """
+        self.cache.delete(key + ':lock')
+
+    @staticmethod
+    def build_response(entry):
+        """
+        Собирает ответ из записи кэша.
+
+        :param dict entry: Запись кэша.
+
+        :return: Ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        return entry_to_response(entry)
+
+
+def response_to_entry(response):
+    """
+    Превращает отрендеренный ответ в словарь, который можно положить в кэш или отдать другому потоку.
+
+    :param django.http.HttpResponse response: Отрендеренный ответ.
+
+    :return: Словарь с телом, статусом и заголовками.
+    :rtype: dict
+
+    """
+    return {
+        'content': response.content,
+        'status': response.status_code,
+        'headers': list(response.items()),
+    }
+
+
+def entry_to_response(entry):
+    """
+    Собирает новый объект ответа из словаря `response_to_entry`.
+
+    :param dict entry: Словарь с телом, статусом и заголовками.
+
+    :return: Ответ.
+    :rtype: django.http.HttpResponse
+
+    """
+    response = HttpResponse(content=entry['content'], status=entry['status'])
+    for header, value in entry['headers']:
+        response[header] = value
+    return response
+
+
+def build_request_key(request, vary_on_query_params=None, vary_on_headers=(), vary_on_user=False, extra=(),
+                      vary_on_method=True, vary_on_media_type=True, vary_on_path=True):
+    """
+    Нормализованный ключ запроса.
+
+    :param rest_framework.request.Request request: Запрос.
+    :param iter vary_on_query_params: Параметры запроса, которые входят в ключ. None - все.
+    :param iter vary_on_headers: Заголовки запроса, которые входят в ключ.
+    :param bool vary_on_user: Входит ли в ключ пользователь.
+    :param iter extra: Дополнительные строки для ключа.
+    :param bool vary_on_method: Входит ли в ключ метод запроса.
+    :param bool vary_on_media_type: Входит ли в ключ выбранный формат ответа.
+    :param bool vary_on_path: Входит ли в ключ путь запроса.
+
+    :return: Хэш ключа.
+    :rtype: str
+
+    """
+    params = request.query_params
+    names = sorted(params) if vary_on_query_params is None else sorted(vary_on_query_params)
+    parts = [
+        request.method if vary_on_method else '',
+        request.path if vary_on_path else '',
+        getattr(request, 'accepted_media_type', '') if vary_on_media_type else '',
+        '&'.join('{}={}'.format(name, ','.join(params.getlist(name))) for name in names),
+    ]
+    parts.extend(request.META.get(_header_to_meta(header), '') for header in vary_on_headers)
+    if vary_on_user:
+        user = getattr(request, 'user', None)
+        parts.append(str(user.pk) if user is not None and user.is_authenticated else 'anonymous')
+    parts.extend(str(item) for item in extra)
+    return hashlib.sha1('\n'.join(parts).encode('utf-8')).hexdigest()
+
+
+def get_cache_policy(policy):
+    """
+    Превращает описание политики кэширования в объект.
+
+    :param Union[CachePolicy, dict, None] policy: Политика, словарь с аргументами для нее или None.
+
+    :return: Политика или None, если кэшировать не нужно.
+    :rtype: CachePolicy
+
+    """
+    if isinstance(policy, dict):
+        return CachePolicy(**policy)
+    return policy
+
+
+def _header_to_meta(header):
+    """
+    Имя заголовка в ключ `request.META`.
+
+    """
+    header = header.upper().replace('-', '_')
+    if header in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+        return header
+    return 'HTTP_' + header
+
+
+def _version_key(model):
+    return '{}:version:{}'.format(DefaultSettings.AUTO_REST.CACHE.KEY_PREFIX, model._meta.concrete_model._meta.label)
+
+
+def get_model_versions(models, cache):
+    """
+    Текущие поколения моделей. Если поколения еще нет, создаем его.
+
+    :param iter models: Модели.
+    :param django.core.cache.backends.base.BaseCache cache: Кэш.
+
+    :return: Поколения в порядке моделей.
+    :rtype: list
+
+    """
+    keys = [_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    result = []
+    for key in keys:
+        version = versions.get(key)
+        if version is None:
+            cache.add(key, uuid.uuid4().hex, None)
+            version = cache.get(key)
+        result.append(version)
+    return result
+
+
+def invalidate_model(model):
+    """
+    Сбрасывает все закэшированные ответы, зависящие от модели.
+    Нужно вызывать вручную, если модель меняется в обход сигналов (`update()`, `bulk_create()`, сырой SQL).
+
+    :param django.db.models.Model model: Модель.
+
+    """
+    model = model._meta.concrete_model
+    for alias in _registry.get(model, ()):
+        caches[alias].set(_version_key(model), uuid.uuid4().hex, None)
+
+
+def register_model(model, cache_alias):
+    """
+    Подписывает модель на инвалидацию кэша.
+    Сигналы подключаются только для самой модели, ее proxy моделей и ее many-to-many таблиц,
+    что бы не мешать быстрому удалению (`QuerySet.delete()` без загрузки объектов) остальных моделей проекта.
+
+    :param django.db.models.Model model: Модель.
+    :param str cache_alias: Алиас кэша, в котором лежат ответы.
+
+    """
+    model = model._meta.concrete_model
+    if cache_alias in _registry.get(model, ()):
+        return
+    with _registry_lock:
+        _registry.setdefault(model, set()).add(cache_alias)
+
+    for sender in get_model_senders(model):
+        uid = sender._meta.label
+        post_save.connect(_invalidate_receiver, sender=sender, dispatch_uid='drf_auto.cache.post_save.' + uid)
+        post_delete.connect(_invalidate_receiver, sender=sender, dispatch_uid='drf_auto.cache.post_delete.' + uid)
+    for through in get_m2m_through_models(model):
+        m2m_changed.connect(
+            _invalidate_m2m_receiver, sender=through,
+            dispatch_uid='drf_auto.cache.m2m_changed.' + through._meta.label
+        )
+
+
+def get_model_senders(model):
+    """
+    Модели, от имени которых приходят сигналы об изменении объектов модели: она сама и ее proxy.
+
+    :param django.db.models.Model model: Конкретная модель.
+
+    :rtype: list
+
+    """
+    return [model] + [
+        item for item in apps.get_models()
+        if item._meta.proxy and item._meta.concrete_model is model
+    ]
+
+
+def get_m2m_through_models(model):
+    """
+    Промежуточные модели many-to-many связей модели, в обе стороны.
+
+    :param django.db.models.Model model: Модель.
+
+    :rtype: list
+
+    """
+    result = [field.remote_field.through for field in model._meta.many_to_many]
+    result += [
+        rel.through for rel in model._meta.get_fields(include_hidden=True)
+        if rel.auto_created and not rel.concrete and rel.many_to_many and getattr(rel, 'through', None)
+    ]
+    return result
+
+
+def _invalidate_receiver(sender, **kwargs):
+    """
+    Обработчик сигналов изменения моделей.
+
+    """
+    if sender._meta.concrete_model in _registry:
+        invalidate_model(sender)
+
+
+def _invalidate_m2m_receiver(sender, instance, model, action, **kwargs):
+    """
+    Обработчик изменения many-to-many связей. Меняются обе стороны связи.
+
+    """
+    if action.startswith('post_'):
+        for item in (instance.__class__, model):
+            if item._meta.concrete_model in _registry:
+                invalidate_model(item)
@@ -0,0 +1,150 @@
+"""
+Условные запросы: ETag и Last-Modified для Rest генериков.
+
+"""
+import calendar
+import datetime
+import hashlib
+import json
+import logging
+
+from django.db.models import Count, Max
+from django.utils.module_loading import import_string
+
+from rest_framework.utils.encoders import JSONEncoder
+
+from .cache import build_request_key
+from .settings import DefaultSettings
+
+
+logger = logging.getLogger(__name__)
+
+
+class BaseConditionalStrategy(object):
+    """
+    Базовый интерфейс стратегии ETag/Last-Modified.
+
+    """
+    def get_validators(self, view, request):
+        """
+        Дешево, без серилизации, вычисляет ETag и Last-Modified текущей версии ресурса.
+
+        :param rest_framework.views.APIView view: Вьюха.
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: (etag, last_modified) или None, если стратегия так не умеет или объекта нет.
+                 last_modified - время в секундах от начала эпохи или None.
+        :rtype: tuple
+
+        """
+        return None
+
+    def get_data_etag(self, view, data):
+        """
+        Вычисляет ETag по уже серилизованным данным ответа.
+
+        :param rest_framework.views.APIView view: Вьюха.
+        :param any data: Серилизованные данные.
+
+        :return: ETag или None.
+        :rtype: str
+
+        """
+        return None
+
+
+class VersionConditionalStrategy(BaseConditionalStrategy):
+    """
+    ETag по колонке версии (`updated_at` или счетчик) одним агрегирующим запросом.
+    Для списка в версию входит и количество объектов, что бы ловить удаления.
+
+    """
+    def __init__(self, field=None):
+        """
+        :param str field: Колонка с временем изменения или номером версии.
+
+        """
+        self.field = field or DefaultSettings.AUTO_REST.CONDITIONAL.VERSION_FIELD
+
+    def get_validators(self, view, request):
+        queryset = view.get_conditional_queryset()
+        if queryset is None:
+            return None
+        result = queryset.order_by().aggregate(version=Max(self.field), count=Count('pk'))
+        if view.is_conditional_detail() and not result['count']:
+            # Объекта нет, пусть обычная обработка вернет 404.
+            return None
+
+        version = result['version']
+        last_modified = None
+        if isinstance(version, datetime.datetime):
+            last_modified = calendar.timegm(version.utctimetuple())
+
+        raw = '{}:{}:{}:{}'.format(
+            queryset.model._meta.label, version, result['count'], _representation_key(view, request)
+        )
+        return make_etag(raw), last_modified
+
+
+class HashConditionalStrategy(BaseConditionalStrategy):
+    """
+    ETag по хэшу серилизованных данных. Серилизация выполняется, но рендеринг при совпадении - нет.
+
+    """
+    def get_data_etag(self, view, data):
+        raw = json.dumps(data, cls=JSONEncoder, separators=(',', ':'), ensure_ascii=False)
+        return make_etag(raw)
+
+
+CONDITIONAL_STRATEGIES = {
+    'version': VersionConditionalStrategy,
+    'hash': HashConditionalStrategy,
+}
+
+
+def get_conditional_strategy(strategy):
+    """
+    Превращает описание стратегии в объект стратегии.
+
+    :param Union[str, type, BaseConditionalStrategy, None] strategy: Имя из `CONDITIONAL_STRATEGIES`,
+                                                                     путь до класса, класс или объект.
+
+    :return: Объект стратегии или None, если условные запросы выключены.
+    :rtype: BaseConditionalStrategy
+
+    """
+    if strategy is None:
+        strategy = DefaultSettings.AUTO_REST.CONDITIONAL.STRATEGY
+    if not strategy:
+        return None
+    if isinstance(strategy, str):
+        strategy = CONDITIONAL_STRATEGIES.get(strategy) or import_string(strategy)
+    if isinstance(strategy, type):
+        strategy = strategy()
+    return strategy
+
+
+def make_etag(raw):
+    """
+    Сильный ETag из строки.
+
+    :param str raw: Строка, описывающая версию ресурса.
+
+    :return: ETag в кавычках.
+    :rtype: str
+
+    """
+    return '"{}"'.format(hashlib.sha1(raw.encode('utf-8')).hexdigest())
+
+
+def _representation_key(view, request):
+    """
+    Параметры запроса, от которых зависит представление ресурса: именованные части урла и параметры запроса.
+    Метод, путь и формат ответа не входят, что бы ETag от GET подходил для If-Match при записи,
+    даже если запись идет по другому урлу.
+
+    """
+    kwargs = sorted((str(key), str(value)) for key, value in getattr(view, 'kwargs', {}).items())
+    return build_request_key(
+        request, vary_on_method=False, vary_on_path=False, vary_on_media_type=False, extra=kwargs
+    )
@@ -0,0 +1,255 @@
+"""
+Кодирование JSON для рендереров и парсеров DRF-Auto.
+Если установлен orjson или ujson, работаем через него, иначе через стандартный json.
+
+"""
+import datetime
+import decimal
+import json
+import threading
+import uuid
+
+from django.utils.functional import Promise
+from rest_framework.utils.encoders import JSONEncoder
+
+from .settings import DefaultSettings
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# Порядок, в котором выбирается бэкенд, если он не указан в настройках.
+JSON_BACKEND_ORDER = ('orjson', 'ujson', 'json')
+
+_backends = {}
+_backends_lock = threading.Lock()
+_drf_encoder = JSONEncoder()
+# Числа из 19+ цифр могут не влезть в 64 бита, а orjson превращает такие целые во float.
+# Ищем их через translate: цифры -> 0, остальное -> пробел. Это намного быстрее регулярки.
+_DIGITS_TABLE = bytes(48 if 48 <= index <= 57 else 32 for index in range(256))
+_LONG_NUMBER = b'0' * 19
+
+
+def encode_datetime(value):
+    """
+    datetime так же, как в DRF: ISO 8601 и `Z` вместо `+00:00`.
+
+    """
+    representation = value.isoformat()
+    if representation.endswith('+00:00'):
+        representation = representation[:-6] + 'Z'
+    return representation
+
+
+# Преобразования по точному типу: один поиск в словаре вместо цепочки isinstance у DRF.
+DEFAULT_ENCODERS = {
+    decimal.Decimal: float,
+    uuid.UUID: str,
+    datetime.datetime: encode_datetime,
+    datetime.date: datetime.date.isoformat,
+    datetime.timedelta: lambda value: str(value.total_seconds()),
+}
+
+
+# Типы, которые быстрые бэкенды кодируют так же, как DRF (сами или через `encode_default`).
+_EXACT_TYPES = frozenset((
+    str, int, bool, type(None), uuid.UUID, datetime.datetime, datetime.date, datetime.time, datetime.timedelta
+))
+
+
+def contains_floats(data):
+    """
+    Есть ли в данных float или Decimal (он кодируется как float), в том числе в ключах словарей
+    и в том, во что `encode_default` превращает прочие объекты.
+
+    :param data: Данные.
+
+    :rtype: bool
+
+    """
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        value_type = type(value)
+        if value_type in _EXACT_TYPES:
+            continue
+        if isinstance(value, dict):
+            stack.extend(value)
+            stack.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, (float, decimal.Decimal)):
+            return True
+        elif not isinstance(value, (str, int, Promise)):
+            # QuerySet, numpy и прочее: проверяем то, что из них сделает `encode_default`.
+            stack.append(encode_default(value))
+    return False
+
+
+def encode_default(value):
+    """
+    Преобразует то, что бэкенд не умеет кодировать сам. Результат совпадает с `JSONEncoder` из DRF.
+
+    :param value: Значение.
+
+    :return: Значение, которое бэкенд закодирует.
+
+    """
+    encoder = DEFAULT_ENCODERS.get(type(value))
+    if encoder is not None:
+        return encoder(value)
+    if isinstance(value, Promise):
+        return str(value)
+    # Подклассы, numpy, QuerySet и прочее - как в DRF.
+    return _drf_encoder.default(value)
+
+
+class JSONBackend(object):
+    """
+    Стандартный json. Компактный вывод, юникод без экранирования, без NaN.
+
+    """
+    name = 'json'
+
+    def dumps(self, data):
+        """
+        :param data: Данные.
+
+        :return: JSON.
+        :rtype: bytes
+
+        """
+        return json.dumps(
+            data, default=encode_default, ensure_ascii=False, allow_nan=False, separators=(',', ':')
+        ).encode('utf-8')
+
+    def is_exact(self, data, content):
+        """
+        Совпадает ли JSON с тем, что выдал бы `JSONEncoder` DRF. Если нет, рендерить нужно через DRF.
+
+        :param data: Данные.
+        :param bytes content: JSON этих данных от бэкенда.
+
+        :rtype: bool
+
+        """
+        return True
+
+    def loads(self, content):
+        """
+        :param content: JSON в bytes или str.
+
+        :return: Данные.
+
+        :raises:
+            ValueError: Неверный JSON.
+
+        """
+        if isinstance(content, (bytes, bytearray)):
+            content = content.decode('utf-8')
+        return json.loads(content, parse_constant=_reject_constant)
+
+
+class OrjsonBackend(JSONBackend):
+    """
+    orjson. datetime, date и UUID он кодирует сам, через `encode_default` идут только Decimal и ленивые строки.
+    Float orjson пишет без `+` в степени, а NaN и Infinity - как null, хотя DRF на них падает.
+
+    """
+    name = 'orjson'
+
+    def __init__(self):
+        self.option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+
+    def dumps(self, data):
+        return orjson.dumps(data, default=encode_default, option=self.option)
+
+    def is_exact(self, data, content):
+        return not contains_floats(data)
+
+    def loads(self, content):
+        raw = content.encode('utf-8') if isinstance(content, str) else bytes(content)
+        if _LONG_NUMBER in raw.translate(_DIGITS_TABLE):
+            return super().loads(content)
+        return orjson.loads(content)
+
+
+class UjsonBackend(JSONBackend):
+    """
+    ujson. Float он форматирует по-своему, а NaN и Infinity может писать как есть.
+
+    """
+    name = 'ujson'
+
+    def dumps(self, data):
+        return ujson.dumps(
+            data, default=encode_default, ensure_ascii=False, escape_forward_slashes=False
+        ).encode('utf-8')
+
+    def is_exact(self, data, content):
+        return not contains_floats(data)
+
+    def loads(self, content):
+        return ujson.loads(content)
+
+
+BACKEND_CLASSES = {
+    'json': (JSONBackend, json),
+    'orjson': (OrjsonBackend, orjson),
+    'ujson': (UjsonBackend, ujson),
+}
+
+
+def get_json_backend(name=None):
+    """
+    Возвращает бэкенд JSON.
+
+    :param str name: orjson, ujson или json. None - из настроек, а если там пусто, первый установленный.
+
+    :rtype: JSONBackend
+
+    :raises:
+        ValueError: Неизвестный или не установленный бэкенд.
+
+    """
+    if name is None:
+        name = DefaultSettings.AUTO_REST.JSON.BACKEND
+    if name is None:
+        name = next(item for item in JSON_BACKEND_ORDER if BACKEND_CLASSES[item][1] is not None)
+
+    backend = _backends.get(name)
+    if backend is None:
+        if name not in BACKEND_CLASSES:
+            raise ValueError('Неизвестный бэкенд JSON `{}`.'.format(name))
+        backend_class, module = BACKEND_CLASSES[name]
+        if module is None:
+            raise ValueError('Бэкенд JSON `{}` не установлен.'.format(name))
+        with _backends_lock:
+            backend = _backends.setdefault(name, backend_class())
+    return backend
+
+
+def loads(content):
+    """
+    Разбирает JSON быстрым бэкендом, если он включен в настройках, иначе стандартным json.
+
+    :param content: JSON в bytes или str.
+
+    :raises:
+        ValueError: Неверный JSON.
+
+    """
+    if DefaultSettings.AUTO_REST.JSON.ENABLED:
+        return get_json_backend().loads(content)
+    return json.loads(content)
+
+
+def _reject_constant(value):
+    raise ValueError('Недопустимое значение `{}`.'.format(value))
@@ -0,0 +1,188 @@
+"""
+Потоковая выгрузка списков в NDJSON и CSV.
+Queryset читается кусками, поэтому память не зависит от размера выгрузки.
+
+"""
+import decimal
+import threading
+from functools import lru_cache
+
+from rest_framework import serializers
+
+from .encoders import encode_default, get_json_backend
+from .planning import QueryPlanParser
+from .settings import DefaultSettings
+
+_cached_columns = None
+_cached_columns_lock = threading.Lock()
+
+
+def iter_chunks(queryset, chunk_size):
+    """
+    Читает queryset кусками по chunk_size объектов, каждый кусок - отдельный запрос со своим prefetch_related.
+    Если queryset отсортирован по pk или не отсортирован вовсе, идем по ключу (`pk > последний`),
+    иначе через OFFSET.
+
+    :param django.db.models.QuerySet queryset: Queryset выгрузки.
+    :param int chunk_size: Размер куска.
+
+    :return: Генератор списков объектов.
+    :rtype: iter
+
+    """
+    lookup = _get_keyset_lookup(queryset)
+    if lookup is None:
+        start = 0
+        while True:
+            chunk = list(queryset[start:start + chunk_size])
+            if chunk:
+                yield chunk
+            if len(chunk) < chunk_size:
+                return
+            start += chunk_size
+
+    if not queryset.ordered:
+        queryset = queryset.order_by('pk')
+    last = None
+    while True:
+        page = queryset if last is None else queryset.filter(**{lookup: last})
+        chunk = list(page[:chunk_size])
+        if chunk:
+            yield chunk
+        if len(chunk) < chunk_size:
+            return
+        last = chunk[-1].pk
+
+
+def _get_keyset_lookup(queryset):
+    """
+    Лукап для выборки следующего куска по pk, либо None, если по ключу идти нельзя.
+
+    """
+    query = queryset.query
+    if getattr(queryset, '_fields', None) is not None or query.low_mark or query.high_mark is not None:
+        return None
+    if not queryset.ordered:
+        return 'pk__gt'
+
+    pk = queryset.model._meta.pk
+    ordering = query.order_by or (queryset.model._meta.ordering if query.default_ordering else ())
+    if len(ordering) != 1 or not isinstance(ordering[0], str):
+        return None
+    name = ordering[0]
+    descending = name.startswith('-')
+    if name.lstrip('-') not in ('pk', pk.name, pk.attname):
+        return None
+    return 'pk__lt' if descending else 'pk__gt'
+
+
+def get_export_columns(serializer_class, fields=None):
+    """
+    Колонки CSV по филдам сериалайзера ответа, как их видит `StandardParser`.
+    Вложенный сериалайзер раскладывается на колонки через точку (`author.name`),
+    списки и прочие составные значения остаются одной колонкой в JSON.
+    Кэшируются по классу сериалайзера и набору филдов, не больше `AUTO_REST.EXPORT.CACHE_SIZE` штук.
+
+    :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+    :param frozenset fields: Филды верхнего уровня, которые выбрал клиент. None - все.
+
+    :return: Пути до значений в ответе.
+    :rtype: tuple
+
+    """
+    global _cached_columns
+    if _cached_columns is None:
+        with _cached_columns_lock:
+            if _cached_columns is None:
+                _cached_columns = lru_cache(maxsize=DefaultSettings.AUTO_REST.EXPORT.CACHE_SIZE)(build_export_columns)
+    return _cached_columns(serializer_class, fields)
+
+
+def build_export_columns(serializer_class, fields=None):
+    """
+    Колонки CSV без кэша. Параметры как у `get_export_columns`.
+
+    :rtype: tuple
+
+    """
+    props = QueryPlanParser().get_serializer_fields(serializer_class)
+    if fields is not None:
+        props = [item for item in props if item['name'] in fields]
+    return tuple(_props_to_columns(props, ()))
+
+
+def _props_to_columns(props, prefix):
+    for item in props:
+        field = item['field']
+        if field.write_only:
+            continue
+        path = prefix + (item['name'],)
+        if item['sub_fields'] and isinstance(field, serializers.Serializer):
+            for column in _props_to_columns(item['sub_fields'], path):
+                yield column
+        else:
+            yield path
+
+
+def get_data_columns(rows):
+    """
+    Колонки CSV по самим данным, когда сериалайзера нет: ключи всех строк в порядке появления,
+    вложенные словари раскладываются через точку.
+
+    :param list rows: Строки, словари.
+
+    :rtype: tuple
+
+    """
+    columns = []
+    seen = set()
+    for row in rows:
+        for column in _dict_to_columns(row, ()):
+            if column not in seen:
+                seen.add(column)
+                columns.append(column)
+    return tuple(columns)
+
+
+def _dict_to_columns(data, prefix):
+    for key, value in data.items():
+        path = prefix + (str(key),)
+        if isinstance(value, dict) and value:
+            for column in _dict_to_columns(value, path):
+                yield column
+        else:
+            yield path
+
+
+def get_column_value(row, column):
+    """
+    Значение колонки в строке ответа. Если по пути нет значения (например, вложенный объект null), то None.
+
+    :param dict row: Строка ответа.
+    :param tuple column: Путь до значения.
+
+    """
+    value = row
+    for key in column:
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def to_cell(value):
+    """
+    Значение ячейки CSV: null - пустая строка, bool как в JSON, списки и словари - JSON.
+
+    :rtype: str
+
+    """
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'true' if value else 'false'
+    if isinstance(value, (str, int, float, decimal.Decimal)):
+        return str(value)
+    if isinstance(value, (dict, list, tuple)):
+        return get_json_backend().dumps(value).decode('utf-8')
+    return str(encode_default(value))
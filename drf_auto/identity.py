@@ -0,0 +1,158 @@
+"""
+Identity map запроса: каждая строка БД загружается за запрос один раз и дальше отдается тем же объектом.
+Им пользуются `get_object()` Rest генериков, `IdentityPrimaryKeyRelatedField` и любые проверки,
+которые получают запрос: `get_identity_map(request).get(Book.objects.all(), pk)`.
+
+"""
+from django.core.exceptions import ValidationError as DjangoValidationError
+
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:  # Django < 1.11
+    from django.db.models.sql.datastructures import EmptyResultSet
+
+
+class IdentityMap(object):
+    """
+    Объекты, загруженные за один запрос, по модели, базе и pk.
+    Queryset с фильтрами может не пускать к части объектов, поэтому для такого queryset из карты отдаются
+    только объекты, которые уже были загружены именно через него.
+
+    """
+    def __init__(self):
+        self._objects = {}
+        # SQL queryset с фильтрами -> ключи объектов, которые через него загружены.
+        self._scopes = {}
+
+    def __len__(self):
+        return len(self._objects)
+
+    def add(self, instance, using=None):
+        """
+        Кладет объект в карту. Если объект с тем же pk уже есть, возвращает его.
+
+        :param django.db.models.Model instance: Объект.
+        :param str using: Алиас базы. None - из которой объект загружен.
+
+        :return: Объект из карты.
+        :rtype: django.db.models.Model
+
+        """
+        key = self._get_key(instance.__class__, instance.pk, using or instance._state.db)
+        return self._objects.setdefault(key, instance)
+
+    def discard(self, instance):
+        """
+        Убирает объект из карты, например после удаления.
+
+        :param django.db.models.Model instance: Объект.
+
+        """
+        self._objects.pop(self._get_key(instance.__class__, instance.pk, instance._state.db), None)
+
+    def get(self, queryset, pk):
+        """
+        Объект по pk: из карты или одним запросом.
+
+        :param django.db.models.QuerySet queryset: Queryset, которым проверяется доступ к объекту.
+        :param pk: Pk объекта.
+
+        :rtype: django.db.models.Model
+
+        :raises:
+            django.core.exceptions.ObjectDoesNotExist: Объекта нет в queryset.
+            ValueError: Неверный pk.
+
+        """
+        pk = self.to_pk(queryset.model, pk)
+        obj = self.get_many(queryset, [pk]).get(pk)
+        if obj is None:
+            raise queryset.model.DoesNotExist(
+                '{} matching query does not exist.'.format(queryset.model._meta.object_name)
+            )
+        return obj
+
+    def get_many(self, queryset, pks):
+        """
+        Объекты по списку pk. Недостающие в карте загружаются одним запросом `pk__in`.
+
+        :param django.db.models.QuerySet queryset: Queryset, которым проверяется доступ к объектам.
+        :param iter pks: Pk объектов.
+
+        :return: Словарь pk -> объект, без pk, которых нет в queryset.
+        :rtype: dict
+
+        :raises:
+            ValueError: Неверный pk.
+
+        """
+        model = queryset.model
+        using = queryset.db
+        scope = self._get_scope(queryset)
+        allowed = self._scopes.get(scope, set()) if scope is not None else None
+
+        result = {}
+        missing = []
+        for pk in pks:
+            pk = self.to_pk(model, pk)
+            key = self._get_key(model, pk, using)
+            if key in self._objects and (allowed is None or key in allowed):
+                result[pk] = self._objects[key]
+            elif pk not in result:
+                missing.append(pk)
+
+        if missing:
+            for obj in queryset.filter(pk__in=missing):
+                obj = self.add(obj, using)
+                result[obj.pk] = obj
+                if scope is not None:
+                    self._scopes.setdefault(scope, set()).add(self._get_key(model, obj.pk, using))
+        return result
+
+    @staticmethod
+    def to_pk(model, pk):
+        """
+        Приводит pk к типу колонки, что бы `'1'` и `1` были одним объектом.
+
+        :raises:
+            ValueError: Неверный pk.
+
+        """
+        try:
+            return model._meta.pk.to_python(pk)
+        except DjangoValidationError as e:
+            raise ValueError(e.messages[0])
+
+    @staticmethod
+    def _get_key(model, pk, using):
+        return model._meta.concrete_model, using, pk
+
+    @staticmethod
+    def _get_scope(queryset):
+        """
+        Область видимости queryset: None, если он без фильтров и видит все объекты модели, иначе его SQL.
+
+        """
+        query = queryset.query
+        if not query.where and not query.low_mark and query.high_mark is None and not query.distinct:
+            return None
+        try:
+            return str(query)
+        except EmptyResultSet:
+            return 'EmptyResultSet'
+
+
+def get_identity_map(request):
+    """
+    Identity map запроса. Хранится в `HttpRequest`, поэтому общая для обертки DRF и исходного запроса.
+
+    :param request: Запрос DRF или Django.
+
+    :rtype: IdentityMap
+
+    """
+    request = getattr(request, '_request', request)
+    identity_map = getattr(request, '_drf_auto_identity_map', None)
+    if identity_map is None:
+        identity_map = request._drf_auto_identity_map = IdentityMap()
+    return identity_map
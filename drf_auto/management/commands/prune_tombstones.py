@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from ...sync import prune_tombstones
+
+
+class Command(BaseCommand):
+    help = 'Удаляет устаревшие записи об удаленных объектах, которые хранятся для синхронизации списков.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=None,
+            help='Сколько дней хранить удаления. По дефолту AUTO_REST.SYNC.TOMBSTONE_TTL.'
+        )
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS, help='Алиас базы.')
+
+    def handle(self, *args, **options):
+        deleted = prune_tombstones(options['days'], options['database'])
+        self.stdout.write('Удалено записей: {}'.format(deleted))
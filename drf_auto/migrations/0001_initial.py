@@ -0,0 +1,28 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name='Tombstone',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('model', models.CharField(max_length=255, verbose_name='Модель')),
+                ('object_pk', models.CharField(max_length=255, verbose_name='Pk объекта')),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, verbose_name='Дата удаления')),
+            ],
+            options={
+                'verbose_name': 'Удаленный объект',
+                'verbose_name_plural': 'Удаленные объекты',
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='tombstone',
+            index_together={('model', 'id')},
+        ),
+    ]
@@ -1,3 +1,20 @@
 from django.db import models
 
-# Create your models here.
+
+class Tombstone(models.Model):
+    """
+    Запись об удаленном объекте, для синхронизации списков через `?since=`.
+    Порядковый номер удаления - id записи.
+
+    """
+    model = models.CharField('Модель', max_length=255)
+    object_pk = models.CharField('Pk объекта', max_length=255)
+    deleted_at = models.DateTimeField('Дата удаления', auto_now_add=True)
+
+    class Meta:
+        verbose_name = 'Удаленный объект'
+        verbose_name_plural = 'Удаленные объекты'
+        index_together = [('model', 'id')]
+
+    def __str__(self):
+        return '{} {}'.format(self.model, self.object_pk)
@@ -0,0 +1,405 @@
+"""
+Стратегии подсчета количества объектов для пагинации списков.
+
+"""
+import hashlib
+import json
+import logging
+from collections import OrderedDict
+
+from django.core.cache import caches
+from django.db import connections
+from django.utils.module_loading import import_string
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .settings import DefaultSettings
+
+try:
+    from django.core.exceptions import EmptyResultSet
+except ImportError:  # Django < 1.11
+    from django.db.models.sql.datastructures import EmptyResultSet
+
+logger = logging.getLogger(__name__)
+
+
+def positive_int(value, strict=False, cutoff=None):
+    """
+    Разбирает положительное целое из параметра запроса.
+
+    :param value: Значение параметра.
+    :param bool strict: Запрещать ли ноль.
+    :param int cutoff: Максимальное значение, большее обрезается до него.
+
+    :rtype: int
+
+    :raises:
+        ValueError: Не целое, отрицательное или ноль при strict.
+
+    """
+    value = int(value)
+    if value < 0 or (strict and value == 0):
+        raise ValueError(value)
+    if cutoff:
+        return min(value, cutoff)
+    return value
+
+
+class BaseCountStrategy(object):
+    """
+    Базовый интерфейс стратегии подсчета.
+
+    """
+    def count(self, queryset, view=None):
+        """
+        Считает количество объектов в queryset.
+
+        :param django.db.models.QuerySet queryset: Отфильтрованный queryset списка.
+        :param rest_framework.views.APIView view: Вьюха, для которой считаем.
+
+        :return: Количество объектов.
+        :rtype: int
+
+        """
+        raise NotImplementedError
+
+    def get_paginator(self, paginator, view=None):
+        """
+        Дает стратегии возможность подменить пагинатор вьюхи.
+
+        :param rest_framework.pagination.BasePagination paginator: Пагинатор вьюхи.
+        :param rest_framework.views.APIView view: Вьюха.
+
+        :return: Пагинатор, которым будем пользоваться.
+        :rtype: rest_framework.pagination.BasePagination
+
+        """
+        return paginator
+
+    def prepare_queryset(self, queryset, view=None):
+        """
+        Оборачивает queryset, что бы любой пагинатор DRF считал количество через стратегию.
+
+        :param django.db.models.QuerySet queryset: Отфильтрованный queryset списка.
+        :param rest_framework.views.APIView view: Вьюха.
+
+        :return: Queryset с подсчетом через стратегию.
+        :rtype: CountedQuerySet
+
+        """
+        if not hasattr(queryset, 'query'):
+            return queryset
+        return CountedQuerySet(queryset, self, view=view)
+
+
+class CountedQuerySet(object):
+    """
+    Обертка над queryset для пагинатора: `count()` считает через стратегию,
+    срезы, итерация и остальные атрибуты берутся у самого queryset.
+
+    """
+    def __init__(self, queryset, strategy, view=None):
+        """
+        :param django.db.models.QuerySet queryset: Отфильтрованный queryset списка.
+        :param BaseCountStrategy strategy: Стратегия подсчета.
+        :param rest_framework.views.APIView view: Вьюха.
+
+        """
+        self.queryset = queryset
+        self.strategy = strategy
+        self.view = view
+
+    def count(self):
+        return self.strategy.count(self.queryset, view=self.view)
+
+    def __getattr__(self, name):
+        return getattr(self.queryset, name)
+
+    def __getitem__(self, item):
+        return self.queryset[item]
+
+    def __iter__(self):
+        return iter(self.queryset)
+
+    def __len__(self):
+        return len(self.queryset)
+
+    def __bool__(self):
+        return bool(self.queryset)
+
+
+class ExactCountStrategy(BaseCountStrategy):
+    """
+    Точный `COUNT(*)` на каждый запрос. Поведение DRF по умолчанию.
+
+    """
+    def count(self, queryset, view=None):
+        return queryset.count()
+
+
+class CachedCountStrategy(ExactCountStrategy):
+    """
+    Точный `COUNT(*)`, закэшированный по нормализованной сигнатуре фильтров queryset.
+
+    """
+    def __init__(self, timeout=None, cache_alias=None):
+        """
+        :param int timeout: Время жизни закэшированного значения в секундах.
+        :param str cache_alias: Алиас кэша из `settings.CACHES`.
+
+        """
+        settings = DefaultSettings.AUTO_REST.PAGINATION
+        self.timeout = timeout if timeout is not None else settings.COUNT_CACHE_TIMEOUT
+        self.cache_alias = cache_alias or settings.COUNT_CACHE_ALIAS
+
+    def get_signature(self, queryset):
+        """
+        Формирует сигнатуру запроса. Сортировка на количество не влияет, поэтому ее отбрасываем.
+
+        :param django.db.models.QuerySet queryset: Queryset, для которого считаем.
+
+        :return: Сигнатура или None, если запрос заведомо пустой.
+        :rtype: str
+
+        """
+        try:
+            sql, params = queryset.order_by().query.sql_with_params()
+        except EmptyResultSet:
+            return None
+        raw = '{}:{}:{}:{!r}'.format(queryset.db, queryset.model._meta.label, sql, params)
+        return 'drf_auto:count:' + hashlib.sha1(raw.encode('utf-8')).hexdigest()
+
+    def count(self, queryset, view=None):
+        key = self.get_signature(queryset)
+        if key is None:
+            return 0
+
+        cache = caches[self.cache_alias]
+        result = cache.get(key)
+        if result is None:
+            result = super().count(queryset, view=view)
+            cache.set(key, result, self.timeout)
+        return result
+
+
+class EstimatedCountStrategy(ExactCountStrategy):
+    """
+    Оценка количества по статистике планировщика. Сейчас поддерживается PostgreSQL.
+    Для остальных бэкендов и для маленьких таблиц считаем точно.
+
+    """
+    def __init__(self, threshold=None):
+        """
+        :param int threshold: Если оценка меньше порога, делаем точный подсчет.
+
+        """
+        settings = DefaultSettings.AUTO_REST.PAGINATION
+        self.threshold = threshold if threshold is not None else settings.COUNT_ESTIMATE_THRESHOLD
+
+    def estimate(self, queryset):
+        """
+        Достает оценку из планировщика.
+
+        :param django.db.models.QuerySet queryset: Queryset, для которого считаем.
+
+        :return: Оценка или None, если бэкенд не умеет.
+        :rtype: int
+
+        """
+        connection = connections[queryset.db]
+        if connection.vendor != 'postgresql':
+            return None
+
+        query = queryset.order_by().query
+        with connection.cursor() as cursor:
+            if not query.has_filters() and not query.distinct:
+                # Без фильтров хватает статистики по таблице.
+                cursor.execute('SELECT reltuples FROM pg_class WHERE relname = %s', [queryset.model._meta.db_table])
+                row = cursor.fetchone()
+                return int(row[0]) if row else None
+
+            sql, params = query.sql_with_params()
+            cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+            plan = cursor.fetchone()[0]
+            if isinstance(plan, str):
+                plan = json.loads(plan)
+            return int(plan[0]['Plan']['Plan Rows'])
+
+    def count(self, queryset, view=None):
+        try:
+            result = self.estimate(queryset)
+        except EmptyResultSet:
+            return 0
+        if result is None or result < self.threshold:
+            return super().count(queryset, view=view)
+        return result
+
+
+class HasNextCountStrategy(ExactCountStrategy):
+    """
+    Вообще не считает количество. Заменяет пагинатор вьюхи на `HasNextPagination`,
+    который выбирает limit+1 строк и по ним понимает, есть ли следующая страница.
+    Параметры исходного пагинатора сохраняются: для `LimitOffsetPagination` это `limit`/`offset`,
+    для постраничного - `page`/`page_size`.
+
+    """
+    def get_paginator(self, paginator, view=None):
+        if isinstance(paginator, HasNextPagination):
+            return paginator
+
+        result = HasNextPagination()
+        if getattr(paginator, 'limit_query_param', None):
+            # LimitOffsetPagination: клиенты уже ходят с limit/offset, их и понимаем.
+            result.limit_query_param = paginator.limit_query_param
+            result.offset_query_param = paginator.offset_query_param
+            result.max_page_size = getattr(paginator, 'max_limit', None)
+            result.page_size = getattr(paginator, 'default_limit', None) or result.page_size
+            return result
+
+        # Переносим настройки размера страницы, если они есть у исходного пагинатора.
+        for attr in ('page_size', 'page_query_param', 'page_size_query_param', 'max_page_size'):
+            if getattr(paginator, attr, None) is not None:
+                setattr(result, attr, getattr(paginator, attr))
+        return result
+
+
+class HasNextPagination(BasePagination):
+    """
+    Пагинация без `COUNT(*)`. Возвращает флаг `has_next` вместо `count`.
+    Работает постранично (`page`/`page_size`), а если задан `limit_query_param` - через `limit`/`offset`.
+
+    """
+    page_size = api_settings.PAGE_SIZE
+    page_query_param = 'page'
+    page_size_query_param = None
+    max_page_size = None
+    limit_query_param = None
+    offset_query_param = 'offset'
+    invalid_page_message = 'Неверная страница.'
+
+    has_next = False
+    page_number = 1
+    offset = 0
+    limit = None
+    request = None
+
+    def get_page_size(self, request):
+        """
+        Размер страницы с учетом параметра запроса.
+
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Размер страницы.
+        :rtype: int
+
+        """
+        param = self.limit_query_param or self.page_size_query_param
+        if param:
+            try:
+                return positive_int(request.query_params[param], strict=True, cutoff=self.max_page_size)
+            except (KeyError, ValueError):
+                pass
+        return self.page_size
+
+    def get_offset(self, request, page_size):
+        """
+        Сколько строк пропустить.
+
+        :param rest_framework.request.Request request: Запрос.
+        :param int page_size: Размер страницы.
+
+        :rtype: int
+
+        :raises:
+            rest_framework.exceptions.NotFound: Неверная страница.
+
+        """
+        if self.limit_query_param:
+            try:
+                return positive_int(request.query_params[self.offset_query_param])
+            except (KeyError, ValueError):
+                return 0
+
+        try:
+            self.page_number = positive_int(request.query_params.get(self.page_query_param, 1), strict=True)
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        return (self.page_number - 1) * page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        page_size = self.get_page_size(request)
+        if not page_size:
+            return None
+
+        self.request = request
+        self.limit = page_size
+        self.offset = self.get_offset(request, page_size)
+        rows = list(queryset[self.offset:self.offset + page_size + 1])
+        self.has_next = len(rows) > page_size
+        if not rows and not self.limit_query_param and self.page_number > 1:
+            raise NotFound(self.invalid_page_message)
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.limit_query_param:
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+        return replace_query_param(url, self.page_query_param, self.page_number + 1)
+
+    def get_previous_link(self):
+        url = self.request.build_absolute_uri()
+        if self.limit_query_param:
+            if self.offset <= 0:
+                return None
+            url = replace_query_param(url, self.limit_query_param, self.limit)
+            if self.offset - self.limit <= 0:
+                return remove_query_param(url, self.offset_query_param)
+            return replace_query_param(url, self.offset_query_param, self.offset - self.limit)
+
+        if self.page_number <= 1:
+            return None
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(url, self.page_query_param, self.page_number - 1)
+
+    def get_paginated_response(self, data):
+        return Response(OrderedDict([
+            ('has_next', self.has_next),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]))
+
+
+COUNT_STRATEGIES = {
+    'exact': ExactCountStrategy,
+    'cached': CachedCountStrategy,
+    'estimated': EstimatedCountStrategy,
+    'has_next': HasNextCountStrategy,
+}
+
+
+def get_count_strategy(strategy):
+    """
+    Превращает описание стратегии в объект стратегии.
+
+    :param Union[str, type, BaseCountStrategy] strategy: Имя из `COUNT_STRATEGIES`, путь до класса, класс или объект.
+
+    :return: Объект стратегии.
+    :rtype: BaseCountStrategy
+
+    """
+    if strategy is None:
+        strategy = DefaultSettings.AUTO_REST.PAGINATION.COUNT_STRATEGY
+    if isinstance(strategy, str):
+        strategy = COUNT_STRATEGIES.get(strategy) or import_string(strategy)
+    if isinstance(strategy, type):
+        strategy = strategy()
+    return strategy
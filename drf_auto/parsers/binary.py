@@ -0,0 +1,38 @@
+"""
+Разбор тел запроса в бинарных форматах: MessagePack и CBOR.
+
+"""
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from ..binary import get_binary_codec
+from ..renderers import CBORRenderer, MessagePackRenderer
+
+
+class MessagePackParser(BaseParser):
+    """
+    Парсер MessagePack.
+
+    """
+    media_type = 'application/msgpack'
+    renderer_class = MessagePackRenderer
+    format = 'msgpack'
+    error_message = 'MessagePack parse error - {}'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        content = stream.read() if stream is not None else b''
+        try:
+            return get_binary_codec(self.format).loads(content)
+        except ValueError as exc:
+            raise ParseError(self.error_message.format(exc))
+
+
+class CBORParser(MessagePackParser):
+    """
+    Парсер CBOR.
+
+    """
+    media_type = 'application/cbor'
+    renderer_class = CBORRenderer
+    format = 'cbor'
+    error_message = 'CBOR parse error - {}'
@@ -0,0 +1,40 @@
+"""
+Разбор JSON тел запроса быстрым бэкендом.
+
+"""
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from ..encoders import get_json_backend
+from ..renderers import FastJSONRenderer
+
+
+class FastJSONParser(JSONParser):
+    """
+    JSON парсер на быстром бэкенде (orjson, ujson).
+    Тело читается целиком и разбирается без промежуточного декодирования в строку.
+    Если бэкенд не смог разобрать тело, пробует стандартный json, что бы ошибка была такой же, как у DRF.
+
+    backend: Имя бэкенда. None - из настроек.
+
+    """
+    renderer_class = FastJSONRenderer
+    backend = None
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if encoding.lower().replace('_', '-') not in ('utf-8', 'utf8'):
+            return super().parse(stream, media_type, parser_context)
+
+        content = stream.read() if stream is not None else b''
+        try:
+            return get_json_backend(self.backend).loads(content)
+        except (ValueError, OverflowError):
+            pass
+        # Большие целые и другие редкие случаи.
+        try:
+            return get_json_backend('json').loads(content)
+        except ValueError as exc:
+            raise ParseError('JSON parse error - {}'.format(exc))
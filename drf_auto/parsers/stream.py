@@ -0,0 +1,163 @@
+"""
+Потоковый разбор больших JSON тел запроса.
+Тело не читается целиком: элементы массива верхнего уровня отдаются по одному по мере чтения потока.
+
+"""
+import codecs
+import json
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser
+
+from ..settings import DefaultSettings
+
+
+_WHITESPACE = ' \t\n\r'
+_NUMBER_CONTINUATION = '.eE'
+
+
+class JSONArrayStream(object):
+    """
+    Ленивый итератор по элементам JSON массива из потока.
+    Пройти по нему можно только один раз.
+
+    >>> for item in JSONArrayStream(request.stream):
+    >>>     ...
+
+    """
+    def __init__(self, stream, encoding='utf-8', chunk_size=None, max_item_size=None):
+        """
+        :param stream: Файлоподобный объект с методом `read`.
+        :param str encoding: Кодировка тела.
+        :param int chunk_size: Сколько байт читать за раз. None - берется из настроек.
+        :param int max_item_size: Максимальный размер одного элемента в символах. None - берется из настроек.
+
+        """
+        self.stream = stream
+        self.chunk_size = chunk_size or DefaultSettings.AUTO_REST.BULK.STREAM_CHUNK_SIZE
+        self.max_item_size = max_item_size or DefaultSettings.AUTO_REST.BULK.STREAM_MAX_ITEM_SIZE
+        self.decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder(encoding)(errors='strict')
+        self._buffer = ''
+        self._pos = 0
+        self._eof = False
+        self._consumed = False
+
+    def __iter__(self):
+        if self._consumed:
+            raise RuntimeError('Поток уже прочитан.')
+        self._consumed = True
+        return self._iter_items()
+
+    def _read(self, size=None):
+        """
+        Дочитывает кусок потока в буфер. Уже разобранную часть буфера отбрасываем.
+
+        :param int size: Сколько байт читать. None - `chunk_size`.
+
+        :return: Прочитали ли что то.
+        :rtype: bool
+
+        """
+        if self._eof:
+            return False
+        chunk = self.stream.read(size or self.chunk_size)
+        final = not chunk
+        try:
+            text = self._text_decoder.decode(chunk or b'', final=final)
+        except UnicodeDecodeError as e:
+            raise ParseError('Неверная кодировка тела запроса: {}'.format(e))
+        self._buffer = self._buffer[self._pos:] + text
+        self._pos = 0
+        self._eof = final
+        return True
+
+    def _skip_whitespace(self):
+        """
+        Пропускает пробелы и возвращает следующий значимый символ или None в конце потока.
+
+        :rtype: str
+
+        """
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read():
+                return None
+
+    def _expect(self, chars):
+        char = self._skip_whitespace()
+        if char is None or char not in chars:
+            raise ParseError('JSON parse error - ожидался один из символов `{}`, получено `{}`.'.format(
+                chars, char if char is not None else 'конец тела'
+            ))
+        self._pos += 1
+        return char
+
+    def _decode_item(self):
+        """
+        Разбирает один элемент массива. Элемент считается полным, только если за ним в буфере
+        есть значимый символ, иначе число `12` могло бы оказаться началом `123`. За числом таким символом
+        не может быть `.` или `e`: `1.` - это начало `1.5`.
+
+        :return: Элемент.
+        :rtype: any
+
+        :raises:
+            rest_framework.exceptions.ParseError: Неверный JSON или элемент длиннее `max_item_size`.
+
+        """
+        self._skip_whitespace()
+        size = self.chunk_size
+        while True:
+            try:
+                item, end = self.decoder.raw_decode(self._buffer, self._pos)
+            except ValueError as e:
+                if self._eof:
+                    raise ParseError('JSON parse error - {}'.format(e))
+            else:
+                if end - self._pos > self.max_item_size:
+                    raise ParseError('JSON parse error - элемент длиннее {} символов.'.format(self.max_item_size))
+                tail = end
+                while tail < len(self._buffer) and self._buffer[tail] in _WHITESPACE:
+                    tail += 1
+                if self._eof or tail < len(self._buffer) and not (
+                        tail == end and self._buffer[tail] in _NUMBER_CONTINUATION and
+                        isinstance(item, (int, float)) and not isinstance(item, bool)):
+                    self._pos = tail
+                    return item
+            # Битый элемент не разбирается ни на каком размере буфера, поэтому ограничиваем, сколько его дочитывать.
+            if len(self._buffer) - self._pos > self.max_item_size:
+                raise ParseError('JSON parse error - элемент длиннее {} символов.'.format(self.max_item_size))
+            # Элемент не влез в буфер. Читаем кусками побольше, что бы длинный элемент не разбирать заново много раз.
+            self._read(size)
+            size = min(size * 2, self.max_item_size)
+
+    def _iter_items(self):
+        self._expect('[')
+        if self._skip_whitespace() == ']':
+            self._pos += 1
+        else:
+            while True:
+                yield self._decode_item()
+                if self._expect(',]') == ']':
+                    break
+        if self._skip_whitespace() is not None:
+            raise ParseError('JSON parse error - лишние данные после массива.')
+
+
+class StreamingJSONParser(BaseParser):
+    """
+    Парсер JSON, который не читает тело целиком, а отдает ленивый `JSONArrayStream`.
+    Подходит только для тел с массивом верхнего уровня и view, которые умеют его обрабатывать.
+
+    """
+    media_type = 'application/json'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        return JSONArrayStream(stream, encoding=encoding)
@@ -0,0 +1,295 @@
+"""
+Планирование запросов к БД по дереву сериалайзера ответа.
+По филдам сериалайзера понимаем какие связи и колонки он затронет,
+и заранее применяем к queryset `select_related`, `prefetch_related` и `only`.
+
+"""
+import logging
+import threading
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import relations
+
+from .autodocs.parsers import StandardParser
+from .settings import DefaultSettings
+
+
+logger = logging.getLogger(__name__)
+
+# Кэш готовых планов по классу сериалайзера, модели и набору филдов, создается при первом вызове `get_query_plan`.
+_cached_plan = None
+_cached_plan_lock = threading.Lock()
+
+
+class QueryPlanParser(StandardParser):
+    """
+    Парсер сериалайзеров для планировщика.
+    В отличии от парсера автодоки, не подменяет `SerializerMethodField` и отдает сам объект филда.
+
+    """
+    use_doc_method_fields = False
+
+    def get_field_props(self, field, *args, **kwargs):
+        props = super().get_field_props(field, *args, **kwargs)
+        props['field'] = field
+        return props
+
+
+class QueryPlan(object):
+    """
+    План запроса: какие связи подтянуть и какие колонки выбрать.
+
+    """
+    def __init__(self, select_related=None, prefetch_related=None, only=None):
+        """
+        :param iter select_related: Пути для `select_related`.
+        :param iter prefetch_related: Пути для `prefetch_related`.
+        :param iter only: Колонки для `only`. None - выбираем все колонки.
+
+        """
+        self.select_related = sorted(select_related or [])
+        self.prefetch_related = sorted(prefetch_related or [])
+        self.only = sorted(only) if only is not None else None
+
+    def apply(self, queryset):
+        """
+        Применяет план к queryset.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+
+        :return: Queryset с примененным планом.
+        :rtype: django.db.models.QuerySet
+
+        """
+        if self.select_related:
+            queryset = queryset.select_related(*self.select_related)
+        if self.prefetch_related:
+            queryset = queryset.prefetch_related(*self.prefetch_related)
+        return self._apply_only(queryset, self.only)
+
+    def apply_only(self, queryset):
+        """
+        Применяет к queryset только ограничение колонок самой модели, без связей.
+        Нужно, когда клиент выбрал филды ответа, а план запроса выключен.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+
+        :return: Queryset с ограниченными колонками.
+        :rtype: django.db.models.QuerySet
+
+        """
+        if self.only is None:
+            return queryset
+        return self._apply_only(queryset, [column for column in self.only if '__' not in column])
+
+    @staticmethod
+    def _apply_only(queryset, columns):
+        # Если пользователь уже управляет колонками сам, не вмешиваемся.
+        deferred_fields, is_defer = queryset.query.deferred_loading
+        if columns and not deferred_fields and is_defer:
+            queryset = queryset.only(*columns)
+        return queryset
+
+    def as_dict(self):
+        """
+        Отчет о плане.
+
+        :return: Словарь с описанием плана.
+        :rtype: dict
+
+        """
+        return {
+            'select_related': self.select_related,
+            'prefetch_related': self.prefetch_related,
+            'only': self.only,
+        }
+
+    def __str__(self):
+        return 'select_related={select_related}; prefetch_related={prefetch_related}; only={only}'.format(
+            **self.as_dict()
+        )
+
+
+class QueryPlanner(object):
+    """
+    Строит план запроса по филдам сериалайзера ответа.
+
+    """
+    parser_class = QueryPlanParser
+
+    def __init__(self, serializer_class, model, fields=None):
+        """
+        :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+        :param django.db.models.Model model: Модель queryset.
+        :param iter fields: Филды верхнего уровня, которые реально попадут в ответ. None - все филды.
+
+        """
+        self.serializer_class = serializer_class
+        self.model = model
+        self.fields = fields
+        self.parser = self.parser_class(serializer_class)
+        self.select_related = set()
+        self.prefetch_related = set()
+        self.only = set()
+
+    def build(self):
+        """
+        Строит план.
+
+        :return: План запроса.
+        :rtype: QueryPlan
+
+        """
+        props = self.parser.get_serializer_fields(self.serializer_class)
+        if self.fields is not None:
+            props = [prop for prop in props if prop['name'] in self.fields]
+        self._walk(props, self.model, prefix='', columns=True)
+        return QueryPlan(self.select_related, self.prefetch_related, self.only)
+
+    def _walk(self, props, model, prefix, columns):
+        """
+        Обходит филды одного уровня вложенности.
+
+        :param list props: Описание филдов от парсера.
+        :param django.db.models.Model model: Модель текущего уровня.
+        :param str prefix: Путь от корневой модели до текущей, с `__` на конце.
+        :param bool columns: Нужно ли ограничивать колонки на этом уровне.
+                             На уровнях за `prefetch_related` колонки не ограничиваем.
+
+        """
+        for prop in props:
+            if prop['field'].write_only:
+                continue
+            source = prop['source']
+            if not source or source == '*':
+                if prop['sub_fields']:
+                    # Вложенный сериалайзер над тем же объектом.
+                    self._walk(prop['sub_fields'], model, prefix, columns)
+                else:
+                    # Например SerializerMethodField. Что он читает, мы не знаем.
+                    self._add_all_columns(model, prefix, columns)
+                continue
+            self._walk_source(source.split('.'), prop, model, prefix, columns)
+
+    def _walk_source(self, parts, prop, model, prefix, columns):
+        """
+        Проходит по пути `source` одного филда.
+
+        :param list parts: Части пути `source`.
+        :param dict prop: Описание филда от парсера.
+        :param django.db.models.Model model: Модель текущего уровня.
+        :param str prefix: Путь от корневой модели до текущей.
+        :param bool columns: Нужно ли ограничивать колонки на этом уровне.
+
+        """
+        part, rest = parts[0], parts[1:]
+        model_field = get_model_field(model, part)
+        if model_field is None:
+            # Свойство или метод модели.
+            self._add_all_columns(model, prefix, columns)
+            return
+
+        path = prefix + model_field.name
+        if not model_field.is_relation:
+            if columns:
+                self.only.add(path)
+            return
+
+        related_model = model_field.related_model
+        if related_model is None:
+            # GenericForeignKey: select_related не умеет, а колонки заранее не известны.
+            self.prefetch_related.add(path)
+            self._add_all_columns(model, prefix, columns)
+            return
+
+        many = model_field.many_to_many or model_field.one_to_many
+        if many and not model_field.concrete:
+            # prefetch_related по обратной связи ходит через имя аксессора (`book_set`).
+            path = prefix + model_field.get_accessor_name()
+        serializer_field = getattr(prop['field'], 'child_relation', prop['field'])
+        if not many and not rest and model_field.concrete and \
+                isinstance(serializer_field, relations.PrimaryKeyRelatedField):
+            # Для pk хватает колонки внешнего ключа.
+            if columns:
+                self.only.add(path)
+            return
+
+        if many or not columns:
+            # За prefetch_related все связи тоже подтягиваем через prefetch.
+            self.prefetch_related.add(path)
+            columns = False
+        else:
+            self.select_related.add(path)
+            if model_field.concrete:
+                self.only.add(path)
+
+        if rest:
+            self._walk_source(rest, prop, related_model, path + '__', columns)
+        elif prop['sub_fields']:
+            self._walk(prop['sub_fields'], related_model, path + '__', columns)
+        else:
+            # Связь отдается целиком, например через StringRelatedField.
+            self._add_all_columns(related_model, path + '__', columns)
+
+    def _add_all_columns(self, model, prefix, columns):
+        """
+        Добавляет все колонки модели. Нужно, когда не знаем какие колонки будут прочитаны.
+
+        """
+        if columns:
+            self.only.update(prefix + field.name for field in model._meta.concrete_fields)
+
+
+def get_model_field(model, name):
+    """
+    Ищет филд модели по имени, в том числе обратные связи по имени аксессора (`book_set`).
+
+    :param django.db.models.Model model: Модель.
+    :param str name: Имя атрибута.
+
+    :return: Филд модели или None.
+    :rtype: django.db.models.Field
+
+    """
+    try:
+        return model._meta.get_field(name)
+    except FieldDoesNotExist:
+        pass
+    for related in model._meta.related_objects:
+        if related.get_accessor_name() == name:
+            return related
+    return None
+
+
+def get_query_plan(serializer_class, model, fields=None):
+    """
+    Возвращает план запроса для сериалайзера. Планы кэшируются,
+    размер кэша берется из настроек при первом вызове, а не при импорте модуля.
+
+    :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+    :param django.db.models.Model model: Модель queryset.
+    :param iter fields: Филды верхнего уровня, которые попадут в ответ. None - все филды.
+
+    :return: План запроса.
+    :rtype: QueryPlan
+
+    """
+    global _cached_plan
+    if _cached_plan is None:
+        with _cached_plan_lock:
+            if _cached_plan is None:
+                _cached_plan = lru_cache(maxsize=DefaultSettings.AUTO_REST.QUERY_PLAN.CACHE_SIZE)(build_query_plan)
+    return _cached_plan(serializer_class, model, frozenset(fields) if fields is not None else None)
+
+
+def build_query_plan(serializer_class, model, fields=None):
+    """
+    Строит план запроса для сериалайзера, без кэша. Параметры как у `get_query_plan`.
+
+    :rtype: QueryPlan
+
+    """
+    plan = QueryPlanner(serializer_class, model, fields=fields).build()
+    logger.debug('Построен план запроса для %s: %s', serializer_class.__name__, plan)
+    return plan
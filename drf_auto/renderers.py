@@ -0,0 +1,141 @@
+"""
+Рендереры DRF-Auto.
+
+"""
+import csv
+import io
+
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .binary import get_binary_codec
+from .encoders import get_json_backend
+from .export import get_column_value, get_data_columns, to_cell
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    JSON рендерер на быстром бэкенде (orjson, ujson), с откатом на стандартный рендерер DRF.
+    Быстрый путь работает для компактного юникодного вывода без отступов, то есть для настроек DRF по дефолту.
+    Если бэкенд не справился с данными (например, слишком большое целое) или записал их не так, как DRF
+    (float, NaN), рендерит DRF.
+
+    backend: Имя бэкенда. None - из настроек.
+
+    """
+    backend = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if self.ensure_ascii or not self.compact or self.get_indent(accepted_media_type, renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        backend = get_json_backend(self.backend)
+        try:
+            ret = backend.dumps(data)
+        except (TypeError, ValueError, OverflowError):
+            return super().render(data, accepted_media_type, renderer_context)
+        if not backend.is_exact(data, ret):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Как и DRF, экранируем \u2028 и \u2029, что бы JSON был подмножеством javascript.
+        if b'\xe2\x80\xa8' in ret or b'\xe2\x80\xa9' in ret:
+            ret = ret.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return ret
+
+
+class MessagePackRenderer(BaseRenderer):
+    """
+    Рендерер MessagePack. Decimal, datetime, date и UUID передаются расширениями MessagePack.
+
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return get_binary_codec(self.format).dumps(data)
+
+
+class CBORRenderer(MessagePackRenderer):
+    """
+    Рендерер CBOR. Decimal, datetime, date и UUID передаются стандартными тегами CBOR.
+
+    """
+    media_type = 'application/cbor'
+    format = 'cbor'
+
+
+class ExportRenderer(BaseRenderer):
+    """
+    Базовый рендерер потоковой выгрузки. Кроме обычного `render` умеет рендерить выгрузку по кускам:
+    сначала `render_header`, потом `render_rows` для каждого куска строк.
+
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        rows = data if isinstance(data, (list, tuple)) else [data]
+        columns = get_data_columns(rows)
+        return self.render_header(columns) + self.render_rows(rows, columns)
+
+    def render_header(self, columns):
+        """
+        Начало выгрузки.
+
+        :param tuple columns: Пути до значений в строке.
+
+        :rtype: bytes
+
+        """
+        return b''
+
+    def render_rows(self, rows, columns):
+        """
+        Кусок выгрузки.
+
+        :param list rows: Строки, словари.
+        :param tuple columns: Пути до значений в строке.
+
+        :rtype: bytes
+
+        """
+        raise NotImplementedError
+
+
+class NDJSONRenderer(ExportRenderer):
+    """
+    Рендерер NDJSON: один объект JSON на строку.
+
+    """
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+    charset = None
+
+    def render_rows(self, rows, columns):
+        dumps = get_json_backend().dumps
+        return b''.join(dumps(row) + b'\n' for row in rows)
+
+
+class CSVRenderer(ExportRenderer):
+    """
+    Рендерер CSV. Вложенные объекты разложены на колонки через точку, списки лежат в ячейке как JSON.
+
+    """
+    media_type = 'text/csv'
+    format = 'csv'
+    charset = 'utf-8'
+
+    def render_header(self, columns):
+        return self._write([['.'.join(column) for column in columns]])
+
+    def render_rows(self, rows, columns):
+        return self._write([to_cell(get_column_value(row, column)) for column in columns] for row in rows)
+
+    def _write(self, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        return buffer.getvalue().encode(self.charset)
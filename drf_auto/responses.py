@@ -0,0 +1,146 @@
+"""
+Ответы с уже закодированным телом: JSON из кэша, из БД или от внешнего сервиса.
+Такие данные не разбираются и не рендерятся повторно, а отдаются клиенту как есть.
+
+"""
+import json
+import uuid
+
+from django.http import HttpResponse
+
+
+# Типы, которые можно отдать как закодированное тело без обертки.
+ENCODED_TYPES = (bytes, bytearray, memoryview)
+
+
+class PreEncoded(object):
+    """
+    Уже закодированное тело ответа или его часть.
+
+    >>> self.get_response(code=200, data=PreEncoded(cache.get('books')))
+    >>> self.get_response(code=200, data=PreEncoded(upstream.iter_content(65536)))
+
+    """
+    def __init__(self, content, format='json', charset='utf-8'):
+        """
+        :param content: bytes, memoryview или итерируемый объект с такими кусками.
+        :param str format: Формат тела, как у рендереров DRF.
+        :param str charset: Кодировка тела.
+
+        """
+        self.content = content
+        self.format = format
+        self.charset = charset
+
+    def chunks(self):
+        """
+        Куски тела для ответа.
+
+        :rtype: list
+
+        """
+        if isinstance(self.content, ENCODED_TYPES):
+            return [to_bytes(self.content)]
+        return [to_bytes(chunk) for chunk in self.content]
+
+    def decode(self):
+        """
+        Разбирает тело обратно в python, если клиент попросил другой формат.
+
+        :raises:
+            ValueError: Формат тела не JSON.
+
+        """
+        if self.format != 'json':
+            raise ValueError('Нельзя разобрать тело в формате `{}`.'.format(self.format))
+        return json.loads(b''.join(self.chunks()).decode(self.charset))
+
+
+class EncodedResponse(HttpResponse):
+    """
+    Ответ, который хранит куски тела как есть и не склеивает их, пока никто не попросит `content`.
+
+    """
+    def __init__(self, chunks, *args, **kwargs):
+        """
+        :param list chunks: Куски тела, bytes.
+
+        """
+        super().__init__(*args, **kwargs)
+        self._container = chunks
+
+
+def is_encoded(data):
+    """
+    Закодированы ли уже данные.
+
+    :rtype: bool
+
+    """
+    return isinstance(data, ENCODED_TYPES + (PreEncoded,))
+
+
+def to_encoded(data):
+    """
+    Оборачивает закодированные данные в `PreEncoded`.
+
+    :rtype: PreEncoded
+
+    """
+    return data if isinstance(data, PreEncoded) else PreEncoded(data)
+
+
+def to_bytes(chunk):
+    """
+    bytes для WSGI. memoryview на весь bytes отдается без копирования.
+
+    :param chunk: bytes, bytearray или memoryview.
+
+    :rtype: bytes
+
+    """
+    if isinstance(chunk, bytes):
+        return chunk
+    if isinstance(chunk, memoryview):
+        obj = chunk.obj
+        if isinstance(obj, bytes) and chunk.contiguous and chunk.nbytes == len(obj):
+            return obj
+        return chunk.tobytes()
+    if isinstance(chunk, bytearray):
+        return bytes(chunk)
+    raise TypeError('Ожидались bytes или memoryview, а пришел {}.'.format(type(chunk).__name__))
+
+
+def splice_encoded(envelope, renderer, media_type=None, renderer_context=None):
+    """
+    Рендерит обертку ответа, в значения которой вставлены закодированные данные.
+    Обертка рендерится с метками вместо закодированных значений, а метки потом заменяются кусками как есть.
+
+    :param dict envelope: Обертка, например {"code": 400, "message": "...", "data": PreEncoded(...)}.
+    :param rest_framework.renderers.BaseRenderer renderer: JSON рендерер.
+    :param str media_type: Тип ответа.
+    :param dict renderer_context: Контекст рендерера.
+
+    :return: Куски тела.
+    :rtype: list
+
+    """
+    markers = {}
+    data = {}
+    for key, value in envelope.items():
+        if is_encoded(value):
+            marker = uuid.uuid4().hex
+            markers[marker] = to_encoded(value)
+            value = marker
+        data[key] = value
+
+    # Пары (кусок, отрендерен ли он), что бы не искать метки внутри закодированных данных.
+    parts = [(renderer.render(data, media_type, renderer_context), True)]
+    for marker, encoded in markers.items():
+        quoted = json.dumps(marker).encode('utf-8')
+        for index, (chunk, rendered) in enumerate(parts):
+            if rendered and quoted in chunk:
+                head, tail = chunk.split(quoted, 1)
+                parts[index:index + 1] = [(head, True)] + [(item, False) for item in encoded.chunks()] + [(tail, True)]
+                break
+    return [chunk for chunk, rendered in parts if chunk]
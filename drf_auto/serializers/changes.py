@@ -0,0 +1,88 @@
+"""
+Отслеживание изменений при обновлении объекта: что бы писать в БД только измененные колонки.
+
+"""
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework.serializers import raise_errors_on_nested_writes
+from rest_framework.utils import model_meta
+
+
+def get_changed_fields(instance, validated_data):
+    """
+    Сравнивает проверенные данные с загруженным объектом.
+
+    :param django.db.models.Model instance: Объект до обновления.
+    :param dict validated_data: Проверенные данные сериалайзера.
+
+    :return: Имена измененных филдов модели или None, если изменения не отследить
+             (в данных есть что-то кроме филдов модели).
+    :rtype: set
+
+    """
+    opts = instance._meta
+    changed = set()
+    for name, value in validated_data.items():
+        try:
+            field = opts.get_field(name)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many and not field.auto_created:
+            # Связанные объекты берем через all(), что бы использовать prefetch_related, если он был.
+            current = {obj.pk for obj in getattr(instance, name).all()}
+            if current != {getattr(item, 'pk', item) for item in value}:
+                changed.add(name)
+        elif not field.concrete or field.auto_created:
+            return None
+        elif field.is_relation:
+            if getattr(instance, field.attname) != getattr(value, 'pk', value):
+                changed.add(name)
+        elif getattr(instance, field.attname) != value:
+            changed.add(name)
+    return changed
+
+
+def get_update_fields(instance, changed):
+    """
+    Колонки для `save(update_fields=...)`: измененные филды и филды с `auto_now`, что бы версия объекта росла.
+
+    :param django.db.models.Model instance: Объект.
+    :param set changed: Имена измененных филдов модели.
+
+    :rtype: list
+
+    """
+    fields = instance._meta.concrete_fields
+    return [
+        field.name for field in fields
+        if field.name in changed or (changed and getattr(field, 'auto_now', False))
+    ]
+
+
+def save_changed(serializer, update_fields):
+    """
+    `serializer.save()` для `ModelSerializer` без своего `update`, но объект сохраняется
+    через `save(update_fields=...)`. Повторяет `ModelSerializer.update`: m2m пишутся после сохранения объекта.
+
+    :param rest_framework.serializers.ModelSerializer serializer: Проверенный сериалайзер с объектом.
+    :param list update_fields: Колонки, которые нужно записать, см. `get_update_fields`.
+
+    :return: Обновленный объект.
+    :rtype: django.db.models.Model
+
+    """
+    instance, validated_data = serializer.instance, serializer.validated_data
+    raise_errors_on_nested_writes('update', serializer, validated_data)
+    info = model_meta.get_field_info(instance)
+
+    m2m_fields = []
+    for attr, value in validated_data.items():
+        if attr in info.relations and info.relations[attr].to_many:
+            m2m_fields.append((attr, value))
+        else:
+            setattr(instance, attr, value)
+
+    instance.save(update_fields=update_fields)
+
+    for attr, value in m2m_fields:
+        getattr(instance, attr).set(value)
+    return instance
@@ -0,0 +1,310 @@
+"""
+Компиляция `to_representation` сериалайзеров ответа.
+Вместо общего цикла DRF с `get_attribute` по пути `source` для каждой строки, заранее
+подбираем для каждого филда функцию чтения атрибута и функцию преобразования значения.
+Все, что компилятор не понимает, выполняется через методы DRF, поэтому результат совпадает с DRF.
+
+"""
+import logging
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from operator import attrgetter
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models.manager import BaseManager
+from rest_framework import fields, relations, serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+from ..planning import get_model_field
+from ..settings import DefaultSettings
+
+
+logger = logging.getLogger(__name__)
+
+# Кэш планов чтения атрибутов, создается при первой компиляции.
+_cached_plan = None
+_cached_plan_lock = threading.Lock()
+
+# Филды, у которых `to_representation` - это простая функция от значения.
+SIMPLE_CONVERTERS = {
+    fields.CharField.to_representation: str,
+    fields.IntegerField.to_representation: int,
+    fields.ReadOnlyField.to_representation: lambda value: value,
+}
+
+# Ошибки, при которых быстрое чтение атрибута уступает место DRF.
+FALLBACK_ERRORS = (AttributeError, KeyError, ObjectDoesNotExist)
+
+
+class _Step(object):
+    """
+    Шаг скомпилированной функции: как прочитать и преобразовать один филд.
+
+    """
+    __slots__ = ('name', 'field', 'getter', 'convert', 'slow_convert')
+
+    def __init__(self, name, field, getter, convert, slow_convert):
+        """
+        :param str name: Ключ в ответе.
+        :param rest_framework.fields.Field field: Филд, через который идет медленный путь.
+        :param callable getter: Быстрое чтение атрибута или None.
+        :param callable convert: Преобразование значения, прочитанного быстро.
+        :param callable slow_convert: Преобразование значения, прочитанного через `field.get_attribute`.
+
+        """
+        self.name = name
+        self.field = field
+        self.getter = getter
+        self.convert = convert
+        self.slow_convert = slow_convert
+
+
+def compile_serializer(serializer):
+    """
+    Компилирует `to_representation` проинициализированного сериалайзера.
+
+    :param rest_framework.serializers.Serializer serializer: Сериалайзер (для many - его `child`).
+
+    :return: Функция instance -> OrderedDict или None, если сериалайзер не поддерживается.
+    :rtype: callable
+
+    """
+    if not isinstance(serializer, serializers.Serializer) or \
+            type(serializer).to_representation is not serializers.Serializer.to_representation:
+        # Свой to_representation повторить нельзя.
+        return None
+
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    readable = [field for field in serializer.fields.values() if not field.write_only]
+    plan = get_serializer_plan(type(serializer), model, tuple(_get_field_key(field) for field in readable))
+    steps = [_compile_field(field, getter, from_column) for field, (getter, from_column) in zip(readable, plan)]
+    slow = serializer.to_representation
+
+    def represent(instance):
+        if model is not None and not isinstance(instance, model):
+            return slow(instance)
+        ret = OrderedDict()
+        for step in steps:
+            if step.getter is not None:
+                try:
+                    value = step.getter(instance)
+                except FALLBACK_ERRORS:
+                    pass
+                else:
+                    ret[step.name] = None if value is None else step.convert(value)
+                    continue
+            # Медленный путь с семантикой DRF: default, allow_null, SkipField, PKOnlyObject.
+            try:
+                attribute = step.field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = attribute.pk if isinstance(attribute, PKOnlyObject) else attribute
+            ret[step.name] = None if check_for_none is None else step.slow_convert(attribute)
+        return ret
+
+    return represent
+
+
+def compile_list_serializer(serializer):
+    """
+    Компилирует `to_representation` для `ListSerializer`.
+
+    :param rest_framework.serializers.ListSerializer serializer: Сериалайзер списка.
+
+    :return: Функция data -> list или None, если сериалайзер не поддерживается.
+    :rtype: callable
+
+    """
+    if type(serializer).to_representation is not serializers.ListSerializer.to_representation:
+        return None
+    child = compile_serializer(serializer.child)
+    if child is None:
+        return None
+
+    def represent_list(data):
+        iterable = data.all() if isinstance(data, BaseManager) else data
+        return [child(item) for item in iterable]
+
+    return represent_list
+
+
+def install_compiled(serializer):
+    """
+    Подменяет `to_representation` у экземпляра сериалайзера скомпилированной функцией.
+    Класс сериалайзера не меняется, `data`, `ReturnDict` и `ReturnList` работают как обычно.
+
+    :param rest_framework.serializers.BaseSerializer serializer: Сериалайзер ответа.
+
+    :return: Тот же сериалайзер.
+    :rtype: rest_framework.serializers.BaseSerializer
+
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        compiled = compile_list_serializer(serializer)
+    else:
+        compiled = compile_serializer(serializer)
+    if compiled is not None:
+        serializer.to_representation = compiled
+    else:
+        logger.debug('Сериалайзер %s не поддерживается компилятором.', type(serializer).__name__)
+    return serializer
+
+
+def get_serializer_plan(serializer_class, model, fields):
+    """
+    План чтения атрибутов сериалайзера. Разбор путей `source` по филдам модели не зависит от экземпляра
+    сериалайзера, поэтому кэшируется по классу и набору филдов и не повторяется на каждый запрос.
+
+    :param rest_framework.serializers.Serializer serializer_class: Класс сериалайзера.
+    :param django.db.models.Model model: Модель, из которой читаем, или None.
+    :param tuple fields: Ключи отдаваемых филдов, см. `_get_field_key`.
+
+    :return: Для каждого филда быстрое чтение атрибута (или None) и читается ли pk прямо из колонки.
+    :rtype: tuple
+
+    """
+    global _cached_plan
+    if _cached_plan is None:
+        with _cached_plan_lock:
+            if _cached_plan is None:
+                _cached_plan = lru_cache(maxsize=DefaultSettings.AUTO_REST.SERIALIZER_COMPILER.CACHE_SIZE)(
+                    build_serializer_plan
+                )
+    return _cached_plan(serializer_class, model, fields)
+
+
+def build_serializer_plan(serializer_class, model, fields):
+    """
+    План чтения атрибутов сериалайзера, без кэша. Параметры как у `get_serializer_plan`.
+
+    :rtype: tuple
+
+    """
+    return tuple(_plan_field(model, *key[1:]) for key in fields)
+
+
+def _get_field_key(field):
+    """
+    Все, от чего зависит план чтения филда: имя, класс, путь `source` и есть ли `pk_field`.
+
+    """
+    return field.field_name, type(field), tuple(field.source_attrs), getattr(field, 'pk_field', None) is not None
+
+
+def _plan_field(model, field_class, source_attrs, has_pk_field):
+    """
+    Подбирает быстрое чтение атрибута для одного филда.
+
+    :return: Функция чтения или None и читается ли pk прямо из колонки внешнего ключа.
+    :rtype: tuple
+
+    """
+    if _has_drf_methods(field_class, relations.PrimaryKeyRelatedField):
+        if has_pk_field:
+            return None, False
+        # pk берем прямо из колонки внешнего ключа, не доставая связанный объект.
+        model_field = _get_forward_field(model, source_attrs)
+        if model_field is not None and model_field.is_relation and not model_field.many_to_many:
+            return attrgetter(model_field.attname), True
+        return None, False
+
+    # Свое чтение атрибута (например, у связей) оставляем DRF.
+    if field_class.get_attribute is fields.Field.get_attribute:
+        if not source_attrs:
+            # source='*'
+            return _identity, False
+        if _get_path_fields(model, source_attrs) is not None:
+            return attrgetter('.'.join(source_attrs)), False
+    return None, False
+
+
+def _compile_field(field, getter, from_column):
+    """
+    Шаг для одного филда по его плану.
+
+    :param rest_framework.fields.Field field: Привязанный филд.
+    :param callable getter: Быстрое чтение атрибута или None.
+    :param bool from_column: pk читается прямо из колонки, преобразовывать его не нужно.
+
+    :rtype: _Step
+
+    """
+    convert = _get_converter(field)
+    if from_column:
+        return _Step(field.field_name, field, getter, _identity, convert)
+    return _Step(field.field_name, field, getter, convert, convert)
+
+
+def _has_drf_methods(cls, field_class):
+    """
+    Является ли класс филда наследником `field_class` без своих `get_attribute` и `to_representation`.
+
+    """
+    return issubclass(cls, field_class) and \
+        cls.get_attribute is field_class.get_attribute and \
+        cls.to_representation is field_class.to_representation
+
+
+def _get_converter(field):
+    """
+    Функция преобразования значения филда.
+
+    """
+    if isinstance(field, serializers.ListSerializer):
+        compiled = compile_list_serializer(field)
+        return compiled if compiled is not None else field.to_representation
+    if isinstance(field, serializers.BaseSerializer):
+        compiled = compile_serializer(field)
+        return compiled if compiled is not None else field.to_representation
+    if isinstance(field, fields.SerializerMethodField):
+        # Сразу берем метод сериалайзера, а не ищем его на каждую строку.
+        return getattr(field.parent, field.method_name)
+
+    method = getattr(type(field).to_representation, '__func__', type(field).to_representation)
+    converter = SIMPLE_CONVERTERS.get(method)
+    return converter if converter is not None else field.to_representation
+
+
+def _get_path_fields(model, source_attrs):
+    """
+    Филды модели по пути `source`, если путь можно читать простым `getattr`:
+    все промежуточные части - прямые одиночные связи, а последняя - любой филд модели.
+    Методы и свойства модели не подходят, их DRF вызывает по своим правилам.
+
+    :return: Список филдов модели или None.
+    :rtype: list
+
+    """
+    if model is None or not source_attrs:
+        return None
+    result = []
+    for index, attr in enumerate(source_attrs):
+        model_field = get_model_field(model, attr)
+        if model_field is None:
+            return None
+        result.append(model_field)
+        if index < len(source_attrs) - 1:
+            if not (model_field.is_relation and model_field.concrete and
+                    (model_field.many_to_one or model_field.one_to_one)):
+                return None
+            model = model_field.related_model
+    return result
+
+
+def _get_forward_field(model, source_attrs):
+    """
+    Филд модели для `source` из одной части, если это прямая связь.
+
+    """
+    if model is None or len(source_attrs) != 1:
+        return None
+    model_field = get_model_field(model, source_attrs[0])
+    if model_field is None or not model_field.concrete:
+        return None
+    return model_field
+
+
+def _identity(value):
+    return value
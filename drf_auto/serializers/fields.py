@@ -3,13 +3,98 @@
 
 """
 import re
-
+import threading
+import time
+from array import array
+from collections import OrderedDict
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db.models import Q, QuerySet
+from django.db.models.signals import post_delete, post_save
 from rest_framework import serializers
+from rest_framework.relations import MANY_RELATION_KWARGS
+
+from ..settings import DefaultSettings
+
+
+class AllowedValues(object):
+    """
+    Разрешенные значения из queryset или функции, закэшированные в памяти процесса.
+    Значения перечитываются после истечения `ttl` или при изменении моделей-источников.
+    Объект общий для всех копий филда, поэтому кэш не теряется при копировании филдов сериалайзером.
+
+    >>> tags = AllowedValues(Tag.objects.values_list('name', flat=True), ttl=300)
+    >>> GraphListMultipleChoiceField(allowed_values=tags)
+
+    """
+    def __init__(self, source, ttl=None, models=None):
+        """
+        :param Union[QuerySet, callable] source: Queryset или функция без аргументов, возвращающие значения.
+        :param int ttl: Сколько секунд значения считаются актуальными. None - берется из настроек.
+        :param iter models: Модели, изменения которых сбрасывают кэш. Модель queryset добавляется сама.
+
+        """
+        self.source = source
+        self.ttl = ttl if ttl is not None else DefaultSettings.AUTO_REST.FIELDS.ALLOWED_VALUES_TTL
+        self._lock = threading.Lock()
+        self._cached = None
+        self._expires = 0
+
+        models = list(models or ())
+        if isinstance(source, QuerySet):
+            models.append(source.model)
+        for model in models:
+            post_save.connect(self.invalidate, sender=model)
+            post_delete.connect(self.invalidate, sender=model)
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def invalidate(self, **kwargs):
+        """
+        Сбрасывает кэш. Подходит как обработчик сигнала.
+
+        """
+        self._expires = 0
+
+    def load(self):
+        """
+        Читает значения из источника.
+
+        :rtype: list
+
+        """
+        if isinstance(self.source, QuerySet):
+            # all() - что бы не использовать кэш самого queryset.
+            return [str(value) for value in self.source.all()]
+        return [str(value) for value in self.source()]
+
+    def get(self, build_index):
+        """
+        Возвращает значения и индекс по ним. Источник читается не чаще раза в `ttl` секунд.
+
+        :param callable build_index: Функция, которая строит индекс по списку значений.
+
+        :return: Список значений и индекс.
+        :rtype: tuple
+
+        """
+        cached = self._cached
+        if cached is not None and time.monotonic() < self._expires:
+            return cached
+        with self._lock:
+            if self._cached is None or time.monotonic() >= self._expires:
+                # Срок ставим до чтения, что бы сброс во время чтения не потерялся.
+                self._expires = time.monotonic() + self.ttl
+                values = self.load()
+                self._cached = values, build_index(values)
+            return self._cached
 
 
 class GraphListMultipleChoiceField(serializers.Field):
     """
     Филд, для использования перечисления в текстовом поле. Взято из GraphQL.
+    Элементы возвращаются в порядке первого появления, без повторов.
 
     >>> from rest_framework import serializers
     >>>
@@ -28,26 +113,89 @@ class GraphListMultipleChoiceField(serializers.Field):
         'empty_list': 'Поле пустое: `{ITEM}`.',
         'not_str': 'Поле `{TYPE}` не является строкой.',
         'find_error_char': 'Значение `{ITEM}` содержит недопустимые символы `{CHAR}`.',
-        'not_found': 'Элемент `{ITEM}` недопустим. Разрешенные: `{ALLOWED}`.'
+        'not_found': 'Элемент `{ITEM}` недопустим. Разрешенные: `{ALLOWED}`.',
+        'max_items': 'Слишком много элементов: больше `{MAX}`.',
+        'max_length': 'Слишком длинная строка: больше `{MAX}` символов.',
     }
 
     re_space = re.compile('\s')
 
-    def __init__(self, allowed_values, separator=',', default_exclude_fields=None, required=False, *args, **kwargs):
+    def __init__(self, allowed_values, separator=',', default_exclude_fields=None, required=False,
+                 max_items=None, max_length=None, *args, **kwargs):
         """
         Создаем свой филд.
 
-        :param list allowed_values: Список разрешенных элементов.
+        :param Union[list, QuerySet, callable, AllowedValues] allowed_values: Разрешенные элементы.
+                   Queryset и функция оборачиваются в `AllowedValues` и кэшируются.
         :param str separator: Разделитель между элементами.
         :param list default_exclude_fields: Филды, которые нужно исключить, в случае когда передано пустое значение.
         :param bool required: Обязательное ли поле.
+        :param int max_items: Максимальное количество элементов в строке. None - без ограничения.
+        :param int max_length: Максимальная длина строки. None - без ограничения.
 
         """
         super().__init__(*args, **kwargs)
+        if isinstance(allowed_values, QuerySet) or callable(allowed_values):
+            allowed_values = AllowedValues(allowed_values)
+            # Копии филда создаются из исходных аргументов, подменяем их, что бы кэш был общий.
+            if self._args:
+                self._args = (allowed_values,) + tuple(self._args[1:])
+            else:
+                self._kwargs['allowed_values'] = allowed_values
+
         self.allowed_values = allowed_values
         self.separator = separator if separator else ','
         self.default_exclude_fields = default_exclude_fields if default_exclude_fields else []
         self.required = required
+        self.max_items = max_items
+        self.max_length = max_length
+
+    def get_allowed(self):
+        """
+        Разрешенные элементы и индекс по ним.
+
+        :return: Список элементов и frozenset для проверки.
+        :rtype: tuple
+
+        """
+        if self.allowed_source is not None:
+            return self.allowed_source.get(self.build_allowed_index)
+        return self._allowed
+
+    @property
+    def allowed_values(self):
+        return self.get_allowed()[0]
+
+    @allowed_values.setter
+    def allowed_values(self, value):
+        """
+        Подменяет разрешенные элементы. Queryset и функция оборачиваются в `AllowedValues`, как в конструкторе.
+
+        """
+        if isinstance(value, QuerySet) or callable(value):
+            value = AllowedValues(value)
+        if isinstance(value, AllowedValues):
+            self.allowed_source = value
+            self._allowed = None
+        else:
+            self.allowed_source = None
+            self._allowed = value, self.build_allowed_index(value)
+
+    @property
+    def allowed_index(self):
+        return self.get_allowed()[1]
+
+    def build_allowed_index(self, allowed_values):
+        """
+        Индекс для проверки элемента за O(1). Значения с пробелами в него не входят,
+        потому что такой элемент все равно не пройдет проверку на символы.
+
+        :param list allowed_values: Список разрешенных элементов.
+
+        :rtype: frozenset
+
+        """
+        return frozenset(value for value in allowed_values if not self.re_space.search(value))
 
     def to_representation(self, obj):
         """
@@ -75,30 +223,42 @@ class GraphListMultipleChoiceField(serializers.Field):
         """
         if not isinstance(data, str):
             self.fail('not_str', TYPE=type(data))
+        if self.max_length is not None and len(data) > self.max_length:
+            self.fail('max_length', MAX=self.max_length)
 
+        allowed = self.get_allowed()
         # Возвращает все филды кроме те, что стоит исключить.
         if not data:
-            return list(set(self.allowed_values) - set(self.default_exclude_fields))
+            exclude = set(self.default_exclude_fields)
+            return [value for value in OrderedDict.fromkeys(allowed[0]) if value not in exclude]
 
-        return list(set(map(self._clean_str_item, map(str, data.split(self.separator)))))
+        items = data.split(self.separator)
+        if self.max_items is not None and len(items) > self.max_items:
+            self.fail('max_items', MAX=self.max_items)
 
-    def _clean_str_item(self, itm):
+        # OrderedDict сохраняет порядок первого появления и убирает повторы.
+        return list(OrderedDict.fromkeys(self._clean_str_item(itm, allowed) for itm in items))
+
+    def _clean_str_item(self, itm, allowed=None):
         """
         Проверяет на валидность входной элемент, обрабатывает его и возвращает.
 
         :param str itm: Элемент, которые необходимо обработать.
+        :param tuple allowed: Результат `get_allowed`, что бы не доставать его на каждый элемент.
 
         :return: Обработанный элемент.
         :rtype: str
 
         """
+        allowed_values, allowed_index = allowed if allowed is not None else self.get_allowed()
         itm = itm.strip()
+        if itm in allowed_index:
+            return itm
+        # Медленный путь только для ошибок, что бы сообщения были те же.
         # TODO: Вероятно, тут надо уметь и другие символы обрабатывать, типо `-`.
-        if re.search(self.re_space, itm):
+        if self.re_space.search(itm):
             self.fail('find_error_char', ITEM=itm, CHAR='Пробелы')
-        if itm not in self.allowed_values:
-            self.fail('not_found', ITEM=itm, ALLOWED=self.allowed_values)
-        return itm
+        self.fail('not_found', ITEM=itm, ALLOWED=allowed_values)
 
 
 class TextToArrayField(serializers.Field):
@@ -184,3 +344,288 @@ class TextToArrayField(serializers.Field):
         if not itm:
             self.fail('empty_list', ITEM=itm)
         return itm
+
+
+class IntegerRangeList(object):
+    """
+    Компактный список целых чисел из диапазонов. Диапазон `10-5000` хранится двумя числами, а не 4991 элементом.
+    Одиночное число - диапазон из одного элемента. Порядок элементов - порядок во входной строке.
+
+    >>> ids = IntegerRangeList.from_pairs([(1, 1), (10, 5000)])
+    >>> Book.objects.filter(ids.as_q('pk'))
+
+    """
+    __slots__ = ('starts', 'ends')
+
+    def __init__(self, starts=None, ends=None):
+        """
+        :param array.array starts: Начала диапазонов.
+        :param array.array ends: Концы диапазонов, включительно.
+
+        """
+        self.starts = starts if starts is not None else array('q')
+        self.ends = ends if ends is not None else array('q')
+
+    @classmethod
+    def from_pairs(cls, pairs):
+        """
+        Собирает список из пар (начало, конец).
+
+        :param iter pairs: Пары (начало, конец), конец включительно.
+
+        :rtype: IntegerRangeList
+
+        """
+        result = cls()
+        for start, end in pairs:
+            result.append(start, end)
+        return result
+
+    def append(self, start, end=None):
+        """
+        Добавляет число или диапазон.
+
+        :param int start: Начало диапазона.
+        :param int end: Конец диапазона, включительно. None - одиночное число.
+
+        """
+        self.starts.append(start)
+        self.ends.append(start if end is None else end)
+
+    def pairs(self):
+        return zip(self.starts, self.ends)
+
+    def __len__(self):
+        """
+        Количество чисел с учетом повторов, без разворачивания диапазонов.
+
+        """
+        return sum(self.ends) - sum(self.starts) + len(self.starts)
+
+    def __iter__(self):
+        for start, end in self.pairs():
+            yield from range(start, end + 1)
+
+    def __contains__(self, item):
+        return any(start <= item <= end for start, end in self.pairs())
+
+    def __bool__(self):
+        return bool(self.starts)
+
+    def __eq__(self, other):
+        return isinstance(other, IntegerRangeList) and self.starts == other.starts and self.ends == other.ends
+
+    def __repr__(self):
+        return 'IntegerRangeList({!r})'.format(str(self))
+
+    def __str__(self):
+        return ','.join(
+            str(start) if start == end else '{}-{}'.format(start, end) for start, end in self.pairs()
+        )
+
+    def unique(self):
+        """
+        Числа в порядке первого появления, без повторов.
+
+        :rtype: generator
+
+        """
+        seen = set()
+        for item in self:
+            if item not in seen:
+                seen.add(item)
+                yield item
+
+    def as_q(self, name):
+        """
+        ORM условие на вхождение в список: одиночные числа через `__in`, диапазоны через `__range`.
+        Диапазоны не разворачиваются.
+
+        :param str name: Имя филда модели, например `pk`.
+
+        :rtype: django.db.models.Q
+
+        """
+        singles = array('q', (start for start, end in self.pairs() if start == end))
+        q = Q(**{name + '__in': singles}) if singles else None
+        for start, end in self.pairs():
+            if start != end:
+                condition = Q(**{name + '__range': (start, end)})
+                q = condition if q is None else q | condition
+        # Пустой список ничего не находит.
+        return q if q is not None else Q(**{name + '__in': []})
+
+    def chunks(self, size):
+        """
+        Режет список на части, у каждой не больше `size` параметров в SQL.
+        Одиночное число - один параметр, диапазон - два.
+
+        :param int size: Максимум параметров в части.
+
+        :rtype: generator
+
+        """
+        chunk, params = IntegerRangeList(), 0
+        for start, end in self.pairs():
+            cost = 1 if start == end else 2
+            if chunk and params + cost > size:
+                yield chunk
+                chunk, params = IntegerRangeList(), 0
+            chunk.append(start, end)
+            params += cost
+        if chunk:
+            yield chunk
+
+
+class IntegerRangeListField(serializers.Field):
+    """
+    Филд, для списка целых чисел с диапазонами: `1,5,10-5000`.
+    Возвращает компактный `IntegerRangeList`, который не разворачивает диапазоны и сразу превращается в ORM условие.
+
+    >>> from rest_framework import serializers
+    >>>
+    >>>
+    >>> class ExampleSerializer(serializers.Serializer):
+    >>>     ids = IntegerRangeListField(max_items=1000)
+    >>>
+    >>> ser = ExampleSerializer(data={'ids': '1,5,10-20'})
+    >>> ser.is_valid()
+    >>> Book.objects.filter(ser.validated_data['ids'].as_q('pk'))
+
+    """
+
+    default_error_messages = {
+        'empty_list': 'Поле пустое: `{ITEM}`.',
+        'not_str': 'Поле `{TYPE}` не является строкой.',
+        'invalid_item': 'Значение `{ITEM}` не является целым числом или диапазоном.',
+        'invalid_range': 'Диапазон `{ITEM}` задан в обратном порядке.',
+        'max_items': 'Слишком много элементов: больше `{MAX}`.',
+        'max_length': 'Слишком длинная строка: больше `{MAX}` символов.',
+    }
+    # Только ASCII цифры: `str.isdecimal()` пропускает и цифры других алфавитов, например `١٢`.
+    re_digits = re.compile('[0-9]+')
+
+    def __init__(self, separator=',', range_separator='-', max_items=None, max_length=None, required=False,
+                 *args, **kwargs):
+        """
+        Создаем свой филд.
+
+        :param str separator: Разделитель между элементами.
+        :param str range_separator: Разделитель границ диапазона.
+        :param int max_items: Максимальное количество чисел с учетом диапазонов. None - без ограничения.
+        :param int max_length: Максимальная длина строки. None - без ограничения.
+        :param bool required: Обязательное ли поле.
+
+        """
+        super().__init__(*args, **kwargs)
+        self.separator = separator if separator else ','
+        self.range_separator = range_separator if range_separator else '-'
+        self.max_items = max_items
+        self.max_length = max_length
+        self.required = required
+
+    def to_representation(self, obj):
+        """
+        Преобразуем список в компактную строку.
+
+        :param iter obj: `IntegerRangeList` или последовательность чисел.
+
+        :return: Готовая строка.
+        :rtype: str
+
+        """
+        if not obj:
+            self.fail('empty_list', ITEM=obj)
+        if isinstance(obj, IntegerRangeList):
+            return str(obj)
+        return ','.join(map(str, obj))
+
+    def to_internal_value(self, data):
+        """
+        Преобразуем строку в `IntegerRangeList`. Количество чисел считается без разворачивания диапазонов.
+
+        :param str data: Исходная строка.
+
+        :return: Список чисел.
+        :rtype: IntegerRangeList
+
+        """
+        if not isinstance(data, str):
+            self.fail('not_str', TYPE=type(data))
+        if self.max_length is not None and len(data) > self.max_length:
+            self.fail('max_length', MAX=self.max_length)
+
+        result, total = IntegerRangeList(), 0
+        for token in data.split(self.separator):
+            token = token.strip()
+            start, sep, end = token.partition(self.range_separator)
+            if not self.re_digits.fullmatch(start) or (sep and not self.re_digits.fullmatch(end)):
+                if not token:
+                    self.fail('empty_list', ITEM=data)
+                self.fail('invalid_item', ITEM=token)
+            start = int(start)
+            end = int(end) if sep else start
+            if start > end:
+                self.fail('invalid_range', ITEM=token)
+
+            total += end - start + 1
+            if self.max_items is not None and total > self.max_items:
+                self.fail('max_items', MAX=self.max_items)
+            try:
+                result.append(start, end)
+            except OverflowError:
+                # Не влезает в 64 бита, а значит и в целочисленную колонку.
+                self.fail('invalid_item', ITEM=token)
+        return result
+
+
+class IdentityManyRelatedField(serializers.ManyRelatedField):
+    """
+    Список связей, который загружает все pk одним запросом через identity map запроса.
+
+    """
+    def to_internal_value(self, data):
+        identity_map = self.context.get('identity_map')
+        child = self.child_relation
+        if identity_map is not None and child.pk_field is None and isinstance(data, (list, tuple)):
+            try:
+                identity_map.get_many(child.get_queryset(), data)
+            except (TypeError, ValueError):
+                # Ошибку по конкретному pk вернет сам child.
+                pass
+        return super().to_internal_value(data)
+
+
+class IdentityPrimaryKeyRelatedField(serializers.PrimaryKeyRelatedField):
+    """
+    Связь по pk, которая достает объекты через identity map запроса (`context['identity_map']`):
+    объект, уже загруженный за этот запрос, повторно не запрашивается, а `many=True` загружает все pk одним запросом.
+    Без identity map в контексте работает как `PrimaryKeyRelatedField`.
+
+    >>> class BookSerializer(serializers.ModelSerializer):
+    >>>     serializer_related_field = IdentityPrimaryKeyRelatedField
+
+    """
+    @classmethod
+    def many_init(cls, *args, **kwargs):
+        list_kwargs = {'child_relation': cls(*args, **kwargs)}
+        for key in kwargs:
+            if key in MANY_RELATION_KWARGS:
+                list_kwargs[key] = kwargs[key]
+        return IdentityManyRelatedField(**list_kwargs)
+
+    def to_internal_value(self, data):
+        identity_map = self.context.get('identity_map')
+        if identity_map is None:
+            return super().to_internal_value(data)
+
+        if self.pk_field is not None:
+            data = self.pk_field.to_internal_value(data)
+        if isinstance(data, bool):
+            self.fail('incorrect_type', data_type=type(data).__name__)
+        try:
+            return identity_map.get(self.get_queryset(), data)
+        except ObjectDoesNotExist:
+            self.fail('does_not_exist', pk_value=data)
+        except (TypeError, ValueError):
+            self.fail('incorrect_type', data_type=type(data).__name__)
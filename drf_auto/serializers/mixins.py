@@ -0,0 +1,82 @@
+"""
+Миксины для сериалайзеров.
+
+"""
+import copy
+import threading
+from collections import OrderedDict
+
+from rest_framework import serializers
+
+
+# Кэш шаблонов филдов. Ключ: (класс сериалайзера, значения kwargs из `cached_fields_kwargs`).
+_templates = {}
+_templates_lock = threading.Lock()
+
+
+class CachedFieldsSerializerMixin(object):
+    """
+    Миксин, который строит филды сериалайзера один раз на класс и дальше только копирует их.
+    DRF на каждый экземпляр сериалайзера делает deepcopy объявленных филдов,
+    а `ModelSerializer` еще и заново разбирает модель.
+
+    Подходит, только если `get_fields` не зависит от `context`, `instance` или данных запроса.
+    Если набор филдов зависит от аргументов конструктора, их имена нужно перечислить в `cached_fields_kwargs`.
+
+    >>> class BookSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
+    >>>     class Meta:
+    >>>         model = Book
+    >>>         fields = ('id', 'title', 'author')
+
+    """
+    cached_fields_kwargs = ()
+
+    def get_fields_cache_key(self):
+        """
+        Ключ шаблона филдов.
+
+        :rtype: tuple
+
+        """
+        return (type(self),) + tuple(repr(self._kwargs.get(name)) for name in self.cached_fields_kwargs)
+
+    def get_fields(self):
+        """
+        Отдаем копии закэшированных филдов. Сам шаблон никогда не привязывается к сериалайзеру.
+
+        :return: Филды сериалайзера.
+        :rtype: collections.OrderedDict
+
+        """
+        key = self.get_fields_cache_key()
+        template = _templates.get(key)
+        if template is None:
+            template = super().get_fields()
+            with _templates_lock:
+                _templates[key] = template
+        return OrderedDict((name, clone_field(field)) for name, field in template.items())
+
+
+def clone_field(field):
+    """
+    Дешевая копия непривязанного филда.
+    Простые филды копируются поверхностно. Филды с вложенными филдами (сериалайзеры, списки, many-связи)
+    привязывают детей к себе еще в конструкторе, поэтому для них нужна полная копия.
+
+    :param rest_framework.fields.Field field: Филд шаблона.
+
+    :return: Копия филда.
+    :rtype: rest_framework.fields.Field
+
+    """
+    if isinstance(field, serializers.BaseSerializer) or hasattr(field, 'child') or hasattr(field, 'child_relation'):
+        return copy.deepcopy(field)
+
+    clone = copy.copy(field)
+    validators = clone.__dict__.get('_validators')
+    if validators is not None:
+        # Старые версии DRF хранят состояние в валидаторах через `set_context`, не делим их между копиями.
+        clone._validators = [
+            copy.copy(validator) if hasattr(validator, 'set_context') else validator for validator in validators
+        ]
+    return clone
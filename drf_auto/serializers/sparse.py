@@ -0,0 +1,129 @@
+"""
+Выборочные филды ответа (`?fields=`/`?exclude=`).
+
+"""
+import threading
+from functools import lru_cache
+
+from rest_framework import serializers
+
+from .fields import GraphListMultipleChoiceField
+from ..settings import DefaultSettings
+
+
+# Кэш разобранных параметров, создается при первом вызове `get_sparse_projection`.
+_cached_projection = None
+_cached_projection_lock = threading.Lock()
+
+
+@lru_cache(maxsize=None)
+def get_readable_field_names(serializer_class):
+    """
+    Возвращает имена филдов, которые сериалайзер отдает в ответе.
+
+    :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+
+    :return: Имена филдов в порядке сериалайзера.
+    :rtype: tuple
+
+    """
+    serializer = serializer_class()
+    return tuple(name for name, field in serializer.get_fields().items() if not field.write_only)
+
+
+def get_sparse_projection(serializer_class, fields=None, exclude=None):
+    """
+    Разбирает параметры запроса в набор филдов, которые нужно отдать.
+    Результат кэшируется по классу сериалайзера и строкам запроса.
+    Размер кэша берется из настроек при первом вызове, а не при импорте модуля.
+
+    :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+    :param str fields: Значение параметра с филдами, которые нужно отдать.
+    :param str exclude: Значение параметра с филдами, которые нужно исключить.
+
+    :return: Набор филдов или None, если ограничивать нечего.
+    :rtype: frozenset
+
+    :raises:
+        rest_framework.serializers.ValidationError: В параметрах есть неизвестные филды.
+
+    """
+    global _cached_projection
+    if fields is None and exclude is None:
+        return None
+    if _cached_projection is None:
+        with _cached_projection_lock:
+            if _cached_projection is None:
+                _cached_projection = lru_cache(maxsize=DefaultSettings.AUTO_REST.SPARSE_FIELDS.CACHE_SIZE)(
+                    build_sparse_projection
+                )
+    return _cached_projection(serializer_class, fields, exclude)
+
+
+def build_sparse_projection(serializer_class, fields=None, exclude=None):
+    """
+    Разбирает параметры запроса в набор филдов, которые нужно отдать, без кэша.
+
+    :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+    :param str fields: Значение параметра с филдами, которые нужно отдать.
+    :param str exclude: Значение параметра с филдами, которые нужно исключить.
+
+    :return: Набор филдов или None, если ограничивать нечего.
+    :rtype: frozenset
+
+    :raises:
+        rest_framework.serializers.ValidationError: В параметрах есть неизвестные филды.
+
+    """
+    if fields is None and exclude is None:
+        return None
+
+    settings = DefaultSettings.AUTO_REST.SPARSE_FIELDS
+    allowed = get_readable_field_names(serializer_class)
+    result = set(allowed)
+    parser = GraphListMultipleChoiceField(allowed_values=list(allowed))
+
+    if fields is not None:
+        # Пустой `fields` по правилам GraphListMultipleChoiceField означает все филды.
+        result &= set(_parse(parser, settings.FIELDS_PARAM, fields))
+    if exclude:
+        result -= set(_parse(parser, settings.EXCLUDE_PARAM, exclude))
+    return frozenset(result)
+
+
+def _parse(parser, param, value):
+    """
+    Разбирает значение параметра, привязывая ошибку к имени параметра.
+
+    :param GraphListMultipleChoiceField parser: Филд, которым разбираем.
+    :param str param: Имя параметра запроса.
+    :param str value: Значение параметра.
+
+    :return: Список филдов.
+    :rtype: list
+
+    """
+    try:
+        return parser.run_validation(value)
+    except serializers.ValidationError as e:
+        raise serializers.ValidationError({param: e.detail})
+
+
+def prune_serializer_fields(serializer, names):
+    """
+    Убирает из сериалайзера филды, которые не нужно отдавать. До серилизации, что бы они не вычислялись.
+
+    :param rest_framework.serializers.BaseSerializer serializer: Проинициализированный сериалайзер.
+    :param iter names: Филды, которые оставляем.
+
+    :return: Тот же сериалайзер.
+    :rtype: rest_framework.serializers.BaseSerializer
+
+    """
+    target = serializer.child if isinstance(serializer, serializers.ListSerializer) else serializer
+    if not hasattr(target, 'fields'):
+        return serializer
+    for name in list(target.fields):
+        if name not in names:
+            target.fields.pop(name)
+    return serializer
@@ -0,0 +1,243 @@
+"""
+Быстрый путь для плоских сериалайзеров ответа: строки берутся через `values_list()` без создания объектов модели.
+Если все значения филдов - числа, строки или булевы, JSON объект каждой строки можно собрать прямо в БД.
+
+"""
+import json
+from collections import OrderedDict
+
+from django.db import connections
+from django.db.models import F, Func, TextField, Value
+from rest_framework import fields, relations, serializers
+
+from .compiler import SIMPLE_CONVERTERS, _has_drf_methods
+from ..planning import get_model_field
+
+
+# Типы колонок модели, значения которых БД кодирует в JSON тем же типом, что и DRF.
+JSON_NUMBER_TYPES = {
+    'AutoField', 'BigAutoField', 'SmallAutoField', 'IntegerField', 'BigIntegerField', 'SmallIntegerField',
+    'PositiveIntegerField', 'PositiveSmallIntegerField', 'PositiveBigIntegerField',
+}
+JSON_TEXT_TYPES = {'CharField', 'TextField', 'SlugField'}
+JSON_BOOLEAN_TYPES = {'BooleanField', 'NullBooleanField'}
+
+# Бэкенды, которые умеют собирать JSON объект строки.
+JSON_VENDORS = {'sqlite', 'postgresql'}
+
+
+class ValuesPlan(object):
+    """
+    Какие колонки выбрать и как преобразовать каждую из них в значение ответа.
+
+    """
+    def __init__(self, names, columns, converters, json_types=None):
+        """
+        :param list names: Ключи ответа.
+        :param list columns: Колонки для `values_list`, в порядке ключей.
+        :param list converters: Преобразования значений, в порядке ключей.
+        :param list json_types: Типы значений в JSON (number, text, boolean) или None для тех,
+                                что БД кодирует не тем типом, что DRF.
+
+        """
+        self.names = names
+        self.columns = columns
+        self.converters = converters
+        self.json_types = json_types or [None] * len(names)
+
+    def apply(self, queryset):
+        """
+        Превращает queryset в `values_list` нужных колонок.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+
+        :rtype: django.db.models.QuerySet
+
+        """
+        # prefetch_related с values_list не работает, а связи плоскому сериалайзеру и не нужны.
+        return queryset.prefetch_related(None).values_list(*self.columns)
+
+    def represent(self, rows):
+        """
+        Превращает строки `values_list` в данные ответа, как это сделал бы сериалайзер.
+
+        :param iter rows: Кортежи значений.
+
+        :return: Список словарей.
+        :rtype: list
+
+        """
+        items = list(zip(self.names, self.converters))
+        return [
+            OrderedDict(
+                (name, None if value is None else convert(value))
+                for (name, convert), value in zip(items, row)
+            )
+            for row in rows
+        ]
+
+    def supports_json(self, queryset):
+        """
+        Можно ли собрать JSON ответа в БД для этого queryset.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+
+        :rtype: bool
+
+        """
+        return connections[queryset.db].vendor in JSON_VENDORS and None not in self.json_types
+
+    def get_json_expression(self, vendor):
+        """
+        Выражение, которое собирает JSON объект строки так же, как компактный JSON рендерер DRF:
+        без пробелов, ключи в порядке сериалайзера, `null` для NULL.
+
+        :param str vendor: Бэкенд БД.
+
+        :rtype: django.db.models.Func
+
+        """
+        if vendor == 'sqlite':
+            expressions = []
+            for name, column, json_type in zip(self.names, self.columns, self.json_types):
+                expressions.append(Value(name))
+                if json_type == 'boolean':
+                    # SQLite хранит булевы как 0/1, в JSON нужны true/false.
+                    expressions.append(Func(
+                        F(column),
+                        template="CASE %(expressions)s WHEN 1 THEN json('true') WHEN 0 THEN json('false') END"
+                    ))
+                else:
+                    expressions.append(F(column))
+            return Func(*expressions, function='json_object', output_field=TextField())
+
+        # json_build_object в PostgreSQL ставит пробелы вокруг `:` и после `,`, поэтому объект склеиваем сами.
+        parts = []
+        for index, (name, column) in enumerate(zip(self.names, self.columns)):
+            parts.append(Value('{}{}:'.format(',' if index else '{', json.dumps(name, ensure_ascii=False))))
+            parts.append(Func(F(column), template="COALESCE(to_json(%(expressions)s)::text, 'null')"))
+        parts.append(Value('}'))
+        return Func(*parts, function='CONCAT', output_field=TextField())
+
+    def iter_json(self, queryset, chunk_size):
+        """
+        Отдает JSON массив ответа кусками. JSON объекты строк собирает БД, python их не разбирает,
+        а только склеивает через запятую. Строки читаются курсором по мере отправки, поэтому весь ответ
+        в памяти не держится.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+        :param int chunk_size: Сколько строк в одном куске.
+
+        :return: Генератор кусков bytes. Если строк нет, ничего не отдает.
+        :rtype: generator
+
+        """
+        expression = self.get_json_expression(connections[queryset.db].vendor)
+        rows = queryset.prefetch_related(None).annotate(_drf_auto_json=expression).values_list(
+            '_drf_auto_json', flat=True
+        )
+        prefix, batch = b'[', []
+        for row in rows.iterator():
+            batch.append(row)
+            if len(batch) >= chunk_size:
+                yield prefix + _encode_rows(batch)
+                prefix, batch = b',', []
+        if batch:
+            yield prefix + _encode_rows(batch)
+            prefix = b','
+        if prefix == b',':
+            yield b']'
+
+
+def build_values_plan(serializer):
+    """
+    Строит план, если сериалайзер плоский: только колонки модели и pk прямых связей,
+    без своих `to_representation`/`get_attribute`, методов и вложенных сериалайзеров.
+
+    :param rest_framework.serializers.ModelSerializer serializer: Проинициализированный сериалайзер ответа.
+
+    :return: План или None, если сериалайзер не плоский.
+    :rtype: ValuesPlan
+
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+    model = getattr(getattr(serializer, 'Meta', None), 'model', None)
+    if model is None or not isinstance(serializer, serializers.Serializer) or \
+            type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+
+    names, columns, converters, json_types = [], [], [], []
+    for field in serializer.fields.values():
+        if field.write_only:
+            continue
+        if len(field.source_attrs) != 1:
+            return None
+        model_field = get_model_field(model, field.source_attrs[0])
+        if model_field is None or not model_field.concrete:
+            return None
+
+        if model_field.is_relation:
+            # Для связи годится только pk из колонки внешнего ключа.
+            if model_field.many_to_many or not _has_drf_methods(type(field), relations.PrimaryKeyRelatedField) or \
+                    field.pk_field is not None:
+                return None
+            converter = _identity
+            json_type = _get_json_type(model_field.target_field)
+        else:
+            if isinstance(field, serializers.BaseSerializer) or \
+                    type(field).get_attribute is not fields.Field.get_attribute:
+                return None
+            method = type(field).to_representation
+            converter = SIMPLE_CONVERTERS.get(method) or field.to_representation
+            json_type = _get_json_type(model_field)
+            if method is fields.BooleanField.to_representation:
+                json_type = json_type if json_type == 'boolean' else None
+            elif method is fields.IntegerField.to_representation:
+                json_type = json_type if json_type == 'number' else None
+            elif method is fields.CharField.to_representation:
+                json_type = json_type if json_type == 'text' else None
+            elif method is not fields.ReadOnlyField.to_representation:
+                json_type = None
+
+        names.append(field.field_name)
+        columns.append(model_field.attname)
+        converters.append(converter)
+        json_types.append(json_type)
+    return ValuesPlan(names, columns, converters, json_types)
+
+
+def _get_json_type(model_field):
+    """
+    Тип значения колонки в JSON, если БД кодирует его тем же типом, что и DRF.
+
+    :param django.db.models.Field model_field: Филд модели.
+
+    :return: number, text, boolean или None.
+    :rtype: str
+
+    """
+    internal_type = model_field.get_internal_type()
+    if internal_type in JSON_NUMBER_TYPES:
+        return 'number'
+    if internal_type in JSON_TEXT_TYPES:
+        return 'text'
+    if internal_type in JSON_BOOLEAN_TYPES:
+        return 'boolean'
+    return None
+
+
+def _encode_rows(rows):
+    """
+    Склеивает JSON объекты строк. U+2028 и U+2029 экранируются, как это делает JSON рендерер DRF.
+
+    :param list rows: JSON объекты строк.
+
+    :rtype: bytes
+
+    """
+    return ','.join(rows).replace('\u2028', '\\u2028').replace('\u2029', '\\u2029').encode('utf-8')
+
+
+def _identity(value):
+    return value
@@ -46,6 +46,100 @@ __DEFAULTS = {
             # Флаг, указывающий нужно ли автоматически пробовать конвертировать data в json, при ответе fail.
             'DATA_TO_JSON': True,
         },
+        'PAGINATION': {
+            # Стратегия подсчета количества объектов: exact, cached, estimated, has_next или путь до класса.
+            'COUNT_STRATEGY': 'exact',
+            'COUNT_CACHE_TIMEOUT': 60,  # Время жизни закэшированного количества, в секундах.
+            'COUNT_CACHE_ALIAS': 'default',  # Кэш, в котором храним количество.
+            'COUNT_ESTIMATE_THRESHOLD': 10000,  # Ниже этой оценки считаем точно.
+        },
+        'QUERY_PLAN': {
+            # Применять ли select_related/prefetch_related/only по сериалайзеру ответа.
+            'ENABLED': False,
+            # Заголовок ответа, в который отдаем примененный план. None - не отдаем.
+            'REPORT_HEADER': None,
+            'CACHE_SIZE': 1024,  # Сколько планов (класс сериалайзера, модель и набор филдов) держать в кэше.
+        },
+        'SPARSE_FIELDS': {
+            'ENABLED': False,  # Разрешить ли клиенту выбирать филды ответа.
+            'FIELDS_PARAM': 'fields',  # Параметр запроса с филдами, которые нужно отдать.
+            'EXCLUDE_PARAM': 'exclude',  # Параметр запроса с филдами, которые нужно исключить.
+            'CACHE_SIZE': 1024,  # Сколько разобранных параметров держать в кэше.
+        },
+        'CACHE': {
+            'CACHE_ALIAS': 'default',  # Кэш для готовых ответов.
+            'TIMEOUT': 60,  # Сколько секунд ответ считается свежим.
+            'STALE_WHILE_REVALIDATE': 0,  # Сколько секунд после истечения можно отдавать устаревший ответ.
+            'LOCK_TIMEOUT': 30,  # Сколько секунд держим блокировку на пересчет устаревшего ответа.
+            'KEY_PREFIX': 'drf_auto',  # Префикс ключей кэша.
+        },
+        'SINGLE_FLIGHT': {
+            'ENABLED': False,  # Схлопывать ли одинаковые одновременные GET запросы внутри процесса.
+            'TIMEOUT': 5,  # Сколько секунд ждать чужое вычисление, прежде чем считать самостоятельно.
+        },
+        'CONDITIONAL': {
+            'STRATEGY': None,  # Стратегия ETag: version, hash или путь до класса. None - выключено.
+            'VERSION_FIELD': 'updated_at',  # Колонка версии для стратегии version.
+        },
+        'BULK': {
+            'BATCH_SIZE': 500,  # Размер пачки для bulk_create/bulk_update/удаления.
+            'MAX_ITEMS': 10000,  # Максимальное количество объектов в одном массовом запросе.
+            'STREAM_CHUNK_SIZE': 65536,  # Сколько байт тела читать за раз при потоковом разборе.
+            'STREAM_MAX_ITEM_SIZE': 1048576,  # Максимальный размер одного элемента потока в символах.
+            'ERROR_BUDGET': 0,  # Сколько невалидных элементов допускает потоковая загрузка.
+        },
+        'BATCH': {
+            'MAX_REQUESTS': 20,  # Максимальное количество подзапросов в пакете.
+            'PARALLEL_READS': False,  # Выполнять ли идущие подряд читающие подзапросы параллельно.
+            'MAX_WORKERS': 4,  # Размер пула потоков для параллельного чтения.
+        },
+        'MULTI_GET': {
+            'ENABLED': False,  # Разрешить ли получать несколько объектов по списку pk.
+            'PARAM': 'ids',  # Параметр запроса со списком pk.
+            'MAX_IDS': 1000,  # Максимальное количество pk в одном запросе.
+            'CHUNK_SIZE': 500,  # Сколько pk передавать в один запрос `pk__in`.
+        },
+        'FIELDS': {
+            # Сколько секунд держать в памяти разрешенные значения из queryset или функции.
+            'ALLOWED_VALUES_TTL': 60,
+        },
+        'SERIALIZER_COMPILER': {
+            'ENABLED': False,  # Серилизовать ли ответы скомпилированным to_representation.
+            'CACHE_SIZE': 1024,  # Сколько планов чтения атрибутов (класс сериалайзера и набор филдов) держать в кэше.
+        },
+        'VALUES_FAST_PATH': {
+            'ENABLED': False,  # Отдавать ли плоские сериалайзеры списков через values_list().
+        },
+        'DB_JSON': {
+            'ENABLED': False,  # Собирать ли JSON плоских сериалайзеров списков без пагинации прямо в БД.
+            'CHUNK_SIZE': 1000,  # Сколько строк склеивать в один кусок ответа.
+        },
+        'JSON': {
+            'ENABLED': False,  # Подменять ли в Rest генериках JSON рендерер и парсер DRF быстрыми.
+            'BACKEND': None,  # orjson, ujson или json. None - первый установленный.
+        },
+        'BINARY': {
+            'ENABLED': False,  # Добавлять ли в Rest генерики рендереры и парсеры MessagePack и CBOR.
+            'MAX_DEPTH': 100,  # Максимальная вложенность разбираемых данных.
+        },
+        'EXPORT': {
+            'ENABLED': False,  # Разрешить ли потоковую выгрузку списков через `?format=ndjson` и `?format=csv`.
+            'CHUNK_SIZE': 1000,  # Сколько объектов читать из БД за один запрос при выгрузке.
+            'CACHE_SIZE': 1024,  # Сколько наборов колонок CSV (класс сериалайзера и набор филдов) держать в кэше.
+        },
+        'SYNC': {
+            'FIELD': None,  # Колонка версии для синхронизации списков, например `updated_at`. None - выключено.
+            'PARAM': 'since',  # Параметр запроса с токеном синхронизации.
+            'LIMIT': 1000,  # Сколько изменений отдавать за один запрос синхронизации.
+            'TOMBSTONE_TTL': None,  # Сколько дней хранить записи об удалениях. None - хранить всегда.
+            'MODELS': [],  # Модели `app_label.ModelName`, удаления которых пишутся с момента старта приложения.
+        },
+        'TRACK_CHANGES': {
+            'ENABLED': False,  # Писать ли при обновлении только измененные колонки и пропускать запись без изменений.
+        },
+        'IDENTITY_MAP': {
+            'ENABLED': False,  # Загружать ли в Rest генериках каждый объект за запрос один раз.
+        },
     },
     'CODES': CODES,
     'SERIALIZERS_RESPONSE_FIELD': 'serializer_classes',
@@ -0,0 +1,75 @@
+"""
+Схлопывание одинаковых одновременных вычислений внутри процесса (single-flight).
+
+"""
+import logging
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class _Call(object):
+    """
+    Одно вычисление, которого ждут остальные.
+
+    """
+    def __init__(self):
+        self.event = threading.Event()
+        self.value = None
+        self.failed = False
+
+
+class SingleFlight(object):
+    """
+    Группа вычислений по ключу. Пока вычисление по ключу идет, остальные вызовы с тем же ключом
+    ждут его результата, а не запускают свое.
+
+    >>> group = SingleFlight()
+    >>> value, shared = group.do('key', compute, timeout=5)
+
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, func, timeout=None):
+        """
+        Выполняет func один раз на все одновременные вызовы с одним ключом.
+        Если ожидание превысило timeout или ведущее вычисление упало, выполняем func самостоятельно.
+
+        :param str key: Ключ вычисления.
+        :param callable func: Функция без аргументов.
+        :param float timeout: Сколько секунд ждать чужое вычисление. None - без ограничения.
+
+        :return: Результат и флаг, получен ли он от чужого вычисления.
+        :rtype: tuple
+
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            is_leader = call is None
+            if is_leader:
+                call = self._calls[key] = _Call()
+
+        if is_leader:
+            try:
+                call.value = func()
+            except BaseException:
+                call.failed = True
+                raise
+            finally:
+                with self._lock:
+                    self._calls.pop(key, None)
+                call.event.set()
+            return call.value, False
+
+        if call.event.wait(timeout) and not call.failed:
+            return call.value, True
+
+        logger.debug('Не дождались вычисления `%s`, выполняем самостоятельно.', key)
+        return func(), False
+
+
+# Группа на весь процесс.
+single_flight = SingleFlight()
@@ -0,0 +1,204 @@
+"""
+Синхронизация списков: клиент передает токен версии и получает только то, что изменилось с тех пор.
+Изменения ищутся по колонке версии (`updated_at` или последовательность), удаления - по `Tombstone`.
+Токен хранит последнюю отданную пару (версия, pk), номер последнего отданного удаления и время выдачи.
+Удаления пишутся по модели целиком, без учета фильтров списка, и чистятся через `prune_tombstones()`.
+
+"""
+import base64
+import datetime
+import json
+import threading
+import time
+
+from django.db.models import Q
+from django.db.models.signals import post_delete
+from django.utils import timezone
+
+from .cache import get_model_senders
+from .settings import DefaultSettings
+
+
+# Модели, для которых пишутся удаления.
+_registry = set()
+_registry_lock = threading.Lock()
+
+
+class SyncToken(object):
+    """
+    Позиция клиента в потоке изменений.
+
+    """
+    def __init__(self, value=None, pk=None, tombstone=0, issued=None):
+        """
+        :param value: Версия последнего отданного объекта. None - объекты еще не отдавались.
+        :param pk: Pk последнего отданного объекта.
+        :param int tombstone: Id последнего отданного удаления.
+        :param int issued: Время выдачи токена, unix timestamp. None - сейчас.
+
+        """
+        self.value = value
+        self.pk = pk
+        self.tombstone = tombstone
+        self.issued = int(time.time()) if issued is None else issued
+
+    def encode(self):
+        """
+        :return: Непрозрачный для клиента токен.
+        :rtype: str
+
+        """
+        data = json.dumps([self.value, self.pk, self.tombstone, self.issued], default=str, separators=(',', ':'))
+        return base64.urlsafe_b64encode(data.encode('utf-8')).decode('ascii').rstrip('=')
+
+    @classmethod
+    def decode(cls, token, model, field_name):
+        """
+        Разбирает токен клиента. Пустой токен - начало синхронизации.
+        Токен старше `AUTO_REST.SYNC.TOMBSTONE_TTL` не принимается: удаления после него могли быть уже вычищены,
+        и клиент должен начать синхронизацию заново.
+
+        :param str token: Токен.
+        :param django.db.models.Model model: Модель списка.
+        :param str field_name: Колонка версии.
+
+        :rtype: SyncToken
+
+        :raises:
+            ValueError: Неверный или устаревший токен.
+
+        """
+        if not token:
+            return cls()
+        try:
+            raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+            value, pk, tombstone, issued = json.loads(raw.decode('utf-8'))
+            if value is not None:
+                value = model._meta.get_field(field_name).to_python(value)
+                pk = model._meta.pk.to_python(pk)
+            tombstone = int(tombstone)
+            issued = int(issued)
+        except Exception:
+            raise ValueError('Неверный токен синхронизации.')
+
+        ttl = DefaultSettings.AUTO_REST.SYNC.TOMBSTONE_TTL
+        if ttl is not None and issued < time.time() - ttl * 86400:
+            raise ValueError('Токен синхронизации устарел, начните синхронизацию заново.')
+        return cls(value, pk, tombstone, issued)
+
+
+def get_changes(queryset, field_name, token, limit):
+    """
+    Изменения списка после токена: созданные или измененные объекты по возрастанию версии и pk удаленных.
+    Объекты без версии (null) в синхронизацию не попадают.
+    Удаления берутся по всей модели, а не по queryset: клиент получит pk удаленных объектов, которых в его списке
+    не было, а объект, который перестал подходить под фильтр, не попадет ни в изменения, ни в удаления.
+    Поэтому синхронизация рассчитана на списки без фильтров, которые скрывают объекты (например, по владельцу).
+
+    :param django.db.models.QuerySet queryset: Queryset списка.
+    :param str field_name: Колонка версии.
+    :param SyncToken token: Токен клиента.
+    :param int limit: Сколько объектов и удалений отдать за раз.
+
+    :return: Объекты, pk удаленных, следующий токен и есть ли еще изменения.
+    :rtype: tuple
+
+    """
+    from .models import Tombstone
+
+    issued = int(time.time())
+    model = queryset.model
+    label = model._meta.concrete_model._meta.label
+    tombstones = Tombstone.objects.using(queryset.db).filter(model=label)
+    tombstone = token.tombstone
+    if token.value is None:
+        # Начало синхронизации: удаления до этого момента клиенту не нужны.
+        last = tombstones.order_by('-id').values_list('id', flat=True).first()
+        tombstone = last or 0
+
+    changed = queryset.filter(**{'{}__isnull'.format(field_name): False})
+    if token.value is not None:
+        changed = changed.filter(
+            Q(**{'{}__gt'.format(field_name): token.value}) | Q(**{field_name: token.value, 'pk__gt': token.pk})
+        )
+    objects = list(changed.order_by(field_name, 'pk')[:limit])
+
+    deleted = list(tombstones.filter(id__gt=tombstone).order_by('id').values_list('id', 'object_pk')[:limit])
+    pk_field = model._meta.pk
+
+    next_token = SyncToken(token.value, token.pk, deleted[-1][0] if deleted else tombstone, issued)
+    if objects:
+        next_token.value, next_token.pk = getattr(objects[-1], field_name), objects[-1].pk
+    more = len(objects) == limit or len(deleted) == limit
+    return objects, [pk_field.to_python(pk) for _, pk in deleted], next_token, more
+
+
+def prune_tombstones(days=None, using=None):
+    """
+    Удаляет записи об удалениях старше `days` дней.
+
+    :param int days: Сколько дней хранить удаления. None - `AUTO_REST.SYNC.TOMBSTONE_TTL`.
+    :param str using: Алиас базы. None - база по дефолту.
+
+    :return: Сколько записей удалено.
+    :rtype: int
+
+    """
+    from .models import Tombstone
+
+    days = DefaultSettings.AUTO_REST.SYNC.TOMBSTONE_TTL if days is None else days
+    if days is None:
+        return 0
+    before = timezone.now() - datetime.timedelta(days=days)
+    deleted, _ = Tombstone.objects.using(using).filter(deleted_at__lt=before).delete()
+    return deleted
+
+
+def register_model(model):
+    """
+    Включает запись удалений модели в `Tombstone`.
+    Сигнал подключается только для самой модели и ее proxy моделей,
+    что бы не мешать быстрому удалению (`QuerySet.delete()` без загрузки объектов) остальных моделей проекта.
+
+    :param django.db.models.Model model: Модель.
+
+    """
+    model = model._meta.concrete_model
+    if model in _registry:
+        return
+    with _registry_lock:
+        _registry.add(model)
+
+    for sender in get_model_senders(model):
+        post_delete.connect(
+            _tombstone_receiver, sender=sender, dispatch_uid='drf_auto.sync.post_delete.' + sender._meta.label
+        )
+
+
+def register_models(labels=None):
+    """
+    Включает запись удалений моделей из настроек. Вызывается из `AppConfig.ready()`, поэтому удаления пишутся
+    с самого старта процесса, даже если урлы со списками еще не загружены (management команды, воркеры).
+
+    :param iter labels: Модели в виде `app_label.ModelName`. None - `AUTO_REST.SYNC.MODELS`.
+
+    :raises:
+        LookupError: Модель не найдена.
+
+    """
+    from django.apps import apps
+
+    labels = DefaultSettings.AUTO_REST.SYNC.MODELS if labels is None else labels
+    for label in labels:
+        register_model(apps.get_model(label))
+
+
+def _tombstone_receiver(sender, instance, using, **kwargs):
+    """
+    Пишет удаление в той же базе и транзакции, что и само удаление.
+
+    """
+    model = sender._meta.concrete_model
+    if model in _registry:
+        from .models import Tombstone
+        Tombstone.objects.using(using).create(model=model._meta.label, object_pk=str(instance.pk))
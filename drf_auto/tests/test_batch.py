@@ -0,0 +1,148 @@
+"""
+Пакетные запросы к Rest генерикам.
+Запуск: `django-admin test drf_auto.tests.test_batch`.
+
+"""
+import json
+from unittest import mock
+
+from django.conf.urls import url
+from django.contrib.auth.models import Group
+from django.test import override_settings
+from rest_framework import serializers
+from rest_framework.response import Response
+from rest_framework.test import APIRequestFactory, APITestCase, APITransactionTestCase
+from rest_framework.views import APIView
+
+from ..views import batch
+from ..views.batch import RestBatchAPIView
+from ..views.rest import RestCreateAPIView, RestDestroyAPIView, RestListAPIView, RestRetrieveAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class FailingView(RestListAPIView):
+    queryset = Group.objects.all()
+    serializer_class = GroupSerializer
+
+    def get(self, request, *args, **kwargs):
+        raise RuntimeError('boom')
+
+
+class PlainView(APIView):
+    """
+    Обычная вьюха DRF: в пакете ее вызывать нельзя.
+
+    """
+    def get(self, request, *args, **kwargs):
+        return Response({})
+
+
+attrs = dict(queryset=Group.objects.order_by('id'), serializer_class=GroupSerializer, pagination_class=None)
+
+urlpatterns = [
+    url(r'^groups/$', type('ListView', (RestListAPIView,), attrs).as_view()),
+    url(r'^groups/create/$', type('CreateView', (RestCreateAPIView,), attrs).as_view()),
+    url(r'^groups/(?P<pk>\d+)/$', type('RetrieveView', (RestRetrieveAPIView,), attrs).as_view()),
+    url(r'^groups/(?P<pk>\d+)/delete/$', type('DestroyView', (RestDestroyAPIView,), attrs).as_view()),
+    url(r'^failing/$', FailingView.as_view()),
+    url(r'^plain/$', PlainView.as_view()),
+]
+
+
+class BatchTestMixin(object):
+    """
+    Отправка пакета.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.group = Group.objects.create(name='group')
+
+    def post(self, items, **attrs):
+        view = type('BatchView', (RestBatchAPIView,), attrs).as_view()
+        response = view(self.factory.post('/batch/', items, format='json'))
+        response.render()
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class BatchTestCase(BatchTestMixin, APITestCase):
+    def test_results_in_order(self):
+        status, data = self.post([
+            {'path': '/groups/{}/'.format(self.group.pk)},
+            {'method': 'post', 'path': '/groups/create/', 'body': {'name': 'created'}},
+            {'path': '/groups/'},
+        ])
+        self.assertEqual(status, 200, data)
+        self.assertEqual([item['status'] for item in data], [200, 201, 200])
+        self.assertEqual(data[0]['data'], {'id': self.group.pk, 'name': 'group'})
+        self.assertEqual(data[1]['data']['name'], 'created')
+        self.assertEqual([item['name'] for item in data[2]['data']], ['group', 'created'])
+
+    def test_delete_without_content(self):
+        status, data = self.post([
+            {'method': 'DELETE', 'path': '/groups/{}/delete/'.format(self.group.pk)},
+            {'path': '/groups/{}/'.format(self.group.pk)},
+        ])
+        self.assertEqual(status, 200, data)
+        self.assertEqual(data[0], {'status': 204, 'headers': mock.ANY, 'data': None})
+        self.assertEqual(data[1]['status'], 404)
+        self.assertFalse(Group.objects.exists())
+
+    def test_errors(self):
+        with mock.patch.object(batch.logger, 'exception'):
+            status, data = self.post([
+                {'method': 'POST', 'path': '/groups/create/', 'body': {}},
+                {'path': '/unknown/'},
+                {'path': '/plain/'},
+                {'path': '/failing/'},
+                {'path': '/groups/0/'},
+            ])
+        self.assertEqual(status, 200, data)
+        self.assertEqual([item['status'] for item in data], [400, 404, 400, 500, 404])
+        self.assertIn('name', json.dumps(data[0]['data']))
+
+    def test_invalid_batch(self):
+        self.assertEqual(self.post({'path': '/groups/'})[0], 400)
+        self.assertEqual(self.post([{'method': 'GET'}])[0], 400)
+        self.assertEqual(self.post([{'path': '/groups/'}] * 3, batch_max_requests=2)[0], 400)
+
+    def test_sequential_inside_transaction(self):
+        # Тест идет в транзакции, потоки ее изменений не видят, поэтому пул не используется.
+        with mock.patch.object(batch, 'ThreadPoolExecutor') as executor:
+            status, data = self.post([{'path': '/groups/'}] * 2, batch_parallel_reads=True)
+        self.assertFalse(executor.called)
+        self.assertEqual([item['status'] for item in data], [200, 200])
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class BatchParallelTestCase(BatchTestMixin, APITransactionTestCase):
+    def test_parallel_reads(self):
+        executors = []
+        executor_class = batch.ThreadPoolExecutor
+
+        def create_executor(*args, **kwargs):
+            executors.append(kwargs)
+            return executor_class(*args, **kwargs)
+
+        with mock.patch.object(batch, 'ThreadPoolExecutor', side_effect=create_executor):
+            status, data = self.post([
+                {'path': '/groups/{}/'.format(self.group.pk)},
+                {'path': '/groups/'},
+                {'method': 'POST', 'path': '/groups/create/', 'body': {'name': 'created'}},
+                {'path': '/groups/'},
+                {'path': '/groups/0/'},
+            ], batch_parallel_reads=True, batch_max_workers=4)
+
+        self.assertEqual(status, 200, data)
+        # Две группы чтения, разделенные записью.
+        self.assertEqual(executors, [{'max_workers': 2}, {'max_workers': 2}])
+        self.assertEqual([item['status'] for item in data], [200, 200, 201, 200, 404])
+        self.assertEqual([item['name'] for item in data[1]['data']], ['group'])
+        # Чтение после записи видит ее результат.
+        self.assertEqual([item['name'] for item in data[3]['data']], ['group', 'created'])
@@ -0,0 +1,156 @@
+"""
+MessagePack и CBOR: библиотеки и реализации на чистом python.
+Запуск: `django-admin test drf_auto.tests.test_binary`.
+
+"""
+import contextlib
+import datetime
+import decimal
+import io
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from rest_framework.exceptions import ParseError
+
+from .. import binary
+from ..binary import check_depth, get_binary_codec
+from ..parsers.binary import CBORParser, MessagePackParser
+from ..settings import DefaultSettings
+
+
+# Модуль библиотеки для каждого формата.
+LIBRARIES = {'msgpack': 'msgpack', 'cbor': 'cbor2'}
+
+
+def get_payload():
+    return {
+        'id': 10,
+        'negative': -100000,
+        'big': 2 ** 63,
+        'rating': 1.5,
+        'title': 'Книга' * 10,
+        'raw': b'\x00\xff',
+        'flags': [True, False, None],
+        'price': decimal.Decimal('12.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created': datetime.datetime(2020, 1, 2, 3, 4, 5, 123000, tzinfo=datetime.timezone.utc),
+        'published': datetime.date(2020, 1, 2),
+        'items': [{'id': index, 'tags': ['a'] * index} for index in range(20)],
+        'map': {str(index): index for index in range(20)},
+    }
+
+
+def nested(depth):
+    """
+    Список вложенностью `depth` со значением 1 на самом дне.
+
+    """
+    data = 1
+    for _ in range(depth - 1):
+        data = [data]
+    return data
+
+
+class BinaryCodecTestCase(SimpleTestCase):
+    """
+    Каждая проверка проходит и через библиотеку (если установлена), и через чистый python.
+
+    """
+    def implementations(self, name):
+        """
+        :return: Контексты: библиотека, если она установлена, и реализация на чистом python.
+        :rtype: list
+
+        """
+        result = [mock.patch.object(binary, LIBRARIES[name], None)]
+        if getattr(binary, LIBRARIES[name]) is not None:
+            result.append(contextlib.ExitStack())
+        return result
+
+    def test_round_trip(self):
+        data = get_payload()
+        for name in LIBRARIES:
+            codec = get_binary_codec(name)
+            contents = []
+            for implementation in self.implementations(name):
+                with implementation:
+                    content = codec.dumps(data)
+                    self.assertEqual(codec.loads(content), data, name)
+                    contents.append(content)
+            # Библиотека и чистый python пишут одни и те же байты.
+            self.assertEqual(len(set(contents)), 1, name)
+
+    def test_naive_datetime(self):
+        value = datetime.datetime(2020, 1, 2, 3, 4, 5)
+        for name in LIBRARIES:
+            for implementation in self.implementations(name):
+                with implementation:
+                    codec = get_binary_codec(name)
+                    result = codec.loads(codec.dumps({'created': value}))['created']
+                    self.assertEqual(result, value.replace(tzinfo=datetime.timezone.utc), name)
+
+    def test_malformed(self):
+        cases = {
+            'msgpack': [
+                b'', b'\x92\x01', b'\xc1', b'\x01\x02', b'\xdd\xff\xff\xff\xff', b'\xdb\xff\xff\xff\xff',
+                b'\xa1\xff', b'\xd4\x7f\x00', b'\xc7\x01\x01x',
+            ],
+            'cbor': [
+                b'', b'\x82\x01', b'\x1c', b'\x01\x02', b'\x9b\xff\xff\xff\xff\xff\xff\xff\xff',
+                b'\x7a\xff\xff\xff\xff', b'\x61\xff', b'\xd9\x03\xec\x61x',
+            ],
+        }
+        for name, contents in cases.items():
+            codec = get_binary_codec(name)
+            for implementation in self.implementations(name):
+                with implementation:
+                    for content in contents:
+                        with self.assertRaises(ValueError, msg='{} {!r}'.format(name, content)):
+                            codec.loads(content)
+
+    def test_max_depth(self):
+        for name in LIBRARIES:
+            codec = get_binary_codec(name)
+            for implementation in self.implementations(name):
+                with implementation, mock.patch.object(DefaultSettings.AUTO_REST.BINARY, 'MAX_DEPTH', 3):
+                    self.assertEqual(codec.loads(codec.dumps(nested(3))), nested(3))
+                    # Пустой контейнер на последнем уровне допустим.
+                    self.assertEqual(codec.loads(codec.dumps([[[]]])), [[[]]])
+                    self.assertEqual(codec.loads(codec.dumps({'a': {'b': 1}})), {'a': {'b': 1}})
+                    for data in (nested(4), [[{}], [[1]]], {'a': {'b': [1]}}):
+                        with self.assertRaises(ValueError, msg='{} {!r}'.format(name, data)):
+                            codec.loads(codec.dumps(data))
+
+    def test_very_deep(self):
+        # Глубже лимитов самих библиотек и рекурсии python.
+        contents = {'msgpack': b'\x91' * 100000 + b'\x01', 'cbor': b'\x81' * 100000 + b'\x01'}
+        for name, content in contents.items():
+            codec = get_binary_codec(name)
+            for implementation in self.implementations(name):
+                with implementation, self.assertRaises(ValueError, msg=name):
+                    codec.loads(content)
+
+    def test_check_depth(self):
+        check_depth(1, max_depth=1)
+        check_depth([], max_depth=1)
+        check_depth({}, max_depth=1)
+        with self.assertRaises(ValueError):
+            check_depth([1], max_depth=1)
+        check_depth(nested(5), max_depth=5)
+        with self.assertRaises(ValueError):
+            check_depth(nested(6), max_depth=5)
+        # Ключи словаря тоже элементы: cbor2 отдает составные ключи кортежами.
+        with self.assertRaises(ValueError):
+            check_depth({(1, (2,)): None}, max_depth=3)
+
+    def test_parser(self):
+        for parser_class in (MessagePackParser, CBORParser):
+            parser = parser_class()
+            codec = get_binary_codec(parser.format)
+            self.assertEqual(parser.parse(io.BytesIO(codec.dumps({'a': [1]}))), {'a': [1]})
+            with self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(b'\xc1\x1c'))
+            with mock.patch.object(DefaultSettings.AUTO_REST.BINARY, 'MAX_DEPTH', 2), \
+                    self.assertRaises(ParseError):
+                parser.parse(io.BytesIO(codec.dumps(nested(3))))
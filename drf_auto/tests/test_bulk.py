@@ -0,0 +1,200 @@
+"""
+Массовое создание, изменение и удаление объектов.
+Запуск: `django-admin test drf_auto.tests.test_bulk`.
+
+"""
+import json
+
+from django.contrib.auth.models import Group, Permission, User
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..views.rest import RestBulkCreateAPIView, RestBulkDestroyAPIView, RestBulkUpdateAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class CustomCreateGroupSerializer(GroupSerializer):
+    """
+    Сериалайзер со своим `create`: bulk_create его бы обошел.
+
+    """
+    def create(self, validated_data):
+        validated_data['name'] = validated_data['name'].upper()
+        return super().create(validated_data)
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'last_name', 'groups')
+
+
+class CustomUpdateUserSerializer(UserSerializer):
+    def update(self, instance, validated_data):
+        validated_data['last_name'] = 'custom'
+        return super().update(instance, validated_data)
+
+
+class BulkTestCase(APITestCase):
+    """
+    Общие вызовы вьюх.
+
+    """
+    queryset = Group.objects.all()
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.permissions = list(Permission.objects.order_by('id')[:3])
+
+    def call(self, base, method, data, **attrs):
+        attrs.setdefault('queryset', self.queryset)
+        view = type('View', (base,), attrs).as_view()
+        response = view(getattr(self.factory, method)('/', data, format='json'))
+        response.render()
+        content = json.loads(response.content.decode('utf-8')) if response.content else None
+        return response.status_code, content
+
+
+class BulkCreateTestCase(BulkTestCase):
+    def test_create(self):
+        data = [
+            {'name': 'first', 'permissions': [self.permissions[0].pk, self.permissions[1].pk]},
+            {'name': 'second', 'permissions': []},
+            {'name': 'third', 'permissions': [self.permissions[2].pk]},
+        ]
+        status, content = self.call(RestBulkCreateAPIView, 'post', data, serializer_class=GroupSerializer)
+        self.assertEqual(status, 201, content)
+        self.assertEqual(Group.objects.count(), 3)
+        first = Group.objects.get(name='first')
+        self.assertEqual(set(first.permissions.values_list('pk', flat=True)), {p.pk for p in self.permissions[:2]})
+        self.assertFalse(Group.objects.get(name='second').permissions.exists())
+        self.assertEqual([item['name'] for item in content], ['first', 'second', 'third'])
+
+    def test_validation_errors(self):
+        data = [{'name': 'ok', 'permissions': []}, {'permissions': []}, {'name': 'x' * 1000, 'permissions': []}]
+        status, content = self.call(RestBulkCreateAPIView, 'post', data, serializer_class=GroupSerializer)
+        self.assertEqual(status, 400)
+        self.assertEqual([item['index'] for item in content['data']], [1, 2])
+        self.assertFalse(Group.objects.exists())
+
+    def test_not_a_list(self):
+        status, content = self.call(RestBulkCreateAPIView, 'post', {'name': 'x'}, serializer_class=GroupSerializer)
+        self.assertEqual(status, 400)
+
+    def test_max_items(self):
+        data = [{'name': str(index), 'permissions': []} for index in range(3)]
+        status, content = self.call(
+            RestBulkCreateAPIView, 'post', data, serializer_class=GroupSerializer, bulk_max_items=2
+        )
+        self.assertEqual(status, 400)
+        self.assertFalse(Group.objects.exists())
+
+    def test_custom_create(self):
+        data = [{'name': 'first', 'permissions': [self.permissions[0].pk]}, {'name': 'second', 'permissions': []}]
+        status, content = self.call(RestBulkCreateAPIView, 'post', data, serializer_class=CustomCreateGroupSerializer)
+        self.assertEqual(status, 201, content)
+        self.assertEqual(sorted(Group.objects.values_list('name', flat=True)), ['FIRST', 'SECOND'])
+        self.assertTrue(Group.objects.get(name='FIRST').permissions.exists())
+
+    def test_batches(self):
+        data = [{'name': str(index), 'permissions': [self.permissions[0].pk]} for index in range(5)]
+        status, content = self.call(
+            RestBulkCreateAPIView, 'post', data, serializer_class=GroupSerializer, bulk_batch_size=2
+        )
+        self.assertEqual(status, 201, content)
+        self.assertEqual(Group.objects.count(), 5)
+        self.assertEqual(Permission.objects.filter(group__isnull=False).count(), 5)
+
+
+class BulkUpdateTestCase(BulkTestCase):
+    queryset = User.objects.all()
+
+    def setUp(self):
+        super().setUp()
+        self.group = Group.objects.create(name='group')
+        self.first = User.objects.create(username='first', first_name='First', last_name='One')
+        self.second = User.objects.create(username='second', first_name='Second', last_name='Two')
+
+    def test_put(self):
+        data = [
+            {
+                'id': self.first.pk, 'username': 'first', 'first_name': 'A', 'last_name': 'B',
+                'groups': [self.group.pk]
+            },
+            {'id': self.second.pk, 'username': 'second2', 'first_name': 'C', 'last_name': 'D', 'groups': []},
+        ]
+        status, content = self.call(RestBulkUpdateAPIView, 'put', data, serializer_class=UserSerializer)
+        self.assertEqual(status, 200, content)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.first_name, self.first.last_name), ('A', 'B'))
+        self.assertEqual((self.second.username, self.second.first_name), ('second2', 'C'))
+        self.assertEqual(list(self.first.groups.all()), [self.group])
+        self.assertEqual([item['first_name'] for item in content], ['A', 'C'])
+
+    def test_partial_items(self):
+        # Изменяемые колонки у элементов разные, bulk_update пишет их объединение.
+        data = [{'id': self.first.pk, 'first_name': 'A'}, {'id': self.second.pk, 'last_name': 'D'}]
+        status, content = self.call(RestBulkUpdateAPIView, 'patch', data, serializer_class=UserSerializer)
+        self.assertEqual(status, 200, content)
+        self.first.refresh_from_db()
+        self.second.refresh_from_db()
+        self.assertEqual((self.first.first_name, self.first.last_name), ('A', 'One'))
+        self.assertEqual((self.second.first_name, self.second.last_name), ('Second', 'D'))
+
+    def test_missing_object(self):
+        data = [{'id': self.first.pk, 'first_name': 'A'}, {'id': 0, 'first_name': 'B'}, {'first_name': 'C'}]
+        status, content = self.call(RestBulkUpdateAPIView, 'patch', data, serializer_class=UserSerializer)
+        self.assertEqual(status, 400)
+        self.assertEqual([item['index'] for item in content['data']], [1, 2])
+        self.first.refresh_from_db()
+        self.assertEqual(self.first.first_name, 'First')
+
+    def test_filtered_queryset(self):
+        data = [{'id': self.second.pk, 'first_name': 'X'}]
+        status, content = self.call(
+            RestBulkUpdateAPIView, 'patch', data, serializer_class=UserSerializer,
+            queryset=User.objects.filter(pk=self.first.pk)
+        )
+        self.assertEqual(status, 400)
+        self.second.refresh_from_db()
+        self.assertEqual(self.second.first_name, 'Second')
+
+    def test_custom_update(self):
+        data = [{'id': self.first.pk, 'first_name': 'A'}, {'id': self.second.pk, 'first_name': 'B'}]
+        status, content = self.call(RestBulkUpdateAPIView, 'patch', data, serializer_class=CustomUpdateUserSerializer)
+        self.assertEqual(status, 200, content)
+        self.assertEqual(
+            sorted(User.objects.values_list('first_name', 'last_name')), [('A', 'custom'), ('B', 'custom')]
+        )
+
+
+class BulkDestroyTestCase(BulkTestCase):
+    def setUp(self):
+        super().setUp()
+        self.groups = [Group.objects.create(name=str(index)) for index in range(5)]
+
+    def test_destroy(self):
+        data = [self.groups[0].pk, {'id': self.groups[1].pk}, {'pk': self.groups[2].pk}]
+        status, content = self.call(RestBulkDestroyAPIView, 'delete', data, bulk_batch_size=2)
+        self.assertEqual(status, 204)
+        self.assertEqual(sorted(Group.objects.values_list('name', flat=True)), ['3', '4'])
+
+    def test_invalid_pk(self):
+        status, content = self.call(RestBulkDestroyAPIView, 'delete', [self.groups[0].pk, 'x'])
+        self.assertEqual(status, 400)
+        self.assertEqual([item['index'] for item in content['data']], [1])
+        self.assertEqual(Group.objects.count(), 5)
+
+    def test_filtered_queryset(self):
+        data = [group.pk for group in self.groups]
+        status, content = self.call(
+            RestBulkDestroyAPIView, 'delete', data, queryset=Group.objects.filter(name__in=['0', '1'])
+        )
+        self.assertEqual(status, 204)
+        self.assertEqual(Group.objects.count(), 3)
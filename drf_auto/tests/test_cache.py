@@ -0,0 +1,117 @@
+"""
+Кэширование готовых ответов Rest генериков.
+Запуск: `django-admin test drf_auto.tests.test_cache`.
+
+"""
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from rest_framework import permissions, serializers
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from ..cache import CachePolicy, invalidate_model
+from ..views.rest import RestListAPIView, RestRetrieveAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class IsGroupMember(permissions.BasePermission):
+    """
+    Группу видят только ее участники.
+
+    """
+    def has_object_permission(self, request, view, obj):
+        return request.user.groups.filter(pk=obj.pk).exists()
+
+
+class CacheTestCase(APITestCase):
+    """
+    Попадания, промахи и сброс кэша ответов.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        caches['default'].clear()
+        self.group = Group.objects.create(name='group')
+        Group.objects.create(name='other')
+
+    def get_view(self, base, **attrs):
+        attrs.setdefault('cache_policy', CachePolicy(timeout=60))
+        return type('View', (base,), dict(
+            attrs, queryset=Group.objects.order_by('id'), serializer_class=GroupSerializer, pagination_class=None
+        )).as_view()
+
+    def call(self, view, url='/', user=None, **kwargs):
+        request = self.factory.get(url)
+        if user is not None:
+            force_authenticate(request, user)
+        response = view(request, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    def test_hit_and_miss(self):
+        view = self.get_view(RestListAPIView)
+        with self.assertNumQueries(1):
+            first = self.call(view)
+        self.assertEqual(first.status_code, 200)
+
+        with self.assertNumQueries(0):
+            second = self.call(view)
+        self.assertEqual(second.content, first.content)
+
+        # Другие параметры запроса - другой ключ.
+        with self.assertNumQueries(1):
+            self.call(view, '/?page=1')
+
+    def test_invalidation_by_signal(self):
+        view = self.get_view(RestListAPIView)
+        self.assertIn(b'"group"', self.call(view).content)
+
+        self.group.name = 'renamed'
+        self.group.save()
+        with self.assertNumQueries(1):
+            content = self.call(view).content
+        self.assertIn(b'"renamed"', content)
+
+        self.group.delete()
+        self.assertNotIn(b'"renamed"', self.call(view).content)
+
+    def test_invalidate_model(self):
+        view = self.get_view(RestListAPIView)
+        self.call(view)
+        Group.objects.filter(pk=self.group.pk).update(name='updated')
+        self.assertNotIn(b'"updated"', self.call(view).content)
+
+        invalidate_model(Group)
+        self.assertIn(b'"updated"', self.call(view).content)
+
+    def test_errors_are_not_cached(self):
+        view = self.get_view(RestRetrieveAPIView)
+        self.assertEqual(self.call(view, pk=0).status_code, 404)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.call(view, pk=0).status_code, 404)
+
+    def test_object_permissions(self):
+        member = User.objects.create(username='member')
+        member.groups.add(self.group)
+        stranger = User.objects.create(username='stranger')
+        view = self.get_view(RestRetrieveAPIView, permission_classes=[IsGroupMember])
+
+        self.assertEqual(self.call(view, user=member, pk=self.group.pk).status_code, 200)
+        self.assertEqual(self.call(view, user=stranger, pk=self.group.pk).status_code, 403)
+        # Сам участник по-прежнему получает ответ из кэша.
+        with self.assertNumQueries(0):
+            self.assertEqual(self.call(view, user=member, pk=self.group.pk).status_code, 200)
+
+    def test_shared_without_object_permissions(self):
+        first = User.objects.create(username='first')
+        second = User.objects.create(username='second')
+        view = self.get_view(RestRetrieveAPIView, permission_classes=[permissions.IsAuthenticated])
+
+        self.assertEqual(self.call(view, user=first, pk=self.group.pk).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.call(view, user=second, pk=self.group.pk).status_code, 200)
@@ -0,0 +1,167 @@
+"""
+Запись только измененных колонок при обновлении.
+Запуск: `django-admin test drf_auto.tests.test_changes`.
+
+"""
+import json
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, models
+from django.db.models.signals import post_save, pre_save
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..serializers.changes import get_changed_fields, get_update_fields
+from ..views.rest import RestUpdateAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class CustomUpdateSerializer(GroupSerializer):
+    def update(self, instance, validated_data):
+        instance.name = validated_data.get('name', instance.name).upper()
+        instance.save()
+        return instance
+
+
+class ChangedFieldsTestCase(APITestCase):
+    """
+    Сравнение проверенных данных с объектом.
+
+    """
+    def setUp(self):
+        self.permissions = list(Permission.objects.order_by('id')[:3])
+        self.group = Group.objects.create(name='group')
+        self.group.permissions.add(*self.permissions[:2])
+
+    def test_fields(self):
+        self.assertEqual(get_changed_fields(self.group, {'name': 'group'}), set())
+        self.assertEqual(get_changed_fields(self.group, {'name': 'other'}), {'name'})
+        self.assertEqual(get_changed_fields(self.group, {}), set())
+
+    def test_foreign_key(self):
+        permission = self.permissions[0]
+        content_type = permission.content_type
+        other = ContentType.objects.exclude(pk=content_type.pk).first()
+        # Связь сравнивается по pk, сам объект не загружается.
+        with self.assertNumQueries(0):
+            self.assertEqual(get_changed_fields(permission, {'content_type': content_type}), set())
+            self.assertEqual(get_changed_fields(permission, {'content_type': content_type.pk}), set())
+            self.assertEqual(get_changed_fields(permission, {'content_type': other}), {'content_type'})
+            self.assertEqual(get_changed_fields(permission, {'content_type': other.pk}), {'content_type'})
+
+    def test_many_to_many(self):
+        first, second, third = self.permissions
+        self.assertEqual(get_changed_fields(self.group, {'permissions': [second, first]}), set())
+        self.assertEqual(get_changed_fields(self.group, {'permissions': [first.pk, second.pk]}), set())
+        self.assertEqual(get_changed_fields(self.group, {'permissions': [first]}), {'permissions'})
+        self.assertEqual(get_changed_fields(self.group, {'permissions': [first, second, third]}), {'permissions'})
+        self.assertEqual(get_changed_fields(self.group, {'permissions': []}), {'permissions'})
+
+        # С prefetch_related текущие связи берутся из кэша.
+        group = Group.objects.prefetch_related('permissions').get(pk=self.group.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_changed_fields(group, {'permissions': [first, second], 'name': 'x'}), {'name'})
+            self.assertEqual(get_changed_fields(group, {'permissions': [third]}), {'permissions'})
+
+    def test_untracked(self):
+        # Не филд модели, обратная связь или pk - отследить нельзя.
+        self.assertIsNone(get_changed_fields(self.group, {'name': 'group', 'extra': 1}))
+        self.assertIsNone(get_changed_fields(self.group, {'user': []}))
+        self.assertIsNone(get_changed_fields(self.group, {'id': self.group.pk + 1}))
+
+
+class UpdateFieldsTestCase(SimpleTestCase):
+    """
+    Колонки `auto_now` пишутся вместе с любым изменением.
+
+    """
+    def get_instance(self):
+        fields = [
+            models.AutoField(primary_key=True), models.CharField(max_length=10),
+            models.DateTimeField(auto_now=True), models.DateTimeField(auto_now_add=True),
+        ]
+        for field, name in zip(fields, ('id', 'name', 'updated_at', 'created_at')):
+            field.set_attributes_from_name(name)
+        return mock.Mock(_meta=mock.Mock(concrete_fields=fields))
+
+    def test_update_fields(self):
+        instance = self.get_instance()
+        self.assertEqual(get_update_fields(instance, {'name'}), ['name', 'updated_at'])
+        # M2M не колонки, но изменение все равно обновляет версию объекта.
+        self.assertEqual(get_update_fields(instance, {'permissions'}), ['updated_at'])
+        self.assertEqual(get_update_fields(instance, set()), [])
+
+
+class TrackChangesViewTestCase(APITestCase):
+    """
+    Запись в БД и сигналы при обновлении через view.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.permissions = list(Permission.objects.order_by('id')[:3])
+        self.group = Group.objects.create(name='group')
+        self.group.permissions.add(self.permissions[0])
+        self.saves = []
+        pre_save.connect(self.on_pre_save, sender=Group)
+        self.addCleanup(pre_save.disconnect, self.on_pre_save, sender=Group)
+
+    def on_pre_save(self, sender, instance, update_fields=None, **kwargs):
+        # save подменять нельзя: он должен прийти из класса модели.
+        self.assertNotIn('save', instance.__dict__)
+        self.saves.append(update_fields)
+
+    def patch(self, data, serializer_class=GroupSerializer, **attrs):
+        attrs.setdefault('track_changes', True)
+        view = type('View', (RestUpdateAPIView,), dict(
+            attrs, queryset=Group.objects.all(), serializer_class=serializer_class
+        )).as_view()
+        request = self.factory.patch('/', data, format='json')
+        with CaptureQueriesContext(connection) as queries:
+            response = view(request, pk=self.group.pk)
+            response.render()
+        self.assertEqual(response.status_code, 200, response.content)
+        updates = [item['sql'] for item in queries.captured_queries if item['sql'].startswith('UPDATE')]
+        return json.loads(response.content.decode('utf-8')), updates
+
+    def test_unchanged(self):
+        post_saves = []
+        post_save.connect(lambda **kwargs: post_saves.append(1), sender=Group, weak=False, dispatch_uid='test')
+        self.addCleanup(post_save.disconnect, sender=Group, dispatch_uid='test')
+        data, updates = self.patch({'name': 'group', 'permissions': [self.permissions[0].pk]})
+        self.assertEqual(data['name'], 'group')
+        self.assertEqual(updates, [])
+        self.assertEqual(self.saves, [])
+        self.assertEqual(post_saves, [])
+
+    def test_changed_columns_only(self):
+        data, updates = self.patch({'name': 'other'})
+        self.assertEqual(data['name'], 'other')
+        self.assertEqual(self.saves, [frozenset(['name'])])
+        self.assertEqual(len(updates), 1)
+        self.assertIn('SET "name" = ', updates[0])
+        self.assertEqual(Group.objects.get().name, 'other')
+
+    def test_many_to_many(self):
+        pks = [permission.pk for permission in self.permissions[1:]]
+        data, updates = self.patch({'name': 'group', 'permissions': pks})
+        self.assertEqual(sorted(data['permissions']), pks)
+        self.assertEqual(sorted(self.group.permissions.values_list('pk', flat=True)), pks)
+        # Колонки не изменились, а `save(update_fields=[])` ничего не пишет.
+        self.assertEqual(updates, [])
+
+    def test_disabled_and_custom_update(self):
+        data, updates = self.patch({'name': 'group'}, track_changes=False)
+        self.assertEqual(self.saves, [None])
+        data, updates = self.patch({'name': 'other'}, serializer_class=CustomUpdateSerializer)
+        self.assertEqual(data['name'], 'OTHER')
+        self.assertEqual(self.saves, [None, None])
@@ -0,0 +1,145 @@
+"""
+Скомпилированный `to_representation` отдает те же байты, что и DRF.
+Запуск: `django-admin test drf_auto.tests.test_compiler`.
+
+"""
+from django.contrib.auth.models import Group, Permission, User
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+
+from ..serializers.compiler import install_compiled
+
+
+class ContentTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentType
+        fields = ('id', 'app_label', 'model')
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    content_type_data = ContentTypeSerializer(source='content_type', read_only=True)
+    app_label = serializers.CharField(source='content_type.app_label', read_only=True)
+    price = serializers.DecimalField(max_digits=10, decimal_places=2, source='id', read_only=True)
+    title = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'name', 'codename', 'content_type', 'content_type_data', 'app_label', 'price', 'title')
+
+    def get_title(self, obj):
+        return '{}: {}'.format(obj.codename, obj.name)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    permission_list = PermissionSerializer(source='permissions', many=True, read_only=True)
+    everything = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions', 'permission_list', 'everything')
+
+    def get_everything(self, obj):
+        return None
+
+
+class UserSerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='get_full_name', read_only=True)
+    group_names = serializers.SlugRelatedField(source='groups', slug_field='name', many=True, read_only=True)
+
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'full_name', 'is_active', 'date_joined', 'group_names')
+
+
+class CustomRepresentationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+    def to_representation(self, instance):
+        return {'custom': instance.name}
+
+
+class UpperField(serializers.CharField):
+    def to_representation(self, value):
+        return str(value).upper()
+
+
+class CustomFieldSerializer(serializers.ModelSerializer):
+    upper = UpperField(source='name', read_only=True)
+
+    class Meta:
+        model = Group
+        fields = ('id', 'upper')
+
+
+class CompilerParityTestCase(APITestCase):
+    """
+    Сравниваем ответ с компиляцией и без нее байт в байт.
+
+    """
+    def setUp(self):
+        self.permissions = list(Permission.objects.order_by('id')[:3])
+        self.group = Group.objects.create(name='group')
+        self.group.permissions.add(*self.permissions)
+        Group.objects.create(name='empty')
+        self.user = User.objects.create(username='user', first_name='First', last_name='Last')
+        self.user.groups.add(self.group)
+
+    def render(self, serializer_class, data, compiled, **kwargs):
+        serializer = serializer_class(data, **kwargs)
+        if compiled:
+            install_compiled(serializer)
+        return JSONRenderer().render(serializer.data)
+
+    def assertParity(self, serializer_class, data, **kwargs):
+        expected = self.render(serializer_class, data, False, **kwargs)
+        self.assertEqual(self.render(serializer_class, data, True, **kwargs), expected)
+        return expected
+
+    def assertCompiled(self, serializer_class, data, **kwargs):
+        serializer = install_compiled(serializer_class(data, **kwargs))
+        self.assertIn('to_representation', serializer.__dict__)
+
+    def test_foreign_key_and_nested(self):
+        permission = self.permissions[0]
+        self.assertCompiled(PermissionSerializer, permission)
+        content = self.assertParity(PermissionSerializer, permission)
+        self.assertIn('"content_type":{}'.format(permission.content_type_id).encode(), content)
+        self.assertIn(b'"price":"', content)
+
+    def test_nullable_foreign_key(self):
+        # Несохраненный объект без связи: pk из колонки - None, вложенный сериалайзер - через DRF.
+        permission = Permission(name='unsaved', codename='unsaved', content_type_id=None)
+        self.assertParity(PermissionSerializer, permission)
+        self.assertParity(PermissionSerializer, [permission, self.permissions[0]], many=True)
+
+    def test_many(self):
+        self.assertCompiled(PermissionSerializer, self.permissions, many=True)
+        self.assertParity(PermissionSerializer, self.permissions, many=True)
+        self.assertParity(PermissionSerializer, Permission.objects.order_by('id')[:5], many=True)
+        self.assertParity(PermissionSerializer, [], many=True)
+
+    def test_many_to_many(self):
+        self.assertCompiled(GroupSerializer, Group.objects.order_by('id'), many=True)
+        content = self.assertParity(GroupSerializer, Group.objects.order_by('id'), many=True)
+        self.assertIn(b'"permission_list":[]', content)
+        self.assertParity(UserSerializer, self.user)
+
+    def test_fallback(self):
+        # Свой to_representation не компилируется.
+        serializer = install_compiled(CustomRepresentationSerializer(self.group))
+        self.assertNotIn('to_representation', serializer.__dict__)
+        self.assertEqual(serializer.data, {'custom': 'group'})
+        serializer = install_compiled(CustomRepresentationSerializer([self.group], many=True))
+        self.assertNotIn('to_representation', serializer.__dict__)
+
+        # Свой to_representation у филда вызывается как есть.
+        self.assertCompiled(CustomFieldSerializer, self.group)
+        content = self.assertParity(CustomFieldSerializer, self.group)
+        self.assertIn(b'"upper":"GROUP"', content)
+
+        # Не объект модели сериалайзера - целиком через DRF.
+        self.assertParity(CustomFieldSerializer, {'id': 1, 'name': 'dict'})
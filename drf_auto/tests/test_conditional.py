@@ -0,0 +1,119 @@
+"""
+Условные запросы: ETag от GET должен подходить для If-Match при записи.
+Запуск: `django-admin test drf_auto.tests.test_conditional`.
+
+"""
+from django.contrib.auth.models import Group, User
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..conditional import VersionConditionalStrategy
+from ..views.rest import RestRetrieveAPIView, RestUpdateAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class GroupNameSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('name',)
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username')
+
+
+class ConditionalTestCase(APITestCase):
+    """
+    GET -> If-None-Match и GET -> If-Match -> PUT.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.group = Group.objects.create(name='group')
+
+    def get_views(self, strategy):
+        """
+        Вьюхи чтения и записи с разными сериалайзерами ответа.
+
+        :return: Вьюха чтения и вьюха записи.
+        :rtype: tuple
+
+        """
+        serializer_classes = {
+            'get': {'out': GroupSerializer},
+            'put': {'in': GroupNameSerializer, 'out': GroupNameSerializer},
+        }
+        attrs = dict(queryset=Group.objects.all(), serializer_classes=serializer_classes, conditional_strategy=strategy)
+        return (
+            type('RetrieveView', (RestRetrieveAPIView,), attrs).as_view(),
+            type('UpdateView', (RestUpdateAPIView,), attrs).as_view(),
+        )
+
+    def get(self, view, **headers):
+        response = view(self.factory.get('/groups/{}/'.format(self.group.pk), **headers), pk=self.group.pk)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    def put(self, view, name, etag):
+        # Запись идет по другому урлу, чем чтение.
+        request = self.factory.put(
+            '/groups/{}/edit/'.format(self.group.pk), {'name': name}, format='json', HTTP_IF_MATCH=etag
+        )
+        response = view(request, pk=self.group.pk)
+        response.render()
+        return response
+
+    def check_round_trip(self, strategy):
+        retrieve, update = self.get_views(strategy)
+        response = self.get(retrieve)
+        self.assertEqual(response.status_code, 200)
+        etag = response['ETag']
+        self.assertTrue(etag)
+
+        self.assertEqual(self.get(retrieve, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        response = self.put(update, 'renamed', etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.name, 'renamed')
+
+        # Старый ETag больше не подходит.
+        self.assertEqual(self.put(update, 'again', etag).status_code, 412)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.name, 'renamed')
+
+        new_etag = self.get(retrieve)['ETag']
+        self.assertNotEqual(new_etag, etag)
+        self.assertEqual(self.put(update, 'again', new_etag).status_code, 200)
+
+    def test_hash(self):
+        self.check_round_trip('hash')
+
+    def test_version(self):
+        self.check_round_trip(VersionConditionalStrategy(field='name'))
+
+    def test_version_depends_on_object(self):
+        # Одинаковая версия у разных объектов не дает одинаковый ETag: в него входит lookup из урла.
+        first = User.objects.create(username='first', last_name='same')
+        second = User.objects.create(username='second', last_name='same')
+        view = type('View', (RestRetrieveAPIView,), dict(
+            queryset=User.objects.all(), serializer_class=UserSerializer,
+            conditional_strategy=VersionConditionalStrategy(field='last_name')
+        )).as_view()
+        etags = [view(self.factory.get('/users/'), pk=user.pk)['ETag'] for user in (first, second)]
+        self.assertTrue(etags[0])
+        self.assertNotEqual(etags[0], etags[1])
+
+    def test_version_depends_on_query_params(self):
+        retrieve, update = self.get_views(VersionConditionalStrategy(field='name'))
+        etag = self.get(retrieve)['ETag']
+        response = retrieve(self.factory.get('/groups/{}/?fields=id'.format(self.group.pk)), pk=self.group.pk)
+        self.assertNotEqual(response['ETag'], etag)
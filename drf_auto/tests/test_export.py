@@ -0,0 +1,207 @@
+"""
+Потоковая выгрузка списков в NDJSON и CSV.
+Запуск: `django-admin test drf_auto.tests.test_export`.
+
+"""
+import json
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
+from django.test import SimpleTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .. import export
+from ..export import get_export_columns, iter_chunks, to_cell
+from ..settings import DefaultSettings
+from ..views.rest import RestListAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class ContentTypeSerializer(serializers.Serializer):
+    app_label = serializers.CharField()
+    model = serializers.CharField()
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    content_type = ContentTypeSerializer(read_only=True)
+    tags = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'codename', 'content_type', 'tags')
+
+    def get_tags(self, obj):
+        return [obj.codename.split('_')[0]]
+
+
+class IterChunksTestCase(APITestCase):
+    """
+    По ключу, если можно, иначе через OFFSET.
+
+    """
+    def setUp(self):
+        self.groups = [Group.objects.create(name=name) for name in ('e', 'c', 'a', 'd', 'b')]
+
+    def read(self, queryset, chunk_size=2):
+        """
+        :return: Куски в виде списков pk и SQL запросы.
+        :rtype: tuple
+
+        """
+        with CaptureQueriesContext(connection) as queries:
+            chunks = [[getattr(item, 'pk', item) for item in chunk] for chunk in iter_chunks(queryset, chunk_size)]
+        return chunks, [item['sql'] for item in queries.captured_queries]
+
+    def assertKeyset(self, queries, operator):
+        for sql in queries:
+            self.assertNotIn('OFFSET', sql)
+        for sql in queries[1:]:
+            self.assertIn('"id" {} '.format(operator), sql)
+
+    def test_unordered(self):
+        pks = [group.pk for group in self.groups]
+        chunks, queries = self.read(Group.objects.all())
+        self.assertEqual(chunks, [pks[0:2], pks[2:4], pks[4:]])
+        self.assertEqual(len(queries), 3)
+        self.assertKeyset(queries, '>')
+
+    def test_ordered_by_pk(self):
+        pks = [group.pk for group in self.groups]
+        for ordering in ('pk', 'id'):
+            chunks, queries = self.read(Group.objects.order_by(ordering))
+            self.assertEqual(sum(chunks, []), pks)
+            self.assertKeyset(queries, '>')
+
+    def test_descending_pk(self):
+        pks = [group.pk for group in reversed(self.groups)]
+        for ordering in ('-pk', '-id'):
+            chunks, queries = self.read(Group.objects.order_by(ordering))
+            self.assertEqual(chunks, [pks[0:2], pks[2:4], pks[4:]])
+            self.assertKeyset(queries, '<')
+
+    def test_offset(self):
+        by_name = sorted(self.groups, key=lambda group: group.name)
+        querysets = [
+            Group.objects.order_by('name'),
+            Group.objects.order_by('name', 'pk'),
+            Group.objects.order_by('name')[:4],
+        ]
+        for queryset in querysets:
+            chunks, queries = self.read(queryset)
+            self.assertEqual(sum(chunks, []), [group.pk for group in by_name][:len(queryset)])
+            self.assertIn('OFFSET', queries[-1])
+            self.assertNotIn('"id" >', ' '.join(queries))
+
+        # values() отдает словари без pk.
+        chunks, queries = self.read(Group.objects.order_by('pk').values('id', 'name'))
+        self.assertEqual([item['name'] for item in sum(chunks, [])], [group.name for group in self.groups])
+        self.assertIn('OFFSET', queries[-1])
+
+    def test_exact_chunks(self):
+        # Последний кусок полный: нужен еще один запрос, что бы понять, что объектов больше нет.
+        chunks, queries = self.read(Group.objects.filter(name__lt='e'))
+        self.assertEqual([len(chunk) for chunk in chunks], [2, 2])
+        self.assertEqual(len(queries), 3)
+        self.assertEqual(self.read(Group.objects.none())[0], [])
+
+
+class ExportColumnsTestCase(SimpleTestCase):
+    def test_columns(self):
+        self.assertEqual(
+            get_export_columns(PermissionSerializer),
+            (('id',), ('codename',), ('content_type', 'app_label'), ('content_type', 'model'), ('tags',))
+        )
+        self.assertEqual(get_export_columns(PermissionSerializer, frozenset(['tags', 'id'])), (('id',), ('tags',)))
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(export, '_cached_columns', None), \
+                mock.patch.object(DefaultSettings.AUTO_REST.EXPORT, 'CACHE_SIZE', 2):
+            columns = get_export_columns(GroupSerializer)
+            self.assertIs(get_export_columns(GroupSerializer), columns)
+            for fields in (frozenset(['id']), frozenset(['name']), None):
+                get_export_columns(PermissionSerializer, fields)
+            info = export._cached_columns.cache_info()
+            self.assertEqual(info.maxsize, 2)
+            self.assertEqual(info.currsize, 2)
+
+    def test_to_cell(self):
+        self.assertEqual(to_cell(None), '')
+        self.assertEqual(to_cell(True), 'true')
+        self.assertEqual(to_cell(10), '10')
+        self.assertEqual(to_cell(['a', 1]), '["a",1]')
+        self.assertEqual(to_cell({'a': None}), '{"a":null}')
+
+
+class ExportViewTestCase(APITestCase):
+    """
+    Ответ выгрузки целиком.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.groups = [Group.objects.create(name=name) for name in ('b', 'a, "quoted"', 'c')]
+
+    def get(self, url, queryset=None, serializer_class=GroupSerializer, **attrs):
+        """
+        :return: Ответ и его тело.
+        :rtype: tuple
+
+        """
+        attrs.setdefault('export', True)
+        view = type('View', (RestListAPIView,), dict(
+            attrs, queryset=queryset if queryset is not None else Group.objects.all(),
+            serializer_class=serializer_class, export_chunk_size=2
+        )).as_view()
+        response = view(self.factory.get(url))
+        return response, b''.join(response.streaming_content)
+
+    def test_ndjson(self):
+        response, content = self.get('/?format=ndjson')
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertEqual(response['Content-Disposition'], 'attachment; filename="group.ndjson"')
+        rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+        self.assertEqual(rows, [{'id': group.pk, 'name': group.name} for group in self.groups])
+        self.assertTrue(content.endswith(b'\n'))
+
+    def test_csv(self):
+        response, content = self.get('/?format=csv')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(content.decode('utf-8').splitlines(), ['id,name'] + [
+            '{},b'.format(self.groups[0].pk), '{},"a, ""quoted"""'.format(self.groups[1].pk),
+            '{},c'.format(self.groups[2].pk),
+        ])
+
+    def test_nested_csv(self):
+        queryset = Permission.objects.select_related('content_type').order_by('pk')
+        response, content = self.get('/?format=csv', queryset=queryset, serializer_class=PermissionSerializer)
+        lines = content.decode('utf-8').splitlines()
+        self.assertEqual(lines[0], 'id,codename,content_type.app_label,content_type.model,tags')
+        permission = queryset[0]
+        self.assertEqual(lines[1], '{},{},{},{},"[""{}""]"'.format(
+            permission.pk, permission.codename, permission.content_type.app_label, permission.content_type.model,
+            permission.codename.split('_')[0]
+        ))
+        self.assertEqual(len(lines), queryset.count() + 1)
+
+    def test_sparse_fields(self):
+        response, content = self.get('/?format=csv&fields=name', sparse_fields=True)
+        self.assertEqual(content.decode('utf-8').splitlines()[0], 'name')
+
+    def test_descending_pk(self):
+        response, content = self.get('/?format=ndjson', queryset=Group.objects.order_by('-pk'))
+        rows = [json.loads(line) for line in content.decode('utf-8').splitlines()]
+        self.assertEqual([row['id'] for row in rows], [group.pk for group in reversed(self.groups)])
+
+    def test_disabled(self):
+        response = type('View', (RestListAPIView,), dict(
+            queryset=Group.objects.all(), serializer_class=GroupSerializer, export=False
+        )).as_view()(self.factory.get('/?format=csv'))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,249 @@
+"""
+Филды сериалайзеров.
+Запуск: `django-admin test drf_auto.tests.test_fields`.
+
+"""
+import copy
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from ..serializers import fields
+from ..serializers.fields import AllowedValues, GraphListMultipleChoiceField, IntegerRangeList, IntegerRangeListField
+
+
+class GraphListMultipleChoiceFieldTestCase(SimpleTestCase):
+    """
+    Порядок элементов и сообщения об ошибках.
+
+    """
+    def parse(self, value, allowed_values=('a', 'b', 'c'), **kwargs):
+        return GraphListMultipleChoiceField(allowed_values=list(allowed_values), **kwargs).run_validation(value)
+
+    def get_error(self, value, **kwargs):
+        with self.assertRaises(serializers.ValidationError) as context:
+            self.parse(value, **kwargs)
+        return [str(error) for error in context.exception.detail]
+
+    def test_order(self):
+        # Порядок первого появления, без повторов.
+        self.assertEqual(self.parse('c, a,c,b ,a'), ['c', 'a', 'b'])
+        self.assertEqual(self.parse('b'), ['b'])
+
+    def test_empty(self):
+        self.assertEqual(self.parse(''), ['a', 'b', 'c'])
+        self.assertEqual(self.parse('', default_exclude_fields=['b']), ['a', 'c'])
+        self.assertEqual(self.parse('', allowed_values=('c', 'a', 'c')), ['c', 'a'])
+
+    def test_separator(self):
+        self.assertEqual(self.parse('b;a', separator=';'), ['b', 'a'])
+
+    def test_error_messages(self):
+        self.assertEqual(self.get_error('a,x'), ["Элемент `x` недопустим. Разрешенные: `['a', 'b', 'c']`."])
+        self.assertEqual(self.get_error('a,b c'), ['Значение `b c` содержит недопустимые символы `Пробелы`.'])
+        # Разрешенный элемент с пробелом все равно не проходит проверку на символы.
+        self.assertEqual(
+            self.get_error('a b', allowed_values=('a b',)), ['Значение `a b` содержит недопустимые символы `Пробелы`.']
+        )
+        self.assertEqual(self.get_error('a,,b'), ["Элемент `` недопустим. Разрешенные: `['a', 'b', 'c']`."])
+        self.assertEqual(self.get_error(['a']), ["Поле `<class 'list'>` не является строкой."])
+        # Первая ошибка по порядку элементов.
+        self.assertEqual(self.get_error('x, y'), ["Элемент `x` недопустим. Разрешенные: `['a', 'b', 'c']`."])
+
+    def test_max_items(self):
+        self.assertEqual(self.parse('a,b', max_items=2), ['a', 'b'])
+        # Повторы считаются: лимит на разбор строки, а не на результат.
+        self.assertEqual(self.get_error('a,a,a', max_items=2), ['Слишком много элементов: больше `2`.'])
+
+    def test_max_length(self):
+        self.assertEqual(self.parse('a,b', max_length=3), ['a', 'b'])
+        self.assertEqual(self.get_error('a,b,c', max_length=3), ['Слишком длинная строка: больше `3` символов.'])
+        # Длина проверяется до разбора элементов.
+        self.assertEqual(self.get_error('x' * 10, max_length=3), ['Слишком длинная строка: больше `3` символов.'])
+
+    def test_representation(self):
+        self.assertEqual(GraphListMultipleChoiceField(allowed_values=['a']).to_representation(['a', 'b']), 'a,b')
+
+
+class IntegerRangeListFieldTestCase(SimpleTestCase):
+    """
+    Разбор строки с числами и диапазонами.
+
+    """
+    def parse(self, value, **kwargs):
+        return IntegerRangeListField(**kwargs).run_validation(value)
+
+    def assertInvalid(self, value, **kwargs):
+        with self.assertRaises(serializers.ValidationError, msg=value):
+            self.parse(value, **kwargs)
+
+    def test_parse(self):
+        ids = self.parse(' 5, 1-3 ,10,5')
+        self.assertEqual(list(ids.pairs()), [(5, 5), (1, 3), (10, 10), (5, 5)])
+        self.assertEqual(list(ids), [5, 1, 2, 3, 10, 5])
+        self.assertEqual(list(ids.unique()), [5, 1, 2, 3, 10])
+        self.assertEqual(len(ids), 6)
+        self.assertEqual(str(ids), '5,1-3,10,5')
+        self.assertIn(2, ids)
+        self.assertNotIn(4, ids)
+
+    def test_separators(self):
+        ids = self.parse('1;3:5', separator=';', range_separator=':')
+        self.assertEqual(list(ids), [1, 3, 4, 5])
+
+    def test_invalid(self):
+        for value in ('', '1,,2', 'a', '1-', '-1', '1-2-3', '1.5', ' ', '+1', '5-1'):
+            self.assertInvalid(value)
+        self.assertInvalid(12)
+        # Не влезает в 64 бита.
+        self.assertInvalid(str(2 ** 63))
+
+    def test_non_ascii_digits(self):
+        # `isdecimal()` их пропускает, а `int()` превращает в числа.
+        for value in ('١٢', '1-٣', '１２', '²'):
+            self.assertInvalid(value)
+
+    def test_limits(self):
+        self.assertEqual(len(self.parse('1-1000000', max_items=1000000)), 1000000)
+        self.assertInvalid('1-1000001', max_items=1000000)
+        self.assertInvalid('1,2,3', max_items=2)
+        self.assertInvalid('1,2,3', max_length=4)
+
+    def test_representation(self):
+        field = IntegerRangeListField()
+        self.assertEqual(field.to_representation(IntegerRangeList.from_pairs([(1, 1), (3, 9)])), '1,3-9')
+        self.assertEqual(field.to_representation([1, 2]), '1,2')
+
+
+class IntegerRangeListTestCase(SimpleTestCase):
+    """
+    ORM условие и разбиение на пачки.
+
+    """
+    def test_as_q(self):
+        ids = IntegerRangeList.from_pairs([(1, 1), (10, 20), (5, 5)])
+        q = ids.as_q('pk')
+        self.assertEqual(q.connector, 'OR')
+        children = q.children
+        self.assertEqual(children[0][0], 'pk__in')
+        self.assertEqual(list(children[0][1]), [1, 5])
+        self.assertEqual(children[1], ('pk__range', (10, 20)))
+
+    def test_chunks(self):
+        ids = IntegerRangeList.from_pairs([(1, 1), (2, 2), (10, 20), (3, 3), (30, 40)])
+        chunks = [str(chunk) for chunk in ids.chunks(3)]
+        # Одиночное число - один параметр, диапазон - два.
+        self.assertEqual(chunks, ['1,2', '10-20,3', '30-40'])
+        self.assertEqual([str(chunk) for chunk in ids.chunks(1)], ['1', '2', '10-20', '3', '30-40'])
+        self.assertEqual(list(IntegerRangeList().chunks(10)), [])
+
+
+class IntegerRangeListQueryTestCase(APITestCase):
+    """
+    Условие находит те же объекты, что и развернутый список.
+
+    """
+    def test_filter(self):
+        pks = [Group.objects.create(name=str(index)).pk for index in range(10)]
+        ids = IntegerRangeList.from_pairs([(pks[0], pks[0]), (pks[3], pks[5]), (pks[8], pks[8])])
+        found = sorted(Group.objects.filter(ids.as_q('pk')).values_list('pk', flat=True))
+        self.assertEqual(found, [pks[0], pks[3], pks[4], pks[5], pks[8]])
+        self.assertFalse(Group.objects.filter(IntegerRangeList().as_q('pk')).exists())
+
+
+class AllowedValuesTestCase(APITestCase):
+    """
+    Общий кэш разрешенных значений, TTL и сброс по сигналам.
+
+    """
+    def setUp(self):
+        Group.objects.create(name='a')
+        Group.objects.create(name='b')
+
+    def get_serializer_class(self, allowed_values, positional=False):
+        if positional:
+            field = GraphListMultipleChoiceField(allowed_values, max_items=5)
+        else:
+            field = GraphListMultipleChoiceField(allowed_values=allowed_values, max_items=5)
+        return type('GroupsSerializer', (serializers.Serializer,), {'groups': field})
+
+    def validate(self, serializer_class, value):
+        serializer = serializer_class(data={'groups': value})
+        return serializer.validated_data['groups'] if serializer.is_valid() else None
+
+    def test_deepcopy_returns_self(self):
+        values = AllowedValues(Group.objects.values_list('name', flat=True))
+        self.assertIs(copy.deepcopy(values), values)
+        self.assertIs(copy.deepcopy({'values': values})['values'], values)
+
+    def test_copies_share_cache(self):
+        for positional in (False, True):
+            queryset = Group.objects.values_list('name', flat=True)
+            if positional:
+                field = GraphListMultipleChoiceField(queryset)
+            else:
+                field = GraphListMultipleChoiceField(allowed_values=queryset)
+            source = field.allowed_source
+            self.assertIsInstance(source, AllowedValues)
+            # DRF копирует филд из исходных аргументов, они подменены на общий `AllowedValues`.
+            self.assertIs(copy.deepcopy(field).allowed_source, source)
+            self.assertIs(field.__class__(*field._args, **field._kwargs).allowed_source, source)
+
+    def test_read_once_for_all_serializers(self):
+        for positional in (False, True):
+            serializer_class = self.get_serializer_class(Group.objects.values_list('name', flat=True), positional)
+            with self.assertNumQueries(1):
+                for _ in range(3):
+                    self.assertEqual(self.validate(serializer_class, 'b,a'), ['b', 'a'])
+                self.assertIsNone(self.validate(serializer_class, 'c'))
+
+    def test_ttl(self):
+        calls = []
+
+        def load():
+            calls.append(1)
+            return ['a', 'b']
+
+        field = GraphListMultipleChoiceField(allowed_values=AllowedValues(load, ttl=10))
+        with mock.patch.object(fields.time, 'monotonic', return_value=100):
+            field.run_validation('a')
+            field.run_validation('b')
+        self.assertEqual(len(calls), 1)
+        with mock.patch.object(fields.time, 'monotonic', return_value=109):
+            field.run_validation('a')
+        self.assertEqual(len(calls), 1)
+        with mock.patch.object(fields.time, 'monotonic', return_value=110):
+            field.run_validation('a')
+        self.assertEqual(len(calls), 2)
+
+    def test_invalidation_by_signal(self):
+        serializer_class = self.get_serializer_class(Group.objects.values_list('name', flat=True))
+        self.assertIsNone(self.validate(serializer_class, 'c'))
+
+        group = Group.objects.create(name='c')
+        self.assertEqual(self.validate(serializer_class, 'c'), ['c'])
+
+        group.delete()
+        self.assertIsNone(self.validate(serializer_class, 'c'))
+
+        # update() сигналов не шлет, значение доступно только после TTL.
+        Group.objects.filter(name='a').update(name='d')
+        self.assertIsNone(self.validate(serializer_class, 'd'))
+
+    def test_extra_models(self):
+        def load():
+            return list(Group.objects.values_list('name', flat=True))
+
+        values = AllowedValues(load, models=[Group])
+        field = GraphListMultipleChoiceField(allowed_values=values)
+        self.assertEqual(field.allowed_values, ['a', 'b'])
+        Group.objects.create(name='c')
+        self.assertEqual(field.allowed_values, ['a', 'b', 'c'])
+
+        # Изменения других моделей кэш не сбрасывают.
+        Permission.objects.first().save()
+        with self.assertNumQueries(0):
+            self.assertEqual(field.allowed_values, ['a', 'b', 'c'])
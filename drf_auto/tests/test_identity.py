@@ -0,0 +1,152 @@
+"""
+Identity map запроса: каждый объект загружается за запрос один раз.
+Запуск: `django-admin test drf_auto.tests.test_identity`.
+
+"""
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..identity import IdentityMap, get_identity_map
+from ..views import rest
+from ..views.rest import RestRetrieveAPIView, RestUpdateAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class IdentityMapTestCase(APITestCase):
+    """
+    Queryset с фильтрами видит только объекты, загруженные через него.
+
+    """
+    def setUp(self):
+        self.first = Group.objects.create(name='first')
+        self.second = Group.objects.create(name='second')
+        self.identity_map = IdentityMap()
+
+    def test_same_object(self):
+        obj = self.identity_map.get(Group.objects.all(), self.first.pk)
+        with self.assertNumQueries(0):
+            self.assertIs(self.identity_map.get(Group.objects.all(), str(self.first.pk)), obj)
+        self.assertEqual(len(self.identity_map), 1)
+
+    def test_scoped_queryset(self):
+        self.identity_map.get(Group.objects.all(), self.first.pk)
+        scoped = Group.objects.filter(name='second')
+        # Объект уже в карте, но через этот queryset его не видно: проверяем запросом к БД.
+        with self.assertNumQueries(1), self.assertRaises(Group.DoesNotExist):
+            self.identity_map.get(scoped, self.first.pk)
+
+        with self.assertNumQueries(1):
+            found = self.identity_map.get_many(scoped, [self.first.pk, self.second.pk])
+        self.assertEqual(list(found), [self.second.pk])
+        with self.assertNumQueries(0):
+            self.assertIs(self.identity_map.get(scoped, self.second.pk), found[self.second.pk])
+
+        # Другой фильтр - другая область видимости.
+        with self.assertNumQueries(1):
+            self.assertIs(
+                self.identity_map.get(Group.objects.filter(name='first'), self.first.pk),
+                self.identity_map.get(Group.objects.all(), self.first.pk)
+            )
+
+    def test_discard(self):
+        obj = self.identity_map.get(Group.objects.all(), self.first.pk)
+        self.identity_map.discard(obj)
+        with self.assertNumQueries(1):
+            self.assertIsNot(self.identity_map.get(Group.objects.all(), self.first.pk), obj)
+
+    def test_invalid_pk(self):
+        with self.assertRaises(ValueError):
+            self.identity_map.get(Group.objects.all(), 'x')
+
+
+class IdentityViewTestCase(APITestCase):
+    """
+    `get_object()` с identity map.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.group = Group.objects.create(name='group')
+        self.group.permissions.add(*Permission.objects.order_by('id')[:2])
+
+    def get_view(self, base, **attrs):
+        attrs.setdefault('identity_map', True)
+        attrs.setdefault('queryset', Group.objects.all())
+        return type('View', (base,), dict(attrs, serializer_class=GroupSerializer))
+
+    def get_etag(self):
+        view = self.get_view(RestRetrieveAPIView, conditional_strategy='hash').as_view()
+        return view(self.factory.get('/'), pk=self.group.pk)['ETag']
+
+    def put(self, view_class, etag=None):
+        headers = {'HTTP_IF_MATCH': etag} if etag else {}
+        request = self.factory.put('/', {'name': 'renamed', 'permissions': []}, format='json', **headers)
+        with CaptureQueriesContext(connection) as queries:
+            response = view_class.as_view()(request, pk=self.group.pk)
+            response.render()
+        # Загрузки самой группы, без проверки уникальности имени.
+        sql = [item['sql'] for item in queries.captured_queries]
+        return response, [item for item in sql if item.startswith('SELECT "auth_group"."id"')]
+
+    def test_same_object_for_preconditions_and_update(self):
+        etag = self.get_etag()
+        objects = []
+        view_class = self.get_view(RestUpdateAPIView, conditional_strategy='hash')
+        get_object = view_class.get_object
+
+        def track(view):
+            obj = get_object(view)
+            objects.append(obj)
+            return obj
+
+        with mock.patch.object(view_class, 'get_object', track):
+            response, selects = self.put(view_class, etag)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(objects), 2)
+        self.assertIs(objects[0], objects[1])
+        self.assertEqual(len(selects), 1)
+
+        # Без identity map объект загружается дважды.
+        self.group.name = 'group'
+        self.group.save()
+        view_class = self.get_view(RestUpdateAPIView, conditional_strategy='hash', identity_map=False)
+        response, selects = self.put(view_class, self.get_etag())
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(len(selects), 2)
+
+    def test_objects_are_per_request(self):
+        view_class = self.get_view(RestUpdateAPIView)
+        self.put(view_class)
+        # Запомненные объекты живут в экземпляре вьюхи, класс не трогаем.
+        self.assertIsNone(view_class._identity_objects)
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.name, 'renamed')
+
+    def test_scoped_queryset_does_not_leak(self):
+        # Один запрос, две вьюхи: вторая не должна получить объект, который ей не виден.
+        request = self.factory.get('/')
+        visible = self.get_view(RestRetrieveAPIView).as_view()
+        hidden = self.get_view(RestRetrieveAPIView, queryset=Group.objects.filter(name='other')).as_view()
+        self.assertEqual(visible(request, pk=self.group.pk).status_code, 200)
+        self.assertEqual(len(get_identity_map(request)), 1)
+        self.assertEqual(hidden(request, pk=self.group.pk).status_code, 404)
+
+    def test_write_prefetch_only_with_query_plan(self):
+        for auto_query_plan in (False, True):
+            view_class = self.get_view(RestUpdateAPIView, auto_query_plan=auto_query_plan)
+            with mock.patch.object(rest, 'prefetch_related_objects', wraps=rest.prefetch_related_objects) as prefetch:
+                response, selects = self.put(view_class)
+            self.assertEqual(response.status_code, 200, response.content)
+            self.assertEqual(prefetch.called, auto_query_plan)
+            if auto_query_plan:
+                self.assertEqual(prefetch.call_args[0][1:], ('permissions',))
@@ -0,0 +1,120 @@
+"""
+Миксины сериалайзеров: закэшированные филды.
+Запуск: `django-admin test drf_auto.tests.test_mixins`.
+
+"""
+from django.contrib.auth.models import Group, Permission
+from rest_framework import serializers
+from rest_framework.test import APITestCase
+
+from ..serializers.mixins import CachedFieldsSerializerMixin, _templates
+
+
+class PermissionSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ('id', 'codename')
+
+
+class GroupSerializer(CachedFieldsSerializerMixin, serializers.ModelSerializer):
+    label = serializers.SerializerMethodField()
+    tags = serializers.ListField(child=serializers.CharField(), required=False)
+    permission_list = PermissionSerializer(source='permissions', many=True, read_only=True)
+
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'label', 'tags', 'permissions', 'permission_list')
+
+    def get_label(self, obj):
+        return obj.name.upper()
+
+
+class CachedFieldsTestCase(APITestCase):
+    """
+    Копии филдов не делят привязанное состояние ни между собой, ни с шаблоном.
+
+    """
+    def setUp(self):
+        self.first = Group.objects.create(name='first')
+        self.second = Group.objects.create(name='second')
+        self.first.permissions.add(*Permission.objects.order_by('id')[:2])
+
+    def get_template(self, serializer_class):
+        return next(template for key, template in _templates.items() if key[0] is serializer_class)
+
+    def test_fields_are_copies(self):
+        first, second = GroupSerializer(self.first), GroupSerializer(self.second)
+        self.assertEqual(list(first.fields), list(second.fields))
+        template = self.get_template(GroupSerializer)
+        for name, field in first.fields.items():
+            self.assertIsNot(field, second.fields[name])
+            self.assertIsNot(field, template[name])
+            self.assertIs(field.parent, first)
+            self.assertIs(second.fields[name].parent, second)
+            # Шаблон никогда не привязывается.
+            self.assertIsNone(template[name].field_name)
+            self.assertIsNone(template[name].parent)
+
+    def test_output(self):
+        first, second = GroupSerializer(self.first).data, GroupSerializer(self.second).data
+        self.assertEqual(first['label'], 'FIRST')
+        self.assertEqual(second['label'], 'SECOND')
+        self.assertEqual(len(first['permission_list']), 2)
+        self.assertEqual(second['permission_list'], [])
+        self.assertEqual(GroupSerializer([self.first, self.second], many=True).data[1]['label'], 'SECOND')
+
+    def test_method_name(self):
+        first = GroupSerializer(self.first)
+        self.assertEqual(first.fields['label'].method_name, 'get_label')
+        # `bind` задает method_name копии, а не шаблону.
+        self.assertIsNone(self.get_template(GroupSerializer)['label'].method_name)
+
+    def test_validators(self):
+        first, second = GroupSerializer(self.first), GroupSerializer(self.second)
+        first_validators = first.fields['name'].validators
+        second_validators = second.fields['name'].validators
+        self.assertTrue(first_validators)
+        self.assertIsNot(first_validators, second_validators)
+        for first_validator, second_validator in zip(first_validators, second_validators):
+            # Валидаторы со `set_context` (старые версии DRF) хранят instance, у каждой копии свой.
+            if hasattr(first_validator, 'set_context'):
+                self.assertIsNot(first_validator, second_validator)
+
+        first_validators.append(lambda value: None)
+        self.assertEqual(len(GroupSerializer(self.second).fields['name'].validators), len(second_validators))
+
+    def test_unique_validation_per_instance(self):
+        first = GroupSerializer(self.first, data={'name': 'first'}, partial=True)
+        second = GroupSerializer(self.second, data={'name': 'first'}, partial=True)
+        # Оба сериалайзера построены до валидации, instance у каждого свой.
+        self.assertTrue(first.fields and second.fields)
+        self.assertFalse(second.is_valid())
+        self.assertTrue(first.is_valid(), first.errors)
+        self.assertIn('name', second.errors)
+
+    def test_nested_children(self):
+        first, second = GroupSerializer(self.first), GroupSerializer(self.second)
+
+        tags, other_tags = first.fields['tags'], second.fields['tags']
+        self.assertIsNot(tags.child, other_tags.child)
+        self.assertIs(tags.child.parent, tags)
+        self.assertIs(other_tags.child.parent, other_tags)
+
+        permissions, other_permissions = first.fields['permissions'], second.fields['permissions']
+        self.assertIsNot(permissions.child_relation, other_permissions.child_relation)
+        self.assertIs(permissions.child_relation.parent, permissions)
+
+        nested, other_nested = first.fields['permission_list'], second.fields['permission_list']
+        self.assertIsNot(nested.child, other_nested.child)
+        self.assertIs(nested.child.parent, nested)
+        self.assertIs(nested.parent, first)
+        self.assertIs(nested.child.fields['codename'].parent, nested.child)
+        self.assertIsNot(nested.child.fields['codename'], other_nested.child.fields['codename'])
+
+    def test_input(self):
+        serializer = GroupSerializer(data={'name': 'third', 'tags': ['a'], 'permissions': []})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['tags'], ['a'])
+        serializer = GroupSerializer(data={'name': 'fourth', 'tags': 'a', 'permissions': []})
+        self.assertFalse(serializer.is_valid())
+        self.assertIn('tags', serializer.errors)
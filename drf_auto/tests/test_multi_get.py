@@ -0,0 +1,103 @@
+"""
+Получение нескольких объектов по списку pk: `?ids=1,5,10-20`.
+Запуск: `django-admin test drf_auto.tests.test_multi_get`.
+
+"""
+import json
+
+from django.contrib.auth.models import Group, User
+from django.core.cache import caches
+from rest_framework import permissions, serializers
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from ..cache import CachePolicy
+from ..views.rest import RestListAPIView, RestRetrieveAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class IsGroupMember(permissions.BasePermission):
+    """
+    Группу видят только ее участники.
+
+    """
+    def has_object_permission(self, request, view, obj):
+        return request.user.groups.filter(pk=obj.pk).exists()
+
+
+class MultiGetTestCase(APITestCase):
+    """
+    Порядок, не найденные pk и права на объекты.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        caches['default'].clear()
+        self.groups = [Group.objects.create(name=str(index)) for index in range(5)]
+        self.user = User.objects.create(username='user')
+
+    def get(self, url, base=RestListAPIView, user=None, kwargs=None, **attrs):
+        attrs.setdefault('multi_get', True)
+        view = type('View', (base,), dict(
+            attrs, queryset=Group.objects.order_by('id'), serializer_class=GroupSerializer, pagination_class=None
+        )).as_view()
+        request = self.factory.get(url)
+        force_authenticate(request, user or self.user)
+        response = view(request, **(kwargs or {}))
+        response.render()
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def pks(self, *indexes):
+        return [self.groups[index].pk for index in indexes]
+
+    def test_order_and_missing(self):
+        first, last = self.groups[0].pk, self.groups[-1].pk
+        url = '/?ids={},{}-{},{},0'.format(last, first, first + 1, last)
+        status, data = self.get(url)
+        self.assertEqual(status, 200, data)
+        self.assertEqual([item['id'] for item in data['results']], self.pks(4, 0, 1))
+        self.assertEqual(data['missing'], [0])
+
+    def test_filtered_queryset(self):
+        url = '/?ids={}'.format(','.join(str(pk) for pk in self.pks(0, 1, 2)))
+        status, data = self.get(url, get_queryset=lambda view: Group.objects.filter(pk=self.groups[1].pk))
+        self.assertEqual([item['id'] for item in data['results']], self.pks(1))
+        self.assertEqual(data['missing'], self.pks(0, 2))
+
+    def test_invalid_ids(self):
+        status, data = self.get('/?ids=1,x')
+        self.assertEqual(status, 400)
+        status, data = self.get('/?ids=1-5', multi_get_max_ids=3)
+        self.assertEqual(status, 400)
+
+    def test_disabled(self):
+        status, data = self.get('/?ids={}'.format(self.groups[0].pk), multi_get=False)
+        self.assertEqual(len(data), 5)
+
+    def test_object_permissions(self):
+        self.user.groups.add(self.groups[1], self.groups[3])
+        url = '/?ids={}'.format(','.join(str(pk) for pk in self.pks(0, 1, 2, 3)))
+        status, data = self.get(url, permission_classes=[IsGroupMember])
+        self.assertEqual(status, 200, data)
+        self.assertEqual([item['id'] for item in data['results']], self.pks(1, 3))
+        # Объекты без прав неотличимы от не найденных.
+        self.assertEqual(data['missing'], self.pks(0, 2))
+
+    def test_object_permissions_cached_per_user(self):
+        self.user.groups.add(self.groups[0])
+        stranger = User.objects.create(username='stranger')
+        url = '/?ids={}'.format(self.groups[0].pk)
+        attrs = dict(permission_classes=[IsGroupMember], cache_policy=CachePolicy(timeout=60))
+        self.assertEqual(len(self.get(url, **attrs)[1]['results']), 1)
+        self.assertEqual(len(self.get(url, user=stranger, **attrs)[1]['results']), 0)
+
+    def test_not_on_detail_view(self):
+        # Детальная вьюха отдает объект из URL, а не список из `?ids=`.
+        url = '/?ids={}'.format(','.join(str(pk) for pk in self.pks(1, 2)))
+        status, data = self.get(url, base=RestRetrieveAPIView, kwargs={'pk': self.groups[0].pk})
+        self.assertEqual(status, 200, data)
+        self.assertEqual(data, {'id': self.groups[0].pk, 'name': '0'})
@@ -0,0 +1,151 @@
+"""
+Стратегии подсчета количества объектов при пагинации.
+Запуск: `django-admin test drf_auto.tests.test_pagination`.
+
+"""
+import json
+
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from django.core.paginator import Paginator
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import pagination, serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..pagination import CountedQuerySet, ExactCountStrategy, HasNextPagination, get_count_strategy
+from ..views.rest import RestListAPIView
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class PageNumberPagination(pagination.PageNumberPagination):
+    page_size = 2
+    page_size_query_param = 'page_size'
+
+
+class LimitOffsetPagination(pagination.LimitOffsetPagination):
+    default_limit = 2
+
+
+class CountStrategyTestCase(APITestCase):
+    """
+    Подсчет количества через стратегии вьюхи.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        caches['default'].clear()
+        for index in range(5):
+            Group.objects.create(name='group{}'.format(index))
+
+    def get(self, count_strategy, pagination_class=PageNumberPagination, url='/'):
+        """
+        Запрос списка.
+
+        :return: Данные ответа и SQL запросы.
+        :rtype: tuple
+
+        """
+        view = type('View', (RestListAPIView,), dict(
+            queryset=Group.objects.order_by('id'), serializer_class=GroupSerializer,
+            pagination_class=pagination_class, count_strategy=count_strategy
+        )).as_view()
+        with CaptureQueriesContext(connection) as queries:
+            response = view(self.factory.get(url))
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content.decode('utf-8'))
+        return data.get('data', data), [item['sql'] for item in queries.captured_queries]
+
+    @staticmethod
+    def count_queries(queries):
+        return len([sql for sql in queries if 'COUNT(' in sql.upper()])
+
+    def test_get_count_strategy(self):
+        self.assertIsInstance(get_count_strategy('exact'), ExactCountStrategy)
+        strategy = ExactCountStrategy()
+        self.assertIs(get_count_strategy(strategy), strategy)
+
+    def test_exact(self):
+        data, queries = self.get('exact')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(len(data['results']), 2)
+        self.assertEqual(self.count_queries(queries), 1)
+
+    def test_cached(self):
+        data, queries = self.get('cached')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(self.count_queries(queries), 1)
+
+        # Количество берется из кэша, даже если объектов стало больше.
+        Group.objects.create(name='new')
+        data, queries = self.get('cached')
+        self.assertEqual(data['count'], 5)
+        self.assertEqual(self.count_queries(queries), 0)
+
+    def test_estimated_falls_back_to_exact(self):
+        data, queries = self.get('estimated')
+        self.assertEqual(data['count'], 5)
+        if connection.vendor != 'postgresql':
+            self.assertEqual(self.count_queries(queries), 1)
+
+    def test_has_next_page_number(self):
+        data, queries = self.get('has_next')
+        self.assertNotIn('count', data)
+        self.assertTrue(data['has_next'])
+        self.assertIn('page=2', data['next'])
+        self.assertIsNone(data['previous'])
+        self.assertEqual([item['name'] for item in data['results']], ['group0', 'group1'])
+        self.assertEqual(self.count_queries(queries), 0)
+
+        data, queries = self.get('has_next', url='/?page=3')
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+        self.assertIn('page=2', data['previous'])
+        self.assertEqual([item['name'] for item in data['results']], ['group4'])
+
+        data, queries = self.get('has_next', url='/?page_size=5')
+        self.assertFalse(data['has_next'])
+        self.assertEqual(len(data['results']), 5)
+
+    def test_has_next_limit_offset(self):
+        data, queries = self.get('has_next', LimitOffsetPagination, url='/?limit=2&offset=2')
+        self.assertTrue(data['has_next'])
+        self.assertEqual([item['name'] for item in data['results']], ['group2', 'group3'])
+        self.assertIn('limit=2', data['next'])
+        self.assertIn('offset=4', data['next'])
+        self.assertIn('limit=2', data['previous'])
+        self.assertNotIn('offset', data['previous'])
+        self.assertEqual(self.count_queries(queries), 0)
+
+        data, queries = self.get('has_next', LimitOffsetPagination, url='/?limit=3&offset=3')
+        self.assertFalse(data['has_next'])
+        self.assertIsNone(data['next'])
+        self.assertEqual(data['previous'], 'http://testserver/?limit=3')
+        self.assertEqual([item['name'] for item in data['results']], ['group3', 'group4'])
+
+    def test_has_next_paginator(self):
+        paginator = get_count_strategy('has_next').get_paginator(LimitOffsetPagination())
+        self.assertIsInstance(paginator, HasNextPagination)
+        self.assertEqual(paginator.limit_query_param, 'limit')
+        self.assertEqual(paginator.offset_query_param, 'offset')
+        self.assertEqual(paginator.page_size, 2)
+
+    def test_counted_queryset(self):
+        queryset = Group.objects.order_by('id')
+        counted = ExactCountStrategy().prepare_queryset(queryset)
+        self.assertIsInstance(counted, CountedQuerySet)
+        self.assertIs(counted.model, Group)
+        self.assertTrue(counted.ordered)
+        with self.assertNumQueries(1):
+            self.assertEqual(counted.count(), 5)
+
+        page = Paginator(counted, 2).page(3)
+        self.assertEqual([group.name for group in page], ['group4'])
+        self.assertEqual(page.paginator.count, 5)
+        self.assertEqual(ExactCountStrategy().prepare_queryset([1, 2]), [1, 2])
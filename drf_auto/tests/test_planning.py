@@ -0,0 +1,107 @@
+"""
+План запроса по сериалайзеру ответа: select_related, prefetch_related и only.
+Запуск: `django-admin test drf_auto.tests.test_planning`.
+
+"""
+from unittest import mock
+
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .. import planning
+from ..planning import get_query_plan
+from ..settings import DefaultSettings
+from ..views.rest import RestListAPIView
+
+
+class ContentTypeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ContentType
+        fields = ('id', 'app_label')
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    content_type = ContentTypeSerializer()
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'codename', 'content_type')
+
+
+class ShortPermissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ('id', 'codename')
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    permissions = ShortPermissionSerializer(many=True)
+
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class QueryPlanTestCase(APITestCase):
+    """
+    Количество запросов списка с планом и без него.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        permissions = list(Permission.objects.filter(content_type__app_label='auth'))
+        self.assertGreater(len(permissions), 2)
+        for index in range(3):
+            Group.objects.create(name='group{}'.format(index)).permissions.set(permissions)
+
+    def get(self, serializer_class, queryset, num_queries, auto_query_plan):
+        view = type('View', (RestListAPIView,), dict(
+            queryset=queryset, serializer_class=serializer_class, pagination_class=None,
+            auto_query_plan=auto_query_plan
+        )).as_view()
+        with self.assertNumQueries(num_queries):
+            response = view(self.factory.get('/'))
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.content
+
+    def test_select_related(self):
+        queryset = Permission.objects.filter(content_type__app_label='auth')
+        count = queryset.count()
+        without_plan = self.get(PermissionSerializer, queryset, 1 + count, False)
+        with_plan = self.get(PermissionSerializer, queryset, 1, True)
+        self.assertEqual(with_plan, without_plan)
+
+    def test_prefetch_related(self):
+        queryset = Group.objects.order_by('id')
+        without_plan = self.get(GroupSerializer, queryset, 1 + 3, False)
+        with_plan = self.get(GroupSerializer, queryset, 2, True)
+        self.assertEqual(with_plan, without_plan)
+
+    def test_plan(self):
+        plan = get_query_plan(PermissionSerializer, Permission)
+        self.assertEqual(plan.select_related, ['content_type'])
+        self.assertEqual(plan.prefetch_related, [])
+        self.assertEqual(plan.only, ['codename', 'content_type', 'content_type__app_label', 'content_type__id', 'id'])
+
+        plan = get_query_plan(GroupSerializer, Group)
+        self.assertEqual(plan.select_related, [])
+        self.assertEqual(plan.prefetch_related, ['permissions'])
+        self.assertEqual(plan.only, ['id', 'name'])
+
+        plan = get_query_plan(PermissionSerializer, Permission, fields=['id'])
+        self.assertEqual(plan.select_related, [])
+        self.assertEqual(plan.only, ['id'])
+
+    def test_cache_is_bounded(self):
+        with mock.patch.object(planning, '_cached_plan', None), \
+                mock.patch.object(DefaultSettings.AUTO_REST.QUERY_PLAN, 'CACHE_SIZE', 2):
+            plan = get_query_plan(PermissionSerializer, Permission, fields=['id', 'codename'])
+            self.assertIs(get_query_plan(PermissionSerializer, Permission, fields=('codename', 'id')), plan)
+            for fields in (['id'], ['codename'], ['content_type']):
+                get_query_plan(PermissionSerializer, Permission, fields=fields)
+            info = planning._cached_plan.cache_info()
+            self.assertEqual(info.maxsize, 2)
+            self.assertEqual(info.currsize, 2)
@@ -0,0 +1,125 @@
+"""
+Быстрый JSON рендерер отдает те же байты, что и DRF.
+Запуск: `django-admin test drf_auto.tests.test_renderers`.
+
+"""
+import datetime
+import decimal
+import unittest
+import uuid
+from unittest import mock
+
+from django.test import SimpleTestCase
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from ..encoders import contains_floats, orjson
+from ..renderers import FastJSONRenderer
+
+
+class Vector(object):
+    """
+    Объект, который DRF кодирует через `tolist`, как массив numpy.
+
+    """
+    def __init__(self, *items):
+        self.items = items
+
+    def tolist(self):
+        return list(self.items)
+
+
+def get_payload():
+    utc = datetime.timezone.utc
+    msk = datetime.timezone(datetime.timedelta(hours=3))
+    return {
+        'id': 10,
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'created': datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=utc),
+        'updated': datetime.datetime(2020, 1, 2, 3, 4, 5, tzinfo=msk),
+        'naive': datetime.datetime(2020, 1, 2, 3, 4, 5, 6),
+        'published': datetime.date(2020, 1, 2),
+        'starts': datetime.time(12, 30, 15, 123456),
+        'duration': datetime.timedelta(hours=1, seconds=1),
+        # Decimal из сериалайзера по дефолту строка: в ней есть `.`, но это не float.
+        'price': '12.50',
+        'version': 'v2.0',
+        'exponent': '1e5',
+        'status': gettext_lazy('Active'),
+        'tags': ['a', 'b', 1, True, None],
+        'nested': [{'price': '0.10', 'uuid': uuid.UUID(int=1)}],
+        'vector': Vector(1, 2),
+    }
+
+
+class FastJSONRendererTestCase(SimpleTestCase):
+    """
+    Быстрый путь без float и откат на DRF с ним.
+
+    """
+    backend = 'orjson'
+
+    def setUp(self):
+        if self.backend == 'orjson' and orjson is None:
+            raise unittest.SkipTest('orjson не установлен.')
+
+    def render(self, data):
+        """
+        :return: JSON и был ли он отрендерен DRF.
+        :rtype: tuple
+
+        """
+        renderer = type('Renderer', (FastJSONRenderer,), {'backend': self.backend})()
+        with mock.patch.object(JSONRenderer, 'render', autospec=True, side_effect=JSONRenderer.render) as render:
+            content = renderer.render(data)
+        return content, render.called
+
+    def test_fast_path(self):
+        data = get_payload()
+        content, fallback = self.render(data)
+        self.assertFalse(fallback)
+        self.assertEqual(content, JSONRenderer().render(data))
+        self.assertIn(b'"price":"12.50"', content)
+        self.assertIn(b'"created":"2020-01-02T03:04:05.123456Z"', content)
+
+    def test_floats_fall_back(self):
+        payloads = [
+            {'rating': 1e20},
+            {'price': decimal.Decimal('12.50')},
+            {'nested': [{'rating': 0.1}]},
+            {1.5: 'key'},
+            {'vector': Vector(1, 1e-7)},
+        ]
+        for data in payloads:
+            content, fallback = self.render(data)
+            self.assertTrue(fallback, data)
+            self.assertEqual(content, JSONRenderer().render(data))
+
+    def test_nan(self):
+        for value in (float('nan'), float('inf')):
+            with self.assertRaises(ValueError):
+                self.render({'rating': value})
+
+
+class JSONBackendRendererTestCase(FastJSONRendererTestCase):
+    """
+    Стандартный json пишет float так же, как DRF, отката нет.
+
+    """
+    backend = 'json'
+
+    def test_floats_fall_back(self):
+        for data in ({'rating': 1e20}, {'price': decimal.Decimal('12.50')}, {1.5: 'key'}):
+            content, fallback = self.render(data)
+            self.assertFalse(fallback)
+            self.assertEqual(content, JSONRenderer().render(data))
+
+
+class ContainsFloatsTestCase(SimpleTestCase):
+    def test_contains_floats(self):
+        self.assertFalse(contains_floats(get_payload()))
+        self.assertFalse(contains_floats(['1.5', 'NaN', 'Infinity', (1, True)]))
+        self.assertTrue(contains_floats([1, (2, 3.0)]))
+        self.assertTrue(contains_floats({'a': {'b': decimal.Decimal('1')}}))
+        self.assertTrue(contains_floats({0.5: None}))
+        self.assertTrue(contains_floats({'a': Vector(0.5)}))
@@ -0,0 +1,124 @@
+"""
+Представление объекта в ответе должно вычисляться один раз за запрос: для ETag, кэша, заголовков и тела.
+Запуск: `django-admin test drf_auto.tests.test_response_once`.
+
+"""
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..cache import CachePolicy
+from ..views.rest import RestCreateAPIView, RestRetrieveAPIView, RestUpdateAPIView
+
+
+class CountingGroupSerializer(serializers.ModelSerializer):
+    """
+    Сериалайзер, который считает вызовы `to_representation`.
+
+    """
+    calls = 0
+
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+    def to_representation(self, instance):
+        CountingGroupSerializer.calls += 1
+        return super().to_representation(instance)
+
+
+class OtherGroupSerializer(CountingGroupSerializer):
+    """
+    Сериалайзер ответа другого класса, чем сериалайзер запроса.
+
+    """
+    class Meta(CountingGroupSerializer.Meta):
+        fields = ('name',)
+
+
+class ResponseOnceTestCase(APITestCase):
+    """
+    Считает серилизации объекта за один запрос.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.group = Group.objects.create(name='group')
+        caches['default'].clear()
+        CountingGroupSerializer.calls = 0
+
+    def get_view(self, base, **attrs):
+        attrs.setdefault('serializer_class', CountingGroupSerializer)
+        return type('View', (base,), dict(attrs, queryset=Group.objects.all())).as_view()
+
+    def call(self, view, request):
+        """
+        Выполняет запрос и рендерит ответ.
+
+        :return: Ответ и сколько раз за запрос вызывался `to_representation`.
+        :rtype: tuple
+
+        """
+        CountingGroupSerializer.calls = 0
+        response = view(request, pk=self.group.pk)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response, CountingGroupSerializer.calls
+
+    def test_retrieve(self):
+        response, calls = self.call(self.get_view(RestRetrieveAPIView), self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, 1)
+
+    def test_retrieve_hash_etag(self):
+        view = self.get_view(RestRetrieveAPIView, conditional_strategy='hash')
+        response, calls = self.call(view, self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.get('ETag'))
+        self.assertEqual(calls, 1)
+
+        # Хэш считается по данным, поэтому без серилизации не обойтись, но рендеринга уже нет.
+        response, calls = self.call(view, self.factory.get('/', HTTP_IF_NONE_MATCH=response['ETag']))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(calls, 1)
+
+    def test_retrieve_cache(self):
+        view = self.get_view(RestRetrieveAPIView, cache_policy=CachePolicy(timeout=60))
+        first, calls = self.call(view, self.factory.get('/'))
+        self.assertEqual(calls, 1)
+
+        second, calls = self.call(view, self.factory.get('/'))
+        self.assertEqual(calls, 0)
+        self.assertEqual(second.content, first.content)
+
+    def test_retrieve_hash_etag_and_cache(self):
+        view = self.get_view(RestRetrieveAPIView, conditional_strategy='hash', cache_policy=CachePolicy(timeout=60))
+        first, calls = self.call(view, self.factory.get('/'))
+        self.assertEqual(calls, 1)
+
+        # ETag лежит в кэше вместе с ответом, поэтому и 304 отдается без серилизации.
+        response, calls = self.call(view, self.factory.get('/', HTTP_IF_NONE_MATCH=first['ETag']))
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(calls, 0)
+
+    def test_create(self):
+        view = self.get_view(RestCreateAPIView)
+        response, calls = self.call(view, self.factory.post('/', {'name': 'new'}, format='json'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(calls, 1)
+
+    def test_create_other_response_serializer(self):
+        view = self.get_view(RestCreateAPIView, serializer_class=None, serializer_classes={
+            'post': {'in': CountingGroupSerializer, 'out': OtherGroupSerializer}
+        })
+        response, calls = self.call(view, self.factory.post('/', {'name': 'new'}, format='json'))
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(calls, 1)
+
+    def test_update(self):
+        view = self.get_view(RestUpdateAPIView)
+        response, calls = self.call(view, self.factory.put('/', {'name': 'renamed'}, format='json'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(calls, 1)
+        self.assertIn(b'renamed', response.content)
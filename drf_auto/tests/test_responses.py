@@ -0,0 +1,157 @@
+"""
+Уже закодированные ответы отдаются как есть.
+Запуск: `django-admin test drf_auto.tests.test_responses`.
+
+"""
+import json
+
+from django.contrib.auth.models import Group
+from django.core.cache import caches
+from rest_framework import renderers, serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..cache import CachePolicy
+from ..responses import EncodedResponse, PreEncoded, splice_encoded, to_bytes
+from ..views.rest import RestAPIView, RestListAPIView
+
+
+BODY = '{"name":"книга","tags":[1,2]}'.encode('utf-8')
+
+
+class TextRenderer(renderers.BaseRenderer):
+    """
+    Рендерер другого формата: закодированный JSON для него приходится разбирать.
+
+    """
+    media_type = 'text/plain'
+    format = 'txt'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return repr(sorted(data.items())).encode('utf-8')
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class PreEncodedTestCase(APITestCase):
+    """
+    Тело, заголовки и выбор рендерера для закодированных данных.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def call(self, data, accept=None, fail=False, **attrs):
+        def get(view, request, *args, **kwargs):
+            if fail:
+                return view.fail(status=400, data=data)
+            return view.get_response(code=200, data=data)
+
+        attrs.setdefault('renderer_classes', (renderers.JSONRenderer, TextRenderer))
+        view = type('View', (RestAPIView,), dict(attrs, get=get)).as_view()
+        headers = {'HTTP_ACCEPT': accept} if accept else {}
+        response = view(self.factory.get('/', **headers))
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    def test_passthrough(self):
+        chunks = [BODY[:10], BODY[10:]]
+        cases = [BODY, bytearray(BODY), memoryview(BODY), PreEncoded(BODY), PreEncoded(iter(chunks))]
+        for data in cases:
+            response = self.call(data)
+            self.assertIsInstance(response, EncodedResponse, type(data))
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.content, BODY)
+            self.assertEqual(response['Content-Type'], 'application/json')
+
+    def test_chunks_are_not_copied(self):
+        response = self.call(memoryview(BODY))
+        self.assertIs(response._container[0], BODY)
+        self.assertIs(to_bytes(memoryview(BODY)), BODY)
+        self.assertEqual(to_bytes(memoryview(BODY)[1:]), BODY[1:])
+
+    def test_other_format(self):
+        response = self.call(PreEncoded(BODY), accept='text/plain')
+        self.assertNotIsInstance(response, EncodedResponse)
+        self.assertEqual(response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(response.content, repr(sorted(json.loads(BODY.decode('utf-8')).items())).encode('utf-8'))
+
+    def test_envelope(self):
+        response = self.call(PreEncoded(BODY), fail=True)
+        self.assertIsInstance(response, EncodedResponse)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual(data['code'], 400)
+        self.assertEqual(data['data'], json.loads(BODY.decode('utf-8')))
+        self.assertIn(BODY, response.content)
+
+        response = self.call(PreEncoded(BODY), accept='text/plain', fail=True)
+        self.assertEqual(response.status_code, 400)
+        self.assertIn(b"'data', {'name'", response.content)
+
+    def test_splice(self):
+        envelope = {'a': PreEncoded([b'[1,', b'2]']), 'b': 'text', 'c': memoryview(b'{"d":null}')}
+        chunks = splice_encoded(envelope, renderers.JSONRenderer())
+        self.assertIn(b'[1,', chunks)
+        content = b''.join(chunks)
+        self.assertEqual(json.loads(content.decode('utf-8')), {'a': [1, 2], 'b': 'text', 'c': {'d': None}})
+
+
+class PreEncodedCacheTestCase(APITestCase):
+    """
+    Закодированный ответ из кэша отдается с теми же байтами и Content-Type.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        caches['default'].clear()
+        self.calls = []
+
+    def get_view(self, **attrs):
+        calls = self.calls
+
+        def list(view, request, *args, **kwargs):
+            calls.append(1)
+            return view.get_response(code=200, data=PreEncoded(iter([b'[', BODY, b']'])))
+
+        attrs.setdefault('renderer_classes', (renderers.JSONRenderer, TextRenderer))
+        return type('View', (RestListAPIView,), dict(
+            attrs, list=list, queryset=Group.objects.all(), serializer_class=GroupSerializer,
+            cache_policy=CachePolicy(timeout=60)
+        )).as_view()
+
+    def call(self, view, accept=None):
+        headers = {'HTTP_ACCEPT': accept} if accept else {}
+        response = view(self.factory.get('/', **headers))
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    def test_cached(self):
+        view = self.get_view()
+        first = self.call(view)
+        second = self.call(view)
+        self.assertEqual(len(self.calls), 1)
+        self.assertEqual(first.content, b'[' + BODY + b']')
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['Content-Type'], 'application/json')
+        self.assertEqual(second['Content-Type'], first['Content-Type'])
+
+    def test_cached_per_format(self):
+        view = self.get_view(renderer_classes=(renderers.JSONRenderer, type(
+            'ListTextRenderer', (TextRenderer,), {'render': lambda self, data, *args: repr(data).encode('utf-8')}
+        )))
+        self.assertEqual(self.call(view)['Content-Type'], 'application/json')
+        text = self.call(view, accept='text/plain')
+        self.assertEqual(text['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(len(self.calls), 2)
+        # Из кэша каждый формат отдается со своим Content-Type.
+        self.assertEqual(self.call(view)['Content-Type'], 'application/json')
+        self.assertEqual(self.call(view, accept='text/plain')['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertEqual(len(self.calls), 2)
@@ -0,0 +1,194 @@
+"""
+Схлопывание одинаковых одновременных запросов (single-flight).
+Запуск: `django-admin test drf_auto.tests.test_singleflight`.
+
+"""
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth.models import Group, User
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+
+from ..singleflight import SingleFlight, single_flight
+from ..views.rest import RestListAPIView
+
+
+class SingleFlightTestCase(SimpleTestCase):
+    """
+    Ведущее вычисление и ожидающие его вызовы.
+
+    """
+    def run_followers(self, group, func, count=3, timeout=5):
+        """
+        Запускает вызовы с тем же ключом, пока ведущее вычисление еще идет.
+
+        :return: Потоки и список, куда они пишут результаты.
+        :rtype: tuple
+
+        """
+        results = []
+
+        def follower():
+            try:
+                results.append(group.do('key', func, timeout))
+            except Exception as e:
+                results.append(e)
+
+        threads = [threading.Thread(target=follower) for _ in range(count)]
+        for thread in threads:
+            thread.start()
+        # Даем ожидающим дойти до ожидания.
+        time.sleep(0.2)
+        return threads, results
+
+    def test_followers_share_leader_result(self):
+        group = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return 'value'
+
+        leader_result = []
+        leader = threading.Thread(target=lambda: leader_result.append(group.do('key', compute)))
+        leader.start()
+        self.assertTrue(started.wait(5))
+        threads, results = self.run_followers(group, compute)
+        release.set()
+        for thread in threads + [leader]:
+            thread.join(5)
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(leader_result, [('value', False)])
+        self.assertEqual(results, [('value', True)] * 3)
+        # После завершения ключ освобождается, следующий вызов вычисляет заново.
+        self.assertEqual(group.do('key', lambda: 'next'), ('next', False))
+
+    def test_leader_failure(self):
+        group = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def fail():
+            started.set()
+            release.wait(5)
+            raise RuntimeError('boom')
+
+        errors = []
+
+        def leader():
+            try:
+                group.do('key', fail)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        self.assertTrue(started.wait(5))
+        threads, results = self.run_followers(group, lambda: 'own', count=2)
+        release.set()
+        for item in threads + [thread]:
+            item.join(5)
+
+        self.assertEqual(len(errors), 1)
+        # Ожидающие не получают чужую ошибку, а считают сами.
+        self.assertEqual(results, [('own', False)] * 2)
+
+    def test_timeout(self):
+        group = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def slow():
+            started.set()
+            release.wait(5)
+            return 'slow'
+
+        thread = threading.Thread(target=lambda: group.do('key', slow))
+        thread.start()
+        self.assertTrue(started.wait(5))
+        self.assertEqual(group.do('key', lambda: 'own', timeout=0.01), ('own', False))
+        release.set()
+        thread.join(5)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class SingleFlightViewTestCase(APITestCase):
+    """
+    Ключ схлопывания и ответ ожидающего запроса во вьюхе.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        Group.objects.create(name='group')
+        self.view = type('View', (RestListAPIView,), dict(
+            queryset=Group.objects.order_by('id'), serializer_class=GroupSerializer, pagination_class=None,
+            single_flight=True
+        )).as_view()
+
+    def get_key(self, url='/', user=None, token=None):
+        """
+        Ключ, с которым вьюха схлопывает запрос.
+
+        :rtype: str
+
+        """
+        keys = []
+
+        def do(key, func, timeout=None):
+            keys.append(key)
+            return func(), False
+
+        request = self.factory.get(url)
+        if user is not None:
+            force_authenticate(request, user, token)
+        with mock.patch.object(single_flight, 'do', side_effect=do):
+            self.assertEqual(self.view(request).status_code, 200)
+        self.assertEqual(len(keys), 1)
+        return keys[0]
+
+    def test_key(self):
+        first = User.objects.create(username='first')
+        second = User.objects.create(username='second')
+
+        self.assertEqual(self.get_key(), self.get_key())
+        self.assertNotEqual(self.get_key('/?a=1'), self.get_key('/?a=2'))
+        self.assertNotEqual(self.get_key(user=first), self.get_key(user=second))
+        self.assertNotEqual(self.get_key(user=first), self.get_key())
+        # Тот же пользователь с другим токеном может иметь другие права.
+        self.assertNotEqual(self.get_key(user=first, token='a'), self.get_key(user=first, token='b'))
+        self.assertEqual(self.get_key(user=first, token='a'), self.get_key(user=first, token='a'))
+
+    def test_follower_gets_copy(self):
+        results = []
+
+        def do(key, func, timeout=None):
+            value = func()
+            results.append(value[0])
+            return value, True
+
+        with mock.patch.object(single_flight, 'do', side_effect=do):
+            response = self.view(self.factory.get('/'))
+
+        leader = results[0]
+        self.assertIsNot(response, leader)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, leader.content)
+        self.assertEqual(response['Content-Type'], leader['Content-Type'])
+
+    def test_disabled(self):
+        with mock.patch.object(single_flight, 'do') as do:
+            type('View', (RestListAPIView,), dict(
+                queryset=Group.objects.all(), serializer_class=GroupSerializer, pagination_class=None,
+                single_flight=False
+            )).as_view()(self.factory.get('/'))
+        self.assertFalse(do.called)
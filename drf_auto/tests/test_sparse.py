@@ -0,0 +1,91 @@
+"""
+Выборочные филды ответа: `?fields=` и `?exclude=`.
+Запуск: `django-admin test drf_auto.tests.test_sparse`.
+
+"""
+import json
+
+from django.contrib.auth.models import Permission
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..serializers.sparse import get_sparse_projection
+from ..views.rest import RestListAPIView
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ('id', 'name', 'codename', 'content_type')
+
+
+class SparseFieldsTestCase(APITestCase):
+    """
+    Ответ и выбранные из БД колонки при выборе филдов клиентом.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def get(self, url, status_code=200, **attrs):
+        """
+        Запрос списка.
+
+        :return: Данные ответа и SQL запросы.
+        :rtype: tuple
+
+        """
+        attrs.setdefault('sparse_fields', True)
+        view = type('View', (RestListAPIView,), dict(
+            attrs, queryset=Permission.objects.order_by('id'), serializer_class=PermissionSerializer,
+            pagination_class=None
+        )).as_view()
+        with CaptureQueriesContext(connection) as queries:
+            response = view(self.factory.get(url))
+            response.render()
+        self.assertEqual(response.status_code, status_code)
+        data = json.loads(response.content.decode('utf-8'))
+        return data, [item['sql'] for item in queries.captured_queries]
+
+    def test_fields(self):
+        data, queries = self.get('/?fields=id,codename', auto_query_plan=False)
+        self.assertTrue(data)
+        self.assertEqual(set(data[0]), {'id', 'codename'})
+        self.assertEqual(len(queries), 1)
+        self.assertIn('"codename"', queries[0])
+        self.assertNotIn('"name"', queries[0])
+        self.assertNotIn('"content_type_id"', queries[0])
+
+    def test_exclude(self):
+        data, queries = self.get('/?exclude=name,codename', auto_query_plan=False)
+        self.assertEqual(set(data[0]), {'id', 'content_type'})
+        self.assertIn('"content_type_id"', queries[0])
+        self.assertNotIn('"codename"', queries[0])
+
+    def test_same_columns_with_query_plan(self):
+        data, queries = self.get('/?fields=id,codename', auto_query_plan=True)
+        self.assertEqual(set(data[0]), {'id', 'codename'})
+        self.assertNotIn('"name"', queries[0])
+
+    def test_all_fields_without_params(self):
+        data, queries = self.get('/', auto_query_plan=False)
+        self.assertEqual(set(data[0]), {'id', 'name', 'codename', 'content_type'})
+        self.assertIn('"name"', queries[0])
+
+    def test_disabled(self):
+        data, queries = self.get('/?fields=id', sparse_fields=False, auto_query_plan=False)
+        self.assertEqual(set(data[0]), {'id', 'name', 'codename', 'content_type'})
+        self.assertIn('"name"', queries[0])
+
+    def test_unknown_field(self):
+        self.get('/?fields=id,unknown', status_code=400)
+
+    def test_projection(self):
+        self.assertIsNone(get_sparse_projection(PermissionSerializer))
+        self.assertEqual(get_sparse_projection(PermissionSerializer, 'codename,id'), frozenset({'id', 'codename'}))
+        self.assertEqual(
+            get_sparse_projection(PermissionSerializer, exclude='name'), frozenset({'id', 'codename', 'content_type'})
+        )
+        self.assertEqual(get_sparse_projection(PermissionSerializer, 'id,name', 'name'), frozenset({'id'}))
@@ -0,0 +1,156 @@
+"""
+Потоковый разбор JSON массива и потоковая загрузка объектов.
+Запуск: `django-admin test drf_auto.tests.test_stream`.
+
+"""
+import io
+import json
+
+from django.contrib.auth.models import Group
+from django.test import SimpleTestCase
+from rest_framework import serializers
+from rest_framework.exceptions import ParseError
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..parsers.stream import JSONArrayStream
+from ..views.rest import RestStreamCreateAPIView
+
+
+class ReadCountingStream(io.BytesIO):
+    """
+    Поток, который помнит, сколько байт из него прочитали.
+
+    """
+    read_bytes = 0
+
+    def read(self, size=-1):
+        chunk = super().read(size)
+        self.read_bytes += len(chunk)
+        return chunk
+
+
+class JSONArrayStreamTestCase(SimpleTestCase):
+    """
+    Разбор элементов по кускам потока.
+
+    """
+    def parse(self, body, chunk_size=4, **kwargs):
+        if isinstance(body, str):
+            body = body.encode('utf-8')
+        return list(JSONArrayStream(io.BytesIO(body), chunk_size=chunk_size, **kwargs))
+
+    def test_items(self):
+        data = [1, 123456, 'строка', {'a': [1, 2, {'b': None}]}, [], True, 1.5, -7, 2e-05, 1.25e+30]
+        body = json.dumps(data, ensure_ascii=False)
+        for chunk_size in (1, 2, 3, 7, 1024):
+            self.assertEqual(self.parse(body, chunk_size), data)
+
+    def test_whitespace_and_empty(self):
+        self.assertEqual(self.parse(' \n[ ]\n '), [])
+        self.assertEqual(self.parse('[ 12 ,\n 3 ]'), [12, 3])
+
+    def test_number_at_chunk_boundary(self):
+        # `12` в первом куске - только начало `123`.
+        self.assertEqual(self.parse('[123]', chunk_size=3), [123])
+        self.assertEqual(self.parse('[1, 23]', chunk_size=5), [1, 23])
+
+    def test_malformed(self):
+        for body in ('{"a": 1}', '[1, 2', '[1 2]', '[1,]', '[1] 2', '[{"a": }]', ''):
+            with self.assertRaises(ParseError, msg=body):
+                self.parse(body)
+
+    def test_invalid_encoding(self):
+        with self.assertRaises(ParseError):
+            self.parse(b'["\xff"]')
+
+    def test_single_pass(self):
+        items = JSONArrayStream(io.BytesIO(b'[1]'))
+        self.assertEqual(list(items), [1])
+        with self.assertRaises(RuntimeError):
+            list(items)
+
+    def test_max_item_size(self):
+        self.assertEqual(self.parse('["{}"]'.format('a' * 50), max_item_size=64), ['a' * 50])
+        with self.assertRaises(ParseError):
+            self.parse('["{}"]'.format('a' * 100), max_item_size=64)
+
+    def test_malformed_item_is_not_read_to_the_end(self):
+        # Незакрытая строка не разбирается никогда: читаем не больше лимита, а не весь поток.
+        stream = ReadCountingStream(b'[1, "' + b'a' * 100000)
+        with self.assertRaises(ParseError):
+            list(JSONArrayStream(stream, chunk_size=16, max_item_size=1024))
+        self.assertLess(stream.read_bytes, 4096)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name')
+
+
+class StreamCreateTestCase(APITestCase):
+    """
+    Пачки, бюджет ошибок и транзакции потоковой загрузки.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def post(self, body, **attrs):
+        attrs.setdefault('bulk_batch_size', 2)
+        view = type('View', (RestStreamCreateAPIView,), dict(
+            attrs, queryset=Group.objects.all(), serializer_class=GroupSerializer
+        )).as_view()
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        response = view(self.factory.post('/', body, content_type='application/json'))
+        response.render()
+        return response.status_code, json.loads(response.content.decode('utf-8'))
+
+    def names(self):
+        return sorted(Group.objects.values_list('name', flat=True))
+
+    def test_create(self):
+        status, data = self.post([{'name': str(index)} for index in range(5)])
+        self.assertEqual(status, 201, data)
+        self.assertEqual(data, {'created': 5, 'errors': []})
+        self.assertEqual(self.names(), ['0', '1', '2', '3', '4'])
+
+    def test_errors_within_budget(self):
+        body = [{'name': 'a'}, {}, {'name': 'b'}, {'name': 'x' * 1000}, {'name': 'c'}]
+        status, data = self.post(body, stream_error_budget=2)
+        self.assertEqual(status, 201, data)
+        self.assertEqual(data['created'], 3)
+        self.assertEqual([item['index'] for item in data['errors']], [1, 3])
+        self.assertEqual(self.names(), ['a', 'b', 'c'])
+
+    def test_budget_exceeded_atomic(self):
+        body = [{'name': 'a'}, {'name': 'b'}, {}, {'name': 'c'}, {}]
+        status, data = self.post(body, stream_error_budget=1)
+        self.assertEqual(status, 400)
+        self.assertEqual(data['data']['created'], 0)
+        self.assertEqual(data['data']['processed'], 0)
+        self.assertEqual([item['index'] for item in data['data']['errors']], [2, 4])
+        self.assertEqual(self.names(), [])
+
+    def test_budget_exceeded_per_batch(self):
+        body = [{'name': 'a'}, {'name': 'b'}, {}, {'name': 'c'}, {}]
+        status, data = self.post(body, stream_error_budget=1, stream_atomic=False)
+        self.assertEqual(status, 400)
+        # Записаны пачки до той, в которой бюджет кончился.
+        self.assertEqual(data['data']['created'], 3)
+        self.assertEqual(data['data']['processed'], 4)
+        self.assertEqual(self.names(), ['a', 'b', 'c'])
+
+    def test_malformed_json_atomic(self):
+        status, data = self.post('[{"name": "a"}, {"name": "b"}, {"name": "c"}, {"name": }]')
+        self.assertEqual(status, 400)
+        self.assertEqual(data['data']['created'], 0)
+        self.assertEqual(self.names(), [])
+
+    def test_malformed_json_per_batch(self):
+        status, data = self.post('[{"name": "a"}, {"name": "b"}, {"name": "c"}, {"name": }]', stream_atomic=False)
+        self.assertEqual(status, 400)
+        self.assertEqual(data['data']['created'], 2)
+        self.assertEqual(data['data']['processed'], 2)
+        self.assertEqual(self.names(), ['a', 'b'])
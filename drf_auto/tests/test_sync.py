@@ -0,0 +1,205 @@
+"""
+Синхронизация списков: токены, записи об удалениях и их чистка.
+Запуск: `django-admin test drf_auto.tests.test_sync`.
+
+"""
+import datetime
+import io
+import json
+import time
+from unittest import mock
+
+from django.apps import apps
+from django.contrib.auth.models import Group, User
+from django.core.management import call_command
+from django.test import SimpleTestCase
+from django.utils import timezone
+from rest_framework import serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from .. import sync
+from ..models import Tombstone
+from ..settings import DefaultSettings
+from ..sync import SyncToken, get_changes, prune_tombstones, register_model, register_models
+from ..views.rest import RestListAPIView
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username')
+
+
+class SyncTokenTestCase(SimpleTestCase):
+    def test_round_trip(self):
+        value = datetime.datetime(2020, 1, 2, 3, 4, 5, 123456, tzinfo=datetime.timezone.utc)
+        token = SyncToken.decode(SyncToken(value, 10, 5).encode(), User, 'date_joined')
+        self.assertEqual((token.value, token.pk, token.tombstone), (value, 10, 5))
+        self.assertLessEqual(abs(token.issued - time.time()), 5)
+        # В токене нет `=` и символов, которые нужно экранировать в URL.
+        self.assertRegex(SyncToken(value, 10, 5).encode(), r'^[A-Za-z0-9_-]+$')
+
+    def test_empty(self):
+        token = SyncToken.decode('', User, 'date_joined')
+        self.assertIsNone(token.value)
+        self.assertEqual(token.tombstone, 0)
+
+    def test_invalid(self):
+        for value in ('x', SyncToken('not a date', 1).encode(), SyncToken(None, None, 'x').encode()):
+            with self.assertRaises(ValueError, msg=value):
+                SyncToken.decode(value, User, 'date_joined')
+
+    def test_expired(self):
+        week_ago = int(time.time()) - 7 * 86400
+        token = SyncToken(None, None, 1, issued=week_ago).encode()
+        self.assertEqual(SyncToken.decode(token, User, 'date_joined').tombstone, 1)
+        with mock.patch.object(DefaultSettings.AUTO_REST.SYNC, 'TOMBSTONE_TTL', 8):
+            self.assertEqual(SyncToken.decode(token, User, 'date_joined').issued, week_ago)
+        with mock.patch.object(DefaultSettings.AUTO_REST.SYNC, 'TOMBSTONE_TTL', 6):
+            with self.assertRaises(ValueError):
+                SyncToken.decode(token, User, 'date_joined')
+
+
+class TombstoneTestCase(APITestCase):
+    """
+    Удаления пишутся только для подписанных моделей.
+
+    """
+    def setUp(self):
+        # Реестр общий на процесс: подписываем модели только на время теста.
+        patcher = mock.patch.object(sync, '_registry', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_register_model(self):
+        group = Group.objects.create(name='group')
+        group.delete()
+        self.assertFalse(Tombstone.objects.exists())
+
+        register_model(Group)
+        group = Group.objects.create(name='group')
+        pk = group.pk
+        group.delete()
+        self.assertEqual(list(Tombstone.objects.values_list('model', 'object_pk')), [('auth.Group', str(pk))])
+
+        # Удаление через queryset тоже пишется: Django загружает объекты, раз на модель есть сигнал.
+        Group.objects.create(name='first')
+        Group.objects.create(name='second')
+        Group.objects.all().delete()
+        self.assertEqual(Tombstone.objects.count(), 3)
+
+        User.objects.create(username='user').delete()
+        self.assertEqual(Tombstone.objects.filter(model='auth.User').count(), 0)
+
+    def test_register_models_from_settings(self):
+        with mock.patch.object(DefaultSettings.AUTO_REST.SYNC, 'MODELS', ['auth.Group']):
+            apps.get_app_config('drf_auto').ready()
+        self.assertEqual(sync._registry, {Group})
+        Group.objects.create(name='group').delete()
+        self.assertEqual(Tombstone.objects.count(), 1)
+
+        register_models(['auth.User'])
+        self.assertEqual(sync._registry, {Group, User})
+        with self.assertRaises(LookupError):
+            register_models(['auth.Unknown'])
+
+
+class ChangesTestCase(APITestCase):
+    """
+    Изменения после токена и удаления.
+
+    """
+    def setUp(self):
+        patcher = mock.patch.object(sync, '_registry', set())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        register_model(User)
+        self.now = timezone.now()
+        self.users = [self.create_user(index) for index in range(4)]
+
+    def create_user(self, index, minutes=None):
+        date_joined = self.now + datetime.timedelta(minutes=index if minutes is None else minutes)
+        return User.objects.create(username='user{}'.format(index), date_joined=date_joined)
+
+    def changes(self, token, limit=10):
+        objects, deleted, next_token, more = get_changes(User.objects.all(), 'date_joined', token, limit)
+        return [item.pk for item in objects], deleted, next_token, more
+
+    def test_changes(self):
+        objects, deleted, token, more = self.changes(SyncToken())
+        self.assertEqual(objects, [user.pk for user in self.users])
+        self.assertEqual(deleted, [])
+        self.assertFalse(more)
+
+        # Та же версия, но pk больше - тоже изменение.
+        same_time = self.create_user(10, minutes=3)
+        self.users[1].date_joined = self.now + datetime.timedelta(minutes=10)
+        self.users[1].save()
+        deleted_pk = self.users[2].pk
+        self.users[2].delete()
+
+        objects, deleted, token, more = self.changes(SyncToken.decode(token.encode(), User, 'date_joined'))
+        self.assertEqual(objects, [same_time.pk, self.users[1].pk])
+        self.assertEqual(deleted, [deleted_pk])
+        self.assertEqual(self.changes(token)[:2], ([], []))
+
+    def test_limit(self):
+        objects, deleted, token, more = self.changes(SyncToken(), limit=3)
+        self.assertEqual(objects, [user.pk for user in self.users[:3]])
+        self.assertTrue(more)
+        objects, deleted, token, more = self.changes(token, limit=3)
+        self.assertEqual(objects, [self.users[3].pk])
+        self.assertFalse(more)
+
+    def test_deleted_before_start(self):
+        # Удаления до начала синхронизации клиенту не нужны.
+        self.users[0].delete()
+        objects, deleted, token, more = self.changes(SyncToken())
+        self.assertEqual(deleted, [])
+        self.assertEqual(token.tombstone, Tombstone.objects.get().id)
+
+    def test_view(self):
+        view = type('View', (RestListAPIView,), dict(
+            queryset=User.objects.all(), serializer_class=UserSerializer, sync_field='date_joined', sync_limit=10
+        )).as_view()
+        factory = APIRequestFactory()
+
+        response = view(factory.get('/', {'since': ''}))
+        response.render()
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual([item['id'] for item in data['changed']], [user.pk for user in self.users])
+
+        pk = self.users[0].pk
+        self.users[0].delete()
+        response = view(factory.get('/', {'since': data['token']}))
+        response.render()
+        data = json.loads(response.content.decode('utf-8'))
+        self.assertEqual((data['changed'], data['deleted'], data['more']), ([], [pk], False))
+
+        response = view(factory.get('/', {'since': 'x'}))
+        self.assertEqual(response.status_code, 400)
+
+
+class PruneTombstonesTestCase(APITestCase):
+    def setUp(self):
+        for index in range(3):
+            Tombstone.objects.create(model='auth.Group', object_pk=str(index))
+        old = timezone.now() - datetime.timedelta(days=10)
+        Tombstone.objects.filter(object_pk__in=['0', '1']).update(deleted_at=old)
+
+    def test_prune(self):
+        self.assertEqual(prune_tombstones(days=11), 0)
+        self.assertEqual(prune_tombstones(days=9), 2)
+        self.assertEqual(list(Tombstone.objects.values_list('object_pk', flat=True)), ['2'])
+
+    def test_ttl_from_settings(self):
+        # Без TTL удаления хранятся всегда.
+        self.assertEqual(prune_tombstones(), 0)
+        with mock.patch.object(DefaultSettings.AUTO_REST.SYNC, 'TOMBSTONE_TTL', 9):
+            self.assertEqual(prune_tombstones(), 2)
+
+    def test_command(self):
+        out = io.StringIO()
+        call_command('prune_tombstones', days=9, stdout=out)
+        self.assertIn('2', out.getvalue())
+        self.assertEqual(Tombstone.objects.count(), 1)
@@ -0,0 +1,290 @@
+"""
+Быстрый путь через `values_list()` и сборка JSON списка в БД (`db_json`) должны отдавать то же тело,
+что и сериалайзер с JSON рендерером DRF.
+Запуск на SQLite: `django-admin test drf_auto.tests.test_values`.
+
+"""
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import Group, Permission, User
+from django.db import connection
+from rest_framework import pagination, serializers
+from rest_framework.test import APIRequestFactory, APITestCase
+
+from ..serializers.values import ValuesPlan, build_values_plan
+from ..settings import DefaultSettings
+from ..views.rest import RestListAPIView
+
+
+# Строки, которые БД и DRF могут экранировать по-разному.
+TRICKY_STRINGS = [
+    'обычная строка',
+    'кавычки " и обратный слэш \\ и слэш /',
+    'перевод\nстроки\tтаб\rвозврат\x08\x0c',
+    'управляющие \x01\x1f и \x7f',
+    'разделители \u2028 строк \u2029 абзацев',
+    'эмодзи \U0001F600 и ё',
+    '',
+]
+
+
+class UserSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'first_name', 'is_staff', 'is_active')
+
+
+class PermissionSerializer(serializers.ModelSerializer):
+    code = serializers.CharField(source='codename')
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'name', 'code', 'content_type')
+
+
+class DateSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'date_joined')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Проверяется сборка JSON в SQLite.')
+@skipUnless(settings.AUTH_USER_MODEL == 'auth.User', 'Нужна стандартная модель пользователя.')
+class DBJsonTestCase(APITestCase):
+    """
+    Сравнивает тело ответа `db_json` с обычным путем.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        for index, value in enumerate(TRICKY_STRINGS):
+            User.objects.create(
+                username='user{}'.format(index), first_name=value, is_staff=bool(index % 2), is_active=index % 3 != 0
+            )
+
+    def get_content(self, serializer_class, queryset, db_json, **attrs):
+        """
+        Ответ списка.
+
+        :return: Тело ответа и был ли он собран в БД.
+        :rtype: tuple
+
+        """
+        attrs.setdefault('pagination_class', None)
+        view = type('View', (RestListAPIView,), dict(
+            attrs, queryset=queryset, serializer_class=serializer_class, db_json=db_json
+        )).as_view()
+        response = view(self.factory.get('/'))
+        self.assertEqual(response.status_code, 200)
+        if response.streaming:
+            return b''.join(response.streaming_content), True
+        if hasattr(response, 'render'):
+            response.render()
+        return response.content, False
+
+    def assertSameContent(self, serializer_class, queryset, **attrs):
+        expected, from_db = self.get_content(serializer_class, queryset, False, **attrs)
+        self.assertFalse(from_db)
+        content, from_db = self.get_content(serializer_class, queryset, True, **attrs)
+        self.assertEqual(content, expected)
+        return content, from_db
+
+    def test_strings(self):
+        content, from_db = self.assertSameContent(UserSerializer, User.objects.order_by('id'))
+        self.assertTrue(from_db)
+        self.assertIn(b'\\u2028', content)
+        self.assertNotIn('\u2028'.encode('utf-8'), content)
+
+    def test_booleans(self):
+        content, from_db = self.assertSameContent(UserSerializer, User.objects.order_by('-id'))
+        self.assertTrue(from_db)
+        self.assertIn(b'"is_staff":true', content)
+        self.assertIn(b'"is_active":false', content)
+
+    def test_foreign_key_and_sources(self):
+        content, from_db = self.assertSameContent(PermissionSerializer, Permission.objects.order_by('id'))
+        self.assertTrue(from_db)
+        self.assertIn(b'"content_type":', content)
+
+    def test_chunks(self):
+        with mock.patch.object(DefaultSettings.AUTO_REST.DB_JSON, 'CHUNK_SIZE', 2):
+            content, from_db = self.assertSameContent(UserSerializer, User.objects.order_by('id'))
+        self.assertTrue(from_db)
+
+    def test_empty(self):
+        content, from_db = self.assertSameContent(UserSerializer, User.objects.filter(username='nobody'))
+        self.assertFalse(from_db)
+
+    def test_unsupported_field(self):
+        content, from_db = self.assertSameContent(DateSerializer, User.objects.order_by('id'))
+        self.assertFalse(from_db)
+
+    def test_pagination(self):
+        content, from_db = self.assertSameContent(
+            UserSerializer, User.objects.order_by('id'), pagination_class=pagination.LimitOffsetPagination
+        )
+        self.assertFalse(from_db)
+
+
+class GroupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Group
+        fields = ('id', 'name', 'permissions')
+
+
+class NestedSerializer(serializers.ModelSerializer):
+    content_type = serializers.StringRelatedField()
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'content_type')
+
+
+class DottedSourceSerializer(serializers.ModelSerializer):
+    app_label = serializers.CharField(source='content_type.app_label')
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'app_label')
+
+
+class MethodSerializer(serializers.ModelSerializer):
+    title = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'title')
+
+    def get_title(self, obj):
+        return obj.name
+
+
+class PropertySerializer(serializers.ModelSerializer):
+    full_name = serializers.CharField(source='get_full_name')
+
+    class Meta:
+        model = User
+        fields = ('id', 'full_name')
+
+
+class PkFieldSerializer(serializers.ModelSerializer):
+    content_type = serializers.PrimaryKeyRelatedField(read_only=True, pk_field=serializers.CharField())
+
+    class Meta:
+        model = Permission
+        fields = ('id', 'content_type')
+
+
+class CustomRepresentationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Permission
+        fields = ('id', 'name')
+
+    def to_representation(self, instance):
+        return {'name': instance.name}
+
+
+class WriteOnlySerializer(serializers.ModelSerializer):
+    class Meta:
+        model = User
+        fields = ('id', 'username', 'password', 'last_login')
+        extra_kwargs = {'password': {'write_only': True}}
+
+
+class ValuesFastPathTestCase(APITestCase):
+    """
+    Тело ответа через `values_list()` совпадает с сериалайзером, а неподходящие сериалайзеры идут обычным путем.
+
+    """
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        for index, value in enumerate(TRICKY_STRINGS):
+            User.objects.create(username='user{}'.format(index), first_name=value, is_staff=bool(index % 2))
+
+    def get_content(self, serializer_class, queryset, fast_path, **attrs):
+        """
+        Ответ списка.
+
+        :return: Тело ответа и был ли он собран через `values_list()`.
+        :rtype: tuple
+
+        """
+        attrs.setdefault('pagination_class', None)
+        view = type('View', (RestListAPIView,), dict(
+            attrs, queryset=queryset, serializer_class=serializer_class, values_fast_path=fast_path, db_json=False
+        )).as_view()
+        with mock.patch.object(ValuesPlan, 'represent', autospec=True, side_effect=ValuesPlan.represent) as represent:
+            response = view(self.factory.get('/'))
+            response.render()
+        self.assertEqual(response.status_code, 200)
+        return response.content, represent.called
+
+    def assertSameContent(self, serializer_class, queryset, **attrs):
+        expected, fast = self.get_content(serializer_class, queryset, False, **attrs)
+        self.assertFalse(fast)
+        content, fast = self.get_content(serializer_class, queryset, True, **attrs)
+        self.assertEqual(content, expected)
+        return content, fast
+
+    def test_flat_serializer(self):
+        content, fast = self.assertSameContent(UserSerializer, User.objects.order_by('id'))
+        self.assertTrue(fast)
+        # Объекты модели не создаются.
+        with mock.patch.object(User, '__init__', side_effect=AssertionError):
+            self.get_content(UserSerializer, User.objects.order_by('id'), True)
+
+    def test_foreign_key_and_converters(self):
+        for serializer_class in (PermissionSerializer, DateSerializer, WriteOnlySerializer):
+            queryset = serializer_class.Meta.model.objects.order_by('id')
+            content, fast = self.assertSameContent(serializer_class, queryset)
+            self.assertTrue(fast, serializer_class)
+        # NULL значения колонок.
+        self.assertIn(b'"last_login":null', content)
+        self.assertNotIn(b'"password"', content)
+
+    def test_pagination(self):
+        pagination_classes = (
+            type('Pagination', (pagination.LimitOffsetPagination,), {'default_limit': 3}),
+            type('Pagination', (pagination.PageNumberPagination,), {'page_size': 3}),
+        )
+        for pagination_class in pagination_classes:
+            content, fast = self.assertSameContent(
+                UserSerializer, User.objects.order_by('id'), pagination_class=pagination_class
+            )
+            self.assertTrue(fast)
+            self.assertIn(b'"results":', content)
+
+    def test_fallback_serializers(self):
+        Group.objects.create(name='group').permissions.add(Permission.objects.first())
+        cases = [
+            (GroupSerializer, Group.objects.order_by('id')),
+            (NestedSerializer, Permission.objects.order_by('id')),
+            (DottedSourceSerializer, Permission.objects.order_by('id')),
+            (MethodSerializer, Permission.objects.order_by('id')),
+            (PropertySerializer, User.objects.order_by('id')),
+            (PkFieldSerializer, Permission.objects.order_by('id')),
+            (CustomRepresentationSerializer, Permission.objects.order_by('id')),
+        ]
+        for serializer_class, queryset in cases:
+            self.assertIsNone(build_values_plan(serializer_class()), serializer_class)
+            content, fast = self.assertSameContent(serializer_class, queryset)
+            self.assertFalse(fast, serializer_class)
+
+    def test_fallback_queryset(self):
+        # Queryset уже отдает values(), его сериалайзер обрабатывает как есть.
+        content, fast = self.assertSameContent(UserSerializer, User.objects.order_by('id').values())
+        self.assertFalse(fast)
+        # Вьюха отдает данные без сериалайзера.
+        content, fast = self.assertSameContent(
+            UserSerializer, User.objects.order_by('id').values_list('id', 'username'), is_serializer=True
+        )
+        self.assertFalse(fast)
+
+    def test_disabled_by_default(self):
+        with mock.patch.object(DefaultSettings.AUTO_REST.VALUES_FAST_PATH, 'ENABLED', False):
+            content, fast = self.get_content(UserSerializer, User.objects.order_by('id'), None)
+        self.assertFalse(fast)
+        with mock.patch.object(DefaultSettings.AUTO_REST.VALUES_FAST_PATH, 'ENABLED', True):
+            content, fast = self.get_content(UserSerializer, User.objects.order_by('id'), None)
+        self.assertTrue(fast)
@@ -0,0 +1,221 @@
+"""
+Пакетные запросы: несколько вызовов Rest генериков за один HTTP запрос.
+
+"""
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+from django.core.handlers.wsgi import WSGIRequest
+from django.core.urlresolvers import Resolver404, resolve
+from django.db import connection, connections
+from django.template.response import SimpleTemplateResponse
+
+from rest_framework.response import Response
+
+from ..cache import _header_to_meta
+from ..exceptions import FailPointRequest
+from ..settings import DefaultSettings
+from .rest import AutoPointFailRequest
+
+
+logger = logging.getLogger(__name__)
+
+# Методы, которые можно выполнять параллельно.
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class RestBatchAPIView(AutoPointFailRequest):
+    """
+    Выполняет список подзапросов внутри процесса, без повторного прохода через сеть и middleware.
+    Подзапрос - это {"method": "GET", "path": "/books/?page=2", "body": {...}, "headers": {...}}.
+    Подзапросы выполняются от имени уже аутентифицированного пользователя пакетного запроса.
+    Ответ - список {"status": 200, "headers": {...}, "data": ...} в порядке подзапросов.
+
+    batch_max_requests: Максимальное количество подзапросов. None - берется из настроек.
+    batch_parallel_reads: Выполнять ли идущие подряд читающие подзапросы параллельно. None - берется из настроек.
+    batch_max_workers: Размер пула потоков для параллельного чтения. None - берется из настроек.
+
+    """
+    batch_max_requests = None
+    batch_parallel_reads = None
+    batch_max_workers = None
+
+    def get_batch_setting(self, name):
+        value = getattr(self, 'batch_' + name.lower())
+        return value if value is not None else getattr(DefaultSettings.AUTO_REST.BATCH, name)
+
+    def post(self, request, *args, **kwargs):
+        items = self.get_batch_items(request)
+        results = [None] * len(items)
+        parallel = self.get_batch_setting('PARALLEL_READS') and not connection.in_atomic_block
+
+        # Пишущие подзапросы - барьер: читающие до и после них не перемешиваются.
+        group = []
+        for index, item in enumerate(items):
+            if parallel and item['method'] in SAFE_METHODS:
+                group.append(index)
+                continue
+            self._run_group(request, items, group, results)
+            group = []
+            results[index] = self.execute(request, item)
+        self._run_group(request, items, group, results)
+
+        return Response(data=results, status=200)
+
+    def get_batch_items(self, request):
+        """
+        Достает и нормализует список подзапросов.
+
+        :param rest_framework.request.Request request: Пакетный запрос.
+
+        :return: Список подзапросов.
+        :rtype: list
+
+        :raises:
+            drf_auto.exceptions.FailPointRequest: Неверный формат или слишком много подзапросов.
+
+        """
+        items = request.data
+        if not isinstance(items, list):
+            raise FailPointRequest(status=400, message='Ожидался массив подзапросов.')
+        max_requests = self.get_batch_setting('MAX_REQUESTS')
+        if max_requests and len(items) > max_requests:
+            raise FailPointRequest(
+                status=400, message='Слишком много подзапросов: {}. Максимум: {}.'.format(len(items), max_requests)
+            )
+
+        result = []
+        for index, item in enumerate(items):
+            if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+                raise FailPointRequest(status=400, message='Подзапрос {} должен содержать `path`.'.format(index))
+            result.append({
+                'method': str(item.get('method') or 'GET').upper(),
+                'path': item['path'],
+                'body': item.get('body'),
+                'headers': item.get('headers') or {},
+            })
+        return result
+
+    def _run_group(self, request, items, group, results):
+        """
+        Выполняет группу читающих подзапросов. Если подзапрос один, пул не нужен.
+
+        """
+        if len(group) == 1:
+            results[group[0]] = self.execute(request, items[group[0]])
+        elif group:
+            workers = min(len(group), self.get_batch_setting('MAX_WORKERS'))
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._execute_in_thread, request, items[index]) for index in group]
+                for index, future in zip(group, futures):
+                    results[index] = future.result()
+
+    def _execute_in_thread(self, request, item):
+        try:
+            return self.execute(request, item)
+        finally:
+            # У каждого потока свое соединение с БД, закрываем его, что бы не копились.
+            connections.close_all()
+
+    def execute(self, request, item):
+        """
+        Выполняет один подзапрос.
+
+        :param rest_framework.request.Request request: Пакетный запрос.
+        :param dict item: Подзапрос.
+
+        :return: Результат {"status": ..., "headers": ..., "data": ...}.
+        :rtype: dict
+
+        """
+        parts = urlsplit(item['path'])
+        try:
+            match = resolve(parts.path)
+        except Resolver404:
+            return self.get_batch_result(self.fail(status=404, message='Путь `{}` не найден.'.format(parts.path)))
+
+        view_class = getattr(match.func, 'cls', None)
+        if view_class is None or not issubclass(view_class, AutoPointFailRequest) or \
+                issubclass(view_class, RestBatchAPIView):
+            return self.get_batch_result(self.fail(status=400, message='Путь `{}` нельзя вызвать в пакете.'.format(
+                parts.path
+            )))
+
+        sub_request = self.build_sub_request(request, item, parts)
+        sub_request.resolver_match = match
+        try:
+            response = match.func(sub_request, *match.args, **match.kwargs)
+        except Exception:
+            logger.exception('Подзапрос %s %s упал.', item['method'], item['path'])
+            response = self.fail(status=500)
+        return self.get_batch_result(response)
+
+    def build_sub_request(self, request, item, parts):
+        """
+        Собирает django запрос для подзапроса на основе окружения пакетного запроса.
+
+        :param rest_framework.request.Request request: Пакетный запрос.
+        :param dict item: Подзапрос.
+        :param urllib.parse.SplitResult parts: Разобранный путь подзапроса.
+
+        :return: Запрос.
+        :rtype: django.core.handlers.wsgi.WSGIRequest
+
+        """
+        body = b''
+        if item['body'] is not None:
+            body = json.dumps(item['body']).encode('utf-8')
+
+        environ = {key: value for key, value in request._request.META.items() if not key.startswith('wsgi.')}
+        environ.update({
+            'REQUEST_METHOD': item['method'],
+            'PATH_INFO': parts.path,
+            'SCRIPT_NAME': '',
+            'QUERY_STRING': parts.query,
+            'CONTENT_TYPE': 'application/json',
+            'CONTENT_LENGTH': str(len(body)),
+            'wsgi.input': io.BytesIO(body),
+            'wsgi.url_scheme': request._request.META.get('wsgi.url_scheme', 'http'),
+        })
+        # Условные заголовки пакетного запроса относятся к нему самому, а не к подзапросам.
+        for header in ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE', 'HTTP_IF_MATCH', 'HTTP_IF_UNMODIFIED_SINCE'):
+            environ.pop(header, None)
+        # Формат ответа выбирается для всего пакета, уже отрендеренные ответы подзапросов разбираются как JSON.
+        environ['HTTP_ACCEPT'] = 'application/json'
+        for header, value in item['headers'].items():
+            environ[_header_to_meta(header)] = str(value)
+
+        sub_request = WSGIRequest(environ)
+        # Пользователь уже аутентифицирован пакетным запросом, повторно не аутентифицируем.
+        sub_request._force_auth_user = request.user
+        sub_request._force_auth_token = request.auth
+        return sub_request
+
+    @staticmethod
+    def get_batch_result(response):
+        """
+        Превращает ответ подзапроса в элемент ответа пакета.
+        Ответы DRF отдаем не рендеря, уже отрендеренные (из кэша) разбираем обратно.
+
+        :param django.http.HttpResponse response: Ответ подзапроса.
+
+        :return: Результат {"status": ..., "headers": ..., "data": ...}.
+        :rtype: dict
+
+        """
+        data = getattr(response, 'data', None)
+        # У неотрендеренного ответа без data (например, 204 на DELETE) обращение к content падает.
+        rendered = not isinstance(response, SimpleTemplateResponse) or response.is_rendered
+        if data is None and rendered and not getattr(response, 'streaming', False) and response.content:
+            try:
+                data = json.loads(response.content.decode(response.charset))
+            except ValueError:
+                data = response.content.decode(response.charset, errors='replace')
+        return {
+            'status': response.status_code,
+            'headers': {header: value for header, value in response.items() if header != 'Content-Type'},
+            'data': data,
+        }
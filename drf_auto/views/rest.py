@@ -2,18 +2,50 @@
 Авто генерики для REST API.
 
 """
+import itertools
 import logging
-import json
 
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections, router, transaction
+from django.db.models import Model, QuerySet, prefetch_related_objects
+from django.http import StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from rest_framework.exceptions import NotAuthenticated, ParseError, PermissionDenied
 from rest_framework.generics import (
     ListAPIView, RetrieveAPIView, UpdateAPIView,
     CreateAPIView, DestroyAPIView, GenericAPIView
 )
+from rest_framework.parsers import JSONParser
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
-from rest_framework.serializers import BaseSerializer
+from rest_framework.serializers import BaseSerializer, ModelSerializer, ValidationError
 
+from ..cache import build_request_key, entry_to_response, get_cache_policy, invalidate_model, response_to_entry
+from ..conditional import get_conditional_strategy
+from ..encoders import loads as json_loads
 from ..exceptions import FailPointRequest
+from ..export import get_export_columns, iter_chunks
+from ..identity import get_identity_map
+from ..pagination import get_count_strategy
+from ..parsers.binary import CBORParser, MessagePackParser
+from ..parsers.fast import FastJSONParser
+from ..parsers.stream import JSONArrayStream, StreamingJSONParser
+from ..planning import get_query_plan
+from ..renderers import (
+    CBORRenderer, CSVRenderer, ExportRenderer, FastJSONRenderer, MessagePackRenderer, NDJSONRenderer
+)
+from ..responses import EncodedResponse, is_encoded, splice_encoded, to_encoded
+from ..serializers.changes import get_changed_fields, get_update_fields, save_changed
+from ..serializers.compiler import install_compiled
+from ..serializers.fields import IntegerRangeListField
+from ..serializers.sparse import get_sparse_projection, prune_serializer_fields
+from ..serializers.values import build_values_plan
 from ..settings import DefaultSettings
+from ..singleflight import single_flight
+from ..sync import SyncToken, get_changes, register_model as register_sync_model
 
 
 logger = logging.getLogger(__name__)
@@ -57,8 +89,8 @@ class AutoPointFailRequest(GenericAPIView):
         # Готовим данные. Преобразуем в JSON.
         if isinstance(data, str) and DefaultSettings.AUTO_REST.EXCEPTIONS.DATA_TO_JSON:
             try:
-                data = json.loads(data)
-            except json.decoder.JSONDecodeError:
+                data = json_loads(data)
+            except ValueError:
                 pass
 
         kwargs = {}  # Формируем ответ.
@@ -72,9 +104,84 @@ class AutoPointFailRequest(GenericAPIView):
             if data:
                 kwargs['data'] = data
 
+        if any(is_encoded(value) for value in kwargs.values()):
+            return self.encoded_response(status, envelope=kwargs)
+
         # TODO: Научиться устанавливать самостоятельно формат ответа в случае fail. Через настройки приложения.
         return Response(data=kwargs, status=status)
 
+    def encoded_response(self, status, data=None, envelope=None):
+        """
+        Ответ с уже закодированными данными: они не разбираются, не рендерятся и не копируются.
+        Если клиент выбрал рендерер другого формата, данные разбираются и отдаются обычным путем.
+
+        :param int status: Код ответа от сервера.
+        :param data: Тело ответа: bytes, memoryview или `drf_auto.responses.PreEncoded`.
+        :param dict envelope: Обертка ответа, часть значений которой закодированы. Вместо data.
+
+        :return: Ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        values = [data] if envelope is None else [value for value in envelope.values() if is_encoded(value)]
+        encoded = [to_encoded(value) for value in values]
+        # Исключение могло случиться еще до выбора рендерера.
+        renderer = getattr(getattr(self, 'request', None), 'accepted_renderer', None)
+
+        if renderer is not None and any(item.format != renderer.format for item in encoded):
+            if envelope is None:
+                return Response(data=encoded[0].decode(), status=status)
+            decoded = {
+                key: to_encoded(value).decode() if is_encoded(value) else value for key, value in envelope.items()
+            }
+            return Response(data=decoded, status=status)
+
+        if renderer is None:
+            renderer = JSONRenderer()
+        if envelope is None:
+            chunks = encoded[0].chunks()
+        else:
+            chunks = splice_encoded(envelope, renderer, renderer.media_type, self.get_renderer_context())
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        return EncodedResponse(chunks, status=status, content_type=content_type)
+
+    def get_renderers(self):
+        """
+        Если включен быстрый JSON, подменяем им стандартный JSON рендерер DRF.
+        Если включены бинарные форматы, добавляем рендереры MessagePack и CBOR.
+
+        """
+        renderers = super().get_renderers()
+        if DefaultSettings.AUTO_REST.JSON.ENABLED:
+            renderers = [FastJSONRenderer() if type(renderer) is JSONRenderer else renderer for renderer in renderers]
+        if DefaultSettings.AUTO_REST.BINARY.ENABLED:
+            formats = {renderer.format for renderer in renderers}
+            renderers += [
+                renderer_class() for renderer_class in (MessagePackRenderer, CBORRenderer)
+                if renderer_class.format not in formats
+            ]
+        return renderers
+
+    def get_parsers(self):
+        """
+        Если включен быстрый JSON, подменяем им стандартный JSON парсер DRF.
+        Если включены бинарные форматы, добавляем парсеры MessagePack и CBOR.
+
+        """
+        parsers = super().get_parsers()
+        if DefaultSettings.AUTO_REST.JSON.ENABLED:
+            parsers = [FastJSONParser() if type(parser) is JSONParser else parser for parser in parsers]
+        if DefaultSettings.AUTO_REST.BINARY.ENABLED:
+            media_types = {parser.media_type for parser in parsers}
+            parsers += [
+                parser_class() for parser_class in (MessagePackParser, CBORParser)
+                if parser_class.media_type not in media_types
+            ]
+        return parsers
+
     def handle_exception(self, exc):
         """
         Переопределяем обработку исключений, что бы отловить наше.
@@ -137,17 +244,19 @@ class AutoSearchSerializerView(AutoPointFailRequest):
     serializers_request_key = DefaultSettings.SERIALIZERS_REQUEST_KEY
     serializers_response_key = DefaultSettings.SERIALIZERS_RESPONSE_KEY
 
-    def __preparation_request_method(self):
+    def __preparation_request_method(self, method=None):
         """
         Подготовка метода для поиска нужного сериалайзера.
         Формирует список методов которые будем искать.
         Список, потому что какие то метоы могут быть равнозначны. Put/Path
 
+        :param str method: Метод запроса. None - метод текущего запроса.
+
         :return: Список методов.
         :rtype: list
 
         """
-        method = self.request.method.lower()
+        method = (method or self.request.method).lower()
         methods = [method]
         # Если метод PATCH/PUT, но для него нет сериалайзеров, использовать сериалайзеры для PUT/PATCH.
         if method == 'patch':
@@ -206,11 +315,12 @@ class AutoSearchSerializerView(AutoPointFailRequest):
 
         return result
 
-    def get_serializer_class(self, is_response=False):
+    def get_serializer_class(self, is_response=False, method=None):
         """
         Пробуем достать необходимый сериалайзер исходя из атрибутов класса.
 
         :param bool is_response: Это вызов функции для ответа АПИ?
+        :param str method: Метод, для которого ищем сериалайзер. None - метод текущего запроса.
 
         :return: Найденный класс сериалайзера.
         :rtype: rest_framework.serializers.BaseSerializer()
@@ -226,7 +336,7 @@ class AutoSearchSerializerView(AutoPointFailRequest):
         # Если описание ввиде словаря, тогда надо в словаре искать.
         if serializers and isinstance(serializers, dict):
             # Ищем в словаре описанном пользователем.
-            methods = self.__preparation_request_method()
+            methods = self.__preparation_request_method(method)
             result_serializer = self.__search_serializers_in_dict(serializers, methods, type_search)
 
         # Иначе, если нет описание словарем, а есть просто сериалайзер, его и возвращаем.
@@ -246,9 +356,161 @@ class AutoResponseSerializerView(AutoSearchSerializerView):
     Сначала пробует достать конкретный сериалайзер для этого метода,
     Из поля serializer_classes: dict. Если такого нет, то берет дефолтный для этого метода сериалайзер.
     is_serializer: Полу, указывающее нужно ли оборачивать ответ в сериалайзер или он уже в готовом dict.
+    auto_query_plan: Применять ли к queryset план запроса, построенный по сериалайзеру ответа.
+                     None - берется из настроек.
+    sparse_fields: Разрешить ли клиенту выбирать филды ответа через `?fields=`/`?exclude=`.
+                   None - берется из настроек.
+    compiled_serializer: Серилизовать ли ответ скомпилированным `to_representation`. None - берется из настроек.
 
     """
     is_serializer = False
+    auto_query_plan = None
+    query_plan = None
+    sparse_fields = None
+    compiled_serializer = None
+
+    def get_sparse_fields(self, serializer_class=None):
+        """
+        Возвращает филды ответа, которые выбрал клиент.
+
+        :param rest_framework.serializers.BaseSerializer serializer_class: Класс сериалайзера ответа.
+
+        :return: Набор филдов или None, если клиент ничего не выбирал.
+        :rtype: frozenset
+
+        """
+        settings = DefaultSettings.AUTO_REST.SPARSE_FIELDS
+        enabled = self.sparse_fields if self.sparse_fields is not None else settings.ENABLED
+        request = getattr(self, 'request', None)
+        if not enabled or request is None:
+            return None
+
+        params = getattr(request, 'query_params', request.GET)
+        return get_sparse_projection(
+            serializer_class or self.get_serializer_class(is_response=True),
+            params.get(settings.FIELDS_PARAM), params.get(settings.EXCLUDE_PARAM)
+        )
+
+    def get_response_serializer(self, *args, **kwargs):
+        """
+        Создает сериалайзер ответа, оставляя в нем только выбранные клиентом филды.
+
+        :param tuple args: Позиционные аргументы для сериалайзера.
+        :param dict kwargs: Именованные аргументы для сериалайзера. `serializer_class` - класс сериалайзера,
+                            по дефолту ищется через `get_serializer_class(is_response=True)`.
+
+        :return: Проинициализированный сериалайзер ответа.
+        :rtype: rest_framework.serializers.BaseSerializer
+
+        """
+        serializer_class = kwargs.pop('serializer_class', None) or self.get_serializer_class(is_response=True)
+        kwargs.setdefault('context', self.get_serializer_context())
+        serializer = serializer_class(*args, **kwargs)
+
+        names = self.get_sparse_fields(serializer_class)
+        if names is not None:
+            prune_serializer_fields(serializer, names)
+
+        compiled = self.compiled_serializer
+        if compiled is None:
+            compiled = DefaultSettings.AUTO_REST.SERIALIZER_COMPILER.ENABLED
+        if compiled:
+            install_compiled(serializer)
+        return serializer
+
+    def get_response_data(self, instance, serializer=None):
+        """
+        Представление объекта в ответе. Вычисляется один раз за запрос и дальше отдается готовым,
+        что бы заголовки, тело ответа и хуки не серилизовали объект заново.
+        Если сериалайзер запроса того же класса, что и сериалайзер ответа, и клиент не выбирал филды,
+        берется его `data`.
+
+        :param instance: Объект ответа.
+        :param rest_framework.serializers.BaseSerializer serializer: Сериалайзер запроса с этим объектом.
+
+        :return: Данные ответа.
+
+        """
+        cached = getattr(self, '_response_data', None)
+        if cached is not None and cached[0] is instance:
+            return cached[1]
+
+        if self.is_serializer:
+            data = instance
+        else:
+            serializer_class = self.get_serializer_class(is_response=True)
+            if type(serializer) is serializer_class and serializer.instance is instance and \
+                    self.get_sparse_fields(serializer_class) is None:
+                data = serializer.data
+            else:
+                data = self.get_response_serializer(instance).data
+        self._response_data = (instance, data)
+        return data
+
+    def get_query_plan(self, queryset):
+        """
+        Строит план запроса по сериалайзеру ответа.
+
+        :param django.db.models.QuerySet queryset: Queryset, который будем отдавать.
+
+        :return: План запроса.
+        :rtype: drf_auto.planning.QueryPlan
+
+        """
+        serializer_class = self.get_serializer_class(is_response=True)
+        return get_query_plan(serializer_class, queryset.model, fields=self.get_sparse_fields(serializer_class))
+
+    def is_query_plan(self):
+        """
+        Включен ли план запроса.
+
+        :rtype: bool
+
+        """
+        if self.auto_query_plan is not None:
+            return self.auto_query_plan
+        return DefaultSettings.AUTO_REST.QUERY_PLAN.ENABLED
+
+    def plan_queryset(self, queryset):
+        """
+        Применяет к queryset план запроса: select_related, prefetch_related и only.
+        Если план выключен, но клиент выбрал филды ответа, ограничивает только колонки самой модели.
+        Работает только для безопасных методов, что бы не мешать записи.
+
+        :param django.db.models.QuerySet queryset: Исходный queryset.
+
+        :return: Queryset с примененным планом.
+        :rtype: django.db.models.QuerySet
+
+        """
+        request = getattr(self, 'request', None)
+        if self.is_serializer or request is None or request.method not in ('GET', 'HEAD'):
+            return queryset
+        # Если уже выбраны конкретные филды через values(), то объекты не создаются и план не нужен.
+        if not isinstance(queryset, QuerySet) or getattr(queryset, '_fields', None):
+            return queryset
+
+        if not self.is_query_plan():
+            serializer_class = self.get_serializer_class(is_response=True)
+            fields = self.get_sparse_fields(serializer_class)
+            if fields is None:
+                return queryset
+            return get_query_plan(serializer_class, queryset.model, fields=fields).apply_only(queryset)
+
+        self.query_plan = self.get_query_plan(queryset)
+        logger.debug('%s: применен план запроса %s', self.__class__.__name__, self.query_plan)
+        return self.query_plan.apply(queryset)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        """
+        Добавляем отчет о примененном плане запроса, если это включено в настройках.
+
+        """
+        response = super().finalize_response(request, response, *args, **kwargs)
+        header = DefaultSettings.AUTO_REST.QUERY_PLAN.REPORT_HEADER
+        if header and self.query_plan is not None:
+            response[header] = str(self.query_plan)
+        return response
 
     def get_response(self, code, serializer=None, data=None, is_serializer=False,
                      serializer_class=None, many=False, *args, **kwargs):
@@ -258,6 +520,7 @@ class AutoResponseSerializerView(AutoSearchSerializerView):
         Иначе берем data. Если передан serializer_class, тогда дата оборачивается в него.
         Иначе пробует по умному найти сериалайзер для этого ответа.
         Если is_serializer = True, тогда дата возвращается в том виде, в котором передана.
+        Уже закодированные данные (bytes, memoryview, `drf_auto.responses.PreEncoded`) отдаются как есть.
 
         :param int code: Код ответа ручки
         :param rest_framework.serializers.Serializer serializer: Сериалайзер, который уже хранит данные.
@@ -273,6 +536,9 @@ class AutoResponseSerializerView(AutoSearchSerializerView):
         """
         # TODO: Добавить status в параметры. Он будет код ответа сервера, а code код ответа в JSON.
         # ПО дефолтну пусть определяет из типа запроса. get-200,post-201,put/patch-200,delete-204
+        if serializer is None and is_encoded(data):
+            return self.encoded_response(code, data)
+
         result_data = None
         # TODO: Странная логика if data and if serializer. Кажется это взаимозаменяемые вещи.
         if data:
@@ -280,19 +546,509 @@ class AutoResponseSerializerView(AutoSearchSerializerView):
                 result_data = serializer.data
             elif is_serializer:
                 result_data = data
-            elif serializer_class:
-                result_data = serializer_class(data, many=many).data
             else:
-                result_data = self.get_serializer_class(is_response=True)(data, many=many).data
+                result_data = self.get_response_serializer(data, many=many, serializer_class=serializer_class).data
+
+        return Response(data=result_data, status=code, **kwargs)
+
+
+class AutoCacheResponseView(AutoResponseSerializerView):
+    """
+    Класс, для кэширования отрендеренных ответов на GET запросы.
+    cache_policy: Политика кэширования `drf_auto.cache.CachePolicy` или словарь с аргументами для нее.
+                  None - не кэшируем.
+    single_flight: Схлопывать ли одинаковые одновременные запросы в одно вычисление. None - берется из настроек.
+    single_flight_timeout: Сколько секунд ждать чужое вычисление. None - берется из настроек.
+
+    """
+    cache_policy = None
+    single_flight = None
+    single_flight_timeout = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Подписываем модели ответа на инвалидацию еще при загрузке урлов,
+        что бы изменения ловились даже до первого запроса к view.
+
+        """
+        policy = get_cache_policy(cls.cache_policy)
+        if policy is not None:
+            queryset = getattr(cls, 'queryset', None)
+            policy.register(getattr(queryset, 'model', None))
+        return super().as_view(**initkwargs)
+
+    def get_cache_policy(self):
+        """
+        Возвращает политику кэширования для текущего запроса.
+
+        :return: Политика или None.
+        :rtype: drf_auto.cache.CachePolicy
+
+        """
+        return get_cache_policy(self.cache_policy)
+
+    def render_response(self, request, response, *args, **kwargs):
+        """
+        Досрочно финализирует и рендерит ответ, что бы получить его байты.
+
+        :param rest_framework.request.Request request: Запрос.
+        :param django.http.HttpResponse response: Ответ обработчика.
+
+        :return: Отрендеренный ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        response = self.finalize_response(request, response, *args, **kwargs)
+        if hasattr(response, 'render') and not response.is_rendered:
+            response.render()
+        return response
+
+    def get_cached_response(self, handler, request, *args, **kwargs):
+        """
+        Отдает ответ из кэша, либо вычисляет его через handler и кладет в кэш.
+
+        :param callable handler: Обработчик запроса, например `super().get`.
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        policy = self.get_cache_policy()
+        if request.method not in ('GET', 'HEAD') or (policy is None and not self.is_single_flight()):
+            return handler(request, *args, **kwargs)
+        if policy is None:
+            return self.get_single_flight_response(handler, request, *args, **kwargs)
+
+        model = getattr(self.get_queryset(), 'model', None)
+        policy.register(model)
+        key = policy.get_key(request, model, vary_on_user=self.has_object_permissions())
+        entry, fresh = policy.get(key)
+        # Устаревший ответ пересчитывает только один запрос, остальные получают то что есть.
+        if entry is not None and (fresh or not policy.lock(key)):
+            return policy.build_response(entry)
+
+        try:
+            response = self.get_single_flight_response(handler, request, *args, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                policy.set(key, response)
+        finally:
+            # Пересчет мог упасть или вернуть ошибку, право пересчета отпускаем в любом случае.
+            if entry is not None:
+                policy.unlock(key)
+        return response
+
+    def has_object_permissions(self):
+        """
+        Проверяются ли для ответа права на объект. Из кэша ответ отдается без `check_object_permissions`,
+        поэтому такой ответ кэшируется для каждого пользователя отдельно.
+
+        :rtype: bool
+
+        """
+        if (self.lookup_url_kwarg or self.lookup_field) not in self.kwargs:
+            return False
+        return self.has_object_permission_classes()
+
+    def has_object_permission_classes(self):
+        """
+        Есть ли среди классов прав те, что проверяют права на объект.
+
+        :rtype: bool
+
+        """
+        return any(
+            type(permission).has_object_permission is not BasePermission.has_object_permission
+            for permission in self.get_permissions()
+        )
+
+    def is_single_flight(self):
+        """
+        Включено ли схлопывание одинаковых запросов.
+
+        :rtype: bool
+
+        """
+        if self.single_flight is not None:
+            return self.single_flight
+        return DefaultSettings.AUTO_REST.SINGLE_FLIGHT.ENABLED
+
+    def get_single_flight_response(self, handler, request, *args, **kwargs):
+        """
+        Вычисляет и рендерит ответ. Одинаковые одновременные запросы того же пользователя
+        ждут одно вычисление и получают копию его ответа.
+
+        :param callable handler: Обработчик запроса, например `super().get`.
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Отрендеренный ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        def compute():
+            response = self.render_response(request, handler(request, *args, **kwargs), *args, **kwargs)
+            # Делиться можно только готовым успешным ответом.
+            entry = response_to_entry(response) if response.status_code == 200 and not response.streaming else None
+            return response, entry
+
+        if not self.is_single_flight():
+            return compute()[0]
+
+        timeout = self.single_flight_timeout
+        if timeout is None:
+            timeout = DefaultSettings.AUTO_REST.SINGLE_FLIGHT.TIMEOUT
+        # В ключ входит не только пользователь, но и сама авторизация: у токенов могут быть разные права.
+        key = build_request_key(request, vary_on_user=True, extra=[self.__class__.__name__, repr(request.auth)])
+        (response, entry), shared = single_flight.do(key, compute, timeout)
+        if not shared:
+            return response
+        if entry is None:
+            return compute()[0]
+        return entry_to_response(entry)
+
+
+class AutoConditionalResponseView(AutoCacheResponseView):
+    """
+    Класс, для условных запросов: ETag/Last-Modified в ответе, If-None-Match/If-Modified-Since на чтение
+    и If-Match/If-Unmodified-Since на запись.
+    conditional_strategy: Стратегия вычисления ETag: version, hash, путь до класса, класс или объект
+                          `drf_auto.conditional.BaseConditionalStrategy`. None - берется из настроек.
+
+    """
+    conditional_strategy = None
+
+    def get_conditional_strategy(self):
+        """
+        Возвращает стратегию условных запросов.
+
+        :return: Стратегия или None, если условные запросы выключены.
+        :rtype: drf_auto.conditional.BaseConditionalStrategy
+
+        """
+        return get_conditional_strategy(self.conditional_strategy)
+
+    def is_conditional_detail(self):
+        """
+        Запрос к конкретному объекту или к списку?
+
+        :rtype: bool
+
+        """
+        return (self.lookup_url_kwarg or self.lookup_field) in self.kwargs
+
+    def get_conditional_queryset(self):
+        """
+        Queryset, по которому считается версия ресурса. Для объекта - отфильтрованный по lookup.
+
+        :return: Queryset ресурса или None, если версию ресурса одним запросом не посчитать.
+        :rtype: django.db.models.QuerySet
+
+        """
+        # План запроса нужен только для серилизации, версия считается агрегатом без него.
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.select_related(None).prefetch_related(None).defer(None)
+        if self.is_conditional_detail():
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            queryset = queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return queryset
+
+    def get_conditional_response(self, handler, request, *args, **kwargs):
+        """
+        Отдает 304, если у клиента актуальная версия, иначе вычисляет ответ и ставит ему ETag/Last-Modified.
+
+        :param callable handler: Обработчик запроса, например `super().get`.
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Ответ.
+        :rtype: django.http.HttpResponse
+
+        """
+        strategy = self.get_conditional_strategy()
+        if strategy is None or request.method not in ('GET', 'HEAD'):
+            return self.get_cached_response(handler, request, *args, **kwargs)
+
+        validators = strategy.get_validators(self, request)
+        if validators is not None:
+            etag, last_modified = validators
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return self._set_validators(not_modified, etag, last_modified)
+            response = self.get_cached_response(handler, request, *args, **kwargs)
+        else:
+            def etag_handler(request, *args, **kwargs):
+                # ETag по данным ставим до рендеринга, тогда он попадет и в кэш ответов.
+                response = handler(request, *args, **kwargs)
+                data = getattr(response, 'data', None)
+                if response.status_code == 200 and data is not None:
+                    data_etag = strategy.get_data_etag(self, data)
+                    if data_etag:
+                        response['ETag'] = data_etag
+                return response
+
+            response = self.get_cached_response(etag_handler, request, *args, **kwargs)
+            etag, last_modified = response.get('ETag'), None
+            if etag and response.status_code == 200:
+                not_modified = get_conditional_response(request, etag=etag)
+                if not_modified is not None:
+                    return self._set_validators(not_modified, etag, last_modified)
+
+        if response.status_code == 200:
+            self._set_validators(response, etag, last_modified)
+        return response
+
+    def check_preconditions(self, request):
+        """
+        Проверяет If-Match/If-Unmodified-Since перед записью, что бы не перетереть чужие изменения.
+
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Ответ с ошибкой 412, либо None если записывать можно.
+        :rtype: django.http.HttpResponse
+
+        """
+        strategy = self.get_conditional_strategy()
+        if strategy is None or not ('HTTP_IF_MATCH' in request.META or 'HTTP_IF_UNMODIFIED_SINCE' in request.META):
+            return None
+
+        validators = strategy.get_validators(self, request)
+        if validators is None:
+            # ETag клиент получил от GET, поэтому и сравниваем с представлением объекта для GET.
+            instance = self.get_object()
+            serializer = self.get_response_serializer(
+                instance, serializer_class=self.get_serializer_class(is_response=True, method='GET')
+            )
+            validators = strategy.get_data_etag(self, serializer.data), None
+
+        etag, last_modified = validators
+        failed = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if failed is not None:
+            return self.fail(status=failed.status_code)
+        return None
+
+    @staticmethod
+    def _set_validators(response, etag, last_modified):
+        """
+        Ставит ответу заголовки ETag и Last-Modified.
+
+        """
+        if etag:
+            response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
+
+
+class AutoMultiGetView(AutoConditionalResponseView):
+    """
+    Класс, для получения нескольких объектов одним запросом по списку целых pk: `?ids=1,5,10-20`.
+    Объекты достаются пачками через `pk__in` и `pk__range`, отдаются в порядке запроса, а не найденные pk - отдельно.
+    multi_get: Включен ли режим. None - берется из настроек.
+    multi_get_max_ids: Максимальное количество pk в одном запросе. None - берется из настроек.
+
+    """
+    multi_get = None
+    multi_get_max_ids = None
+
+    def get_multi_get_ids(self):
+        """
+        Разбирает список pk из параметра запроса.
+
+        :return: Список pk или None, если режим не запрошен.
+        :rtype: drf_auto.serializers.fields.IntegerRangeList
+
+        :raises:
+            rest_framework.serializers.ValidationError: Неверный список pk.
+
+        """
+        if not self.is_multi_get():
+            return None
+
+        settings = DefaultSettings.AUTO_REST.MULTI_GET
+        value = self.request.query_params.get(settings.PARAM)
+        field = IntegerRangeListField(max_items=self.multi_get_max_ids or settings.MAX_IDS)
+        try:
+            return field.run_validation(value)
+        except ValidationError as e:
+            raise ValidationError({settings.PARAM: e.detail})
+
+    def is_multi_get(self):
+        """
+        Запрошено ли несколько объектов по списку pk.
+
+        :rtype: bool
+
+        """
+        settings = DefaultSettings.AUTO_REST.MULTI_GET
+        enabled = self.multi_get if self.multi_get is not None else settings.ENABLED
+        return enabled and self.request.method in ('GET', 'HEAD') and settings.PARAM in self.request.query_params
+
+    def is_conditional_detail(self):
+        return not self.is_multi_get() and super().is_conditional_detail()
+
+    def has_object_permissions(self):
+        """
+        Объекты по списку pk проверяются правами на объект, поэтому такой ответ зависит от пользователя.
+
+        """
+        if self.is_multi_get():
+            return self.has_object_permission_classes()
+        return super().has_object_permissions()
+
+    def get_conditional_queryset(self):
+        """
+        Для списка pk версия считается по запрошенным объектам, а не по объекту из URL или всему списку.
+        Если pk не помещаются в один запрос, версию не посчитать одним агрегатом, и условные запросы не работают.
+
+        """
+        if not self.is_multi_get():
+            return super().get_conditional_queryset()
+
+        ids = self.get_multi_get_ids()
+        chunks = list(ids.chunks(DefaultSettings.AUTO_REST.MULTI_GET.CHUNK_SIZE))
+        if len(chunks) > 1:
+            return None
+        queryset = self.filter_queryset(self.get_queryset())
+        if isinstance(queryset, QuerySet):
+            queryset = queryset.select_related(None).prefetch_related(None).defer(None)
+        return queryset.filter(chunks[0].as_q('pk')) if chunks else queryset.none()
+
+    def multi_get_response(self, ids):
+        """
+        Достает объекты по списку pk и формирует ответ `{"results": [...], "missing": [...]}`.
+
+        :param drf_auto.serializers.fields.IntegerRangeList ids: Список pk.
 
-        return Response(data=result_data, status=code)
+        :return: Ответ.
+        :rtype: rest_framework.response.Response
+
+        """
+        queryset = self.filter_queryset(self.get_queryset()).order_by()
+        pk_name = queryset.model._meta.pk.attname
+
+        check_permissions = self.has_object_permission_classes()
+
+        found = {}
+        # Пачками, что бы не упереться в лимит параметров запроса у БД. Диапазоны идут через `BETWEEN`.
+        for chunk in ids.chunks(DefaultSettings.AUTO_REST.MULTI_GET.CHUNK_SIZE):
+            for obj in queryset.filter(chunk.as_q('pk')):
+                if isinstance(obj, dict):
+                    found[obj[pk_name]] = obj
+                elif not check_permissions or self.has_multi_get_permission(obj):
+                    found[obj.pk] = obj
+
+        ordered = list(ids.unique())
+        objs = [found[pk] for pk in ordered if pk in found]
+        if not self.is_serializer:
+            objs = self.get_response_serializer(objs, many=True).data
+        data = {'results': objs, 'missing': [pk for pk in ordered if pk not in found]}
+        return self.get_response(code=200, data=data, is_serializer=True)
+
+    def has_multi_get_permission(self, obj):
+        """
+        Проверяет права на объект, как `get_object`. Объект без прав отдается как не найденный,
+        что бы ответ не раскрывал его существование.
+
+        :param django.db.models.Model obj: Объект.
+
+        :rtype: bool
+
+        """
+        try:
+            self.check_object_permissions(self.request, obj)
+        except (NotAuthenticated, PermissionDenied):
+            return False
+        return True
 
 
 class AutoRequestSerializerView(AutoPointFailRequest):
     """
     Класс, который помогает автомагически выбирать сериалайзер для обработки входящего и исходящего запроса.
+    identity_map: Загружать ли каждый объект за запрос один раз: `get_object()` запоминает объект,
+                  а сериалайзеры получают identity map запроса в `context['identity_map']`.
+                  None - берется из настроек.
 
     """
+    identity_map = None
+    # Объекты, которые `get_object()` уже отдал за этот запрос: (lookup, значение) -> объект.
+    _identity_objects = None
+
+    def initial(self, request, *args, **kwargs):
+        """
+        Объекты `get_object()` помним только в пределах одного запроса.
+
+        """
+        self._identity_objects = {}
+        super().initial(request, *args, **kwargs)
+
+    def get_identity_map(self):
+        """
+        Identity map текущего запроса.
+
+        :return: Identity map или None, если она выключена.
+        :rtype: drf_auto.identity.IdentityMap
+
+        """
+        enabled = self.identity_map
+        if enabled is None:
+            enabled = DefaultSettings.AUTO_REST.IDENTITY_MAP.ENABLED
+        request = getattr(self, 'request', None)
+        if not enabled or request is None:
+            return None
+        return get_identity_map(request)
+
+    def get_serializer_context(self):
+        """
+        Передаем сериалайзерам identity map запроса, если она включена.
+
+        """
+        context = super().get_serializer_context()
+        identity_map = self.get_identity_map()
+        if identity_map is not None:
+            context['identity_map'] = identity_map
+        return context
+
+    def get_object(self):
+        """
+        С identity map объект по одному и тому же lookup загружается за запрос один раз,
+        например в `check_preconditions` и потом в `update`. Права на объект проверяются при каждом вызове.
+
+        """
+        identity_map = self.get_identity_map()
+        if identity_map is None:
+            return super().get_object()
+
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        key = (self.lookup_field, self.kwargs.get(lookup_url_kwarg))
+        if key in self._identity_objects:
+            obj = self._identity_objects[key]
+            self.check_object_permissions(self.request, obj)
+            return obj
+
+        obj = identity_map.add(super().get_object())
+        if self.request.method not in ('GET', 'HEAD', 'DELETE') and hasattr(self, 'is_query_plan') and \
+                self.is_query_plan():
+            # При записи план к queryset не применяется. Связи ответа подтягиваем сразу,
+            # их читают и проверка If-Match, и ответ после записи. Удалению связи не нужны.
+            prefetch_related_objects([obj], *self.get_query_plan(self.get_queryset()).prefetch_related)
+        self._identity_objects[key] = obj
+        return obj
+
+    def discard_object(self, instance):
+        """
+        Забывает объект, например перед удалением, что бы он больше не отдавался из identity map.
+
+        :param django.db.models.Model instance: Объект.
+
+        """
+        identity_map = self.get_identity_map()
+        if identity_map is not None:
+            identity_map.discard(instance)
+            objects = self._identity_objects or {}
+            for key in [key for key, obj in objects.items() if obj is instance]:
+                del objects[key]
+
     def get_initial_data(self, data):
         """
         Интерфейс для изменения данных передаваемых сериалайзеру.
@@ -330,29 +1086,324 @@ class RestAPIView(AutoRequestSerializerView, AutoResponseSerializerView):
 
 
 # TODO: Доразобраться с пагинацией.
-class RestListAPIView(AutoRequestSerializerView, ListAPIView, AutoResponseSerializerView):
+class RestListAPIView(AutoRequestSerializerView, ListAPIView, AutoMultiGetView):
     """
     Генерик для списка объектов.
+    count_strategy: Стратегия подсчета количества объектов при пагинации.
+                    Имя (exact, cached, estimated, has_next), путь до класса, класс или объект стратегии.
+                    По дефолту берется из настроек.
+    values_fast_path: Отдавать ли плоские сериалайзеры через `values_list()`, без создания объектов модели.
+                      None - берется из настроек.
+    db_json: Собирать ли JSON плоских сериалайзеров прямо в БД (SQLite и PostgreSQL), только без пагинации.
+             None - берется из настроек.
+    export: Разрешить ли потоковую выгрузку всего списка через `?format=ndjson` и `?format=csv`.
+            None - берется из настроек.
+    export_chunk_size: Сколько объектов читать из БД за один запрос при выгрузке. None - берется из настроек.
+    sync_field: Колонка версии (`updated_at` или последовательность) для синхронизации через `?since=`.
+                None - берется из настроек, если и там нет, синхронизация выключена.
+    sync_limit: Сколько изменений отдавать за один запрос синхронизации. None - берется из настроек.
 
     """
+    count_strategy = None
+    values_fast_path = None
+    db_json = None
+    export = None
+    export_chunk_size = None
+    sync_field = None
+    sync_limit = None
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        """
+        Включаем запись удалений модели еще при загрузке урлов, что бы синхронизация видела все удаления.
+
+        """
+        queryset = getattr(cls, 'queryset', None)
+        if cls.get_sync_field() and queryset is not None:
+            register_sync_model(queryset.model)
+        return super().as_view(**initkwargs)
+
+    @classmethod
+    def get_sync_field(cls):
+        """
+        Колонка версии для синхронизации.
+
+        :return: Имя колонки или None, если синхронизация выключена.
+        :rtype: str
+
+        """
+        return cls.sync_field or DefaultSettings.AUTO_REST.SYNC.FIELD
+
     def get(self, request, *args, **kwargs):
         """
         Список объектов.
 
         """
-        return super().get(request, *args, **kwargs)
+        return self.get_conditional_response(super().get, request, *args, **kwargs)
+
+    def is_export(self):
+        """
+        Включена ли потоковая выгрузка.
+
+        :rtype: bool
+
+        """
+        if self.export is not None:
+            return self.export
+        return DefaultSettings.AUTO_REST.EXPORT.ENABLED
+
+    def get_renderers(self):
+        """
+        Если включена выгрузка, добавляем рендереры NDJSON и CSV.
+
+        """
+        renderers = super().get_renderers()
+        if self.is_export():
+            formats = {renderer.format for renderer in renderers}
+            renderers += [
+                renderer_class() for renderer_class in (NDJSONRenderer, CSVRenderer)
+                if renderer_class.format not in formats
+            ]
+        return renderers
+
+    def get_count_strategy(self):
+        """
+        Возвращает стратегию подсчета количества объектов для текущего запроса.
+
+        :return: Объект стратегии.
+        :rtype: drf_auto.pagination.BaseCountStrategy
+
+        """
+        if not hasattr(self, '_count_strategy'):
+            self._count_strategy = get_count_strategy(self.count_strategy)
+        return self._count_strategy
+
+    @property
+    def paginator(self):
+        """
+        Пагинатор вьюхи, с учетом стратегии подсчета.
+
+        """
+        if not hasattr(self, '_auto_paginator'):
+            paginator = super().paginator
+            if paginator is not None:
+                paginator = self.get_count_strategy().get_paginator(paginator, view=self)
+            self._auto_paginator = paginator
+        return self._auto_paginator
+
+    def paginate_queryset(self, queryset):
+        """
+        Пагинируем, считая количество объектов через стратегию вьюхи.
+
+        """
+        if self.paginator is None:
+            return None
+        queryset = self.get_count_strategy().prepare_queryset(queryset, view=self)
+        return super().paginate_queryset(queryset)
+
+    def filter_queryset(self, queryset):
+        """
+        Фильтруем и применяем план запроса по сериалайзеру ответа.
+
+        """
+        return self.plan_queryset(super().filter_queryset(queryset))
 
     def list(self, request, *args, **kwargs):
+        ids = self.get_multi_get_ids()
+        if ids is not None:
+            return self.multi_get_response(ids)
+
+        token = self.get_sync_token()
+        if token is not None:
+            return self.sync_response(token)
+
         queryset = self.filter_queryset(self.get_queryset())
 
+        renderer = getattr(request, 'accepted_renderer', None)
+        if isinstance(renderer, ExportRenderer) and isinstance(queryset, QuerySet) and not self.is_serializer:
+            return self.export_response(renderer, queryset)
+
+        plan = self.get_values_plan(queryset)
+        if plan is not None and self.is_db_json(plan, queryset):
+            return self.db_json_response(plan, queryset)
+        if plan is not None and self.is_values_fast_path():
+            return self.values_list_response(plan, plan.apply(queryset))
+
         page = self.paginate_queryset(queryset)
         if page is not None:
-            # TODO: Тут в queryset падают данные, с оберткой пагинации.
-            queryset = self.get_paginated_response(queryset)
+            queryset = self.get_paginated_response(page)
             return self.get_response(code=200, data=queryset, many=True, is_serializer=True)
 
         return self.get_response(code=200, data=queryset, many=True, is_serializer=self.is_serializer)
 
+    def get_sync_token(self):
+        """
+        Разбирает токен синхронизации из параметра запроса.
+
+        :return: Токен или None, если синхронизация не запрошена.
+        :rtype: drf_auto.sync.SyncToken
+
+        :raises:
+            rest_framework.serializers.ValidationError: Неверный токен.
+
+        """
+        field_name = self.get_sync_field()
+        param = DefaultSettings.AUTO_REST.SYNC.PARAM
+        value = self.request.query_params.get(param) if field_name else None
+        if value is None:
+            return None
+
+        try:
+            return SyncToken.decode(value, self.get_queryset().model, field_name)
+        except ValueError as e:
+            raise ValidationError({param: [str(e)]})
+
+    def sync_response(self, token):
+        """
+        Отдает изменения после токена: `changed` - созданные и измененные объекты, `deleted` - pk удаленных,
+        `token` - токен для следующего запроса, `more` - есть ли еще изменения, тогда нужно сразу запросить снова.
+
+        :param drf_auto.sync.SyncToken token: Токен клиента.
+
+        :return: Ответ.
+        :rtype: rest_framework.response.Response
+
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        register_sync_model(queryset.model)
+        limit = self.sync_limit or DefaultSettings.AUTO_REST.SYNC.LIMIT
+        objects, deleted, next_token, more = get_changes(queryset, self.get_sync_field(), token, limit)
+        data = {
+            'changed': self.get_response_serializer(objects, many=True).data,
+            'deleted': deleted,
+            'token': next_token.encode(),
+            'more': more,
+        }
+        return self.get_response(code=200, data=data, is_serializer=True)
+
+    def export_response(self, renderer, queryset):
+        """
+        Отдает весь список потоком, без пагинации: queryset читается и серилизуется кусками,
+        поэтому память не зависит от размера выгрузки.
+
+        :param drf_auto.renderers.ExportRenderer renderer: Рендерер выгрузки.
+        :param django.db.models.QuerySet queryset: Queryset, который будем отдавать.
+
+        :return: Потоковый ответ.
+        :rtype: django.http.StreamingHttpResponse
+
+        """
+        chunk_size = self.export_chunk_size or DefaultSettings.AUTO_REST.EXPORT.CHUNK_SIZE
+        serializer_class = self.get_serializer_class(is_response=True)
+        columns = get_export_columns(serializer_class, self.get_sparse_fields(serializer_class))
+
+        def stream():
+            yield renderer.render_header(columns)
+            for chunk in iter_chunks(queryset, chunk_size):
+                yield renderer.render_rows(self.get_response_serializer(chunk, many=True).data, columns)
+
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        response = StreamingHttpResponse(stream(), content_type=content_type)
+        response['Content-Disposition'] = 'attachment; filename="{}.{}"'.format(
+            queryset.model._meta.model_name, renderer.format
+        )
+        return response
+
+    def get_values_plan(self, queryset):
+        """
+        План `values_list()` для плоского сериалайзера ответа.
+
+        :param django.db.models.QuerySet queryset: Queryset, который будем отдавать.
+
+        :return: План или None, если быстрый путь выключен или сериалайзер не плоский.
+        :rtype: drf_auto.serializers.values.ValuesPlan
+
+        """
+        enabled = self.is_values_fast_path() or self.db_json or \
+            (self.db_json is None and DefaultSettings.AUTO_REST.DB_JSON.ENABLED)
+        if not enabled or self.is_serializer or not isinstance(queryset, QuerySet) or queryset._fields is not None:
+            return None
+        return build_values_plan(self.get_response_serializer())
+
+    def is_values_fast_path(self):
+        """
+        Включен ли быстрый путь через `values_list()`.
+
+        :rtype: bool
+
+        """
+        if self.values_fast_path is not None:
+            return self.values_fast_path
+        return DefaultSettings.AUTO_REST.VALUES_FAST_PATH.ENABLED
+
+    def is_db_json(self, plan, queryset):
+        """
+        Можно ли собрать JSON ответа в БД: режим включен, пагинации нет,
+        клиент ждет компактный JSON без экранирования не ASCII символов (как собирает БД),
+        а бэкенд и все филды плана это поддерживают.
+
+        :param drf_auto.serializers.values.ValuesPlan plan: План колонок.
+        :param django.db.models.QuerySet queryset: Queryset, который будем отдавать.
+
+        :rtype: bool
+
+        """
+        enabled = self.db_json
+        if enabled is None:
+            enabled = DefaultSettings.AUTO_REST.DB_JSON.ENABLED
+        renderer = getattr(self.request, 'accepted_renderer', None)
+        if not enabled or self.paginator is not None or getattr(renderer, 'format', None) != 'json':
+            return False
+        if getattr(renderer, 'ensure_ascii', False) or not getattr(renderer, 'compact', True):
+            return False
+        if hasattr(renderer, 'get_indent') and \
+                renderer.get_indent(self.request.accepted_media_type, self.get_renderer_context()):
+            return False
+        return plan.supports_json(queryset)
+
+    def db_json_response(self, plan, queryset):
+        """
+        Отдает JSON, собранный в БД, потоком: строки читаются из курсора по мере отправки,
+        без разбора и повторного рендеринга.
+
+        :param drf_auto.serializers.values.ValuesPlan plan: План колонок.
+        :param django.db.models.QuerySet queryset: Queryset, который будем отдавать.
+
+        :return: Ответ.
+        :rtype: django.http.StreamingHttpResponse
+
+        """
+        chunks = plan.iter_json(queryset, DefaultSettings.AUTO_REST.DB_JSON.CHUNK_SIZE)
+        first = next(chunks, None)
+        if first is None:
+            # Пустой список отдаем так же, как обычный путь.
+            return self.get_response(code=200, data=None)
+
+        renderer = self.request.accepted_renderer
+        content_type = renderer.media_type
+        if renderer.charset:
+            content_type = '{}; charset={}'.format(content_type, renderer.charset)
+        return StreamingHttpResponse(itertools.chain([first], chunks), content_type=content_type)
+
+    def values_list_response(self, plan, queryset):
+        """
+        Отдает список через `values_list()`, с пагинацией, если она есть.
+
+        :param drf_auto.serializers.values.ValuesPlan plan: План колонок.
+        :param django.db.models.QuerySet queryset: Queryset с `values_list`.
+
+        :return: Ответ.
+        :rtype: rest_framework.response.Response
+
+        """
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return self.get_response(code=200, data=plan.represent(queryset), is_serializer=True)
+        data = self.paginator.get_paginated_response(plan.represent(page)).data
+        return self.get_response(code=200, data=data, is_serializer=True)
+
     def get_paginated_response(self, data):
         """
         Переопределяем логику, что бы сформировать и вернуть обернутые в пагинацию данные.
@@ -368,11 +1419,11 @@ class RestListAPIView(AutoRequestSerializerView, ListAPIView, AutoResponseSerial
         # TODO: Неверное суждение.
         ser_data = data
         if not getattr(data, '_fields', None):
-            ser_data = self.get_serializer_class(is_response=True)(data, many=True).data
+            ser_data = self.get_response_serializer(data, many=True).data
         return self.paginator.get_paginated_response(ser_data).data
 
 
-class RestRetrieveAPIView(AutoRequestSerializerView, RetrieveAPIView, AutoResponseSerializerView):
+class RestRetrieveAPIView(AutoRequestSerializerView, RetrieveAPIView, AutoConditionalResponseView):
     """
     Генерик для одного объекта.
 
@@ -382,31 +1433,34 @@ class RestRetrieveAPIView(AutoRequestSerializerView, RetrieveAPIView, AutoRespon
         Возвращает объект.
 
         """
-        return super().get(request, *args, **kwargs)
+        return self.get_conditional_response(super().get, request, *args, **kwargs)
+
+    def filter_queryset(self, queryset):
+        """
+        Фильтруем и применяем план запроса по сериалайзеру ответа.
+
+        """
+        return self.plan_queryset(super().filter_queryset(queryset))
 
     def retrieve(self, request, *args, **kwargs):
         """
         Формируем и возвращаем сам ответ.
 
         """
-        # Достаем объект.
+        # Достаем объект и отдаем его представление.
         instance = self.get_object()
-        # Если он уже серилизован, тогда отдаем то что есть.
-        if self.is_serializer:
-            data = instance
-        else:
-            # Если не серилизован тогда серилизуем его.
-            serializer = self.get_serializer_class(is_response=True)(instance)
-            data = serializer.data
-        # Отдаем ответ.
-        return self.get_response(code=200, data=data, is_serializer=True)
+        return self.get_response(code=200, data=self.get_response_data(instance), is_serializer=True)
 
 
-class RestUpdateAPIView(AutoRequestSerializerView, UpdateAPIView, AutoResponseSerializerView):
+class RestUpdateAPIView(AutoRequestSerializerView, UpdateAPIView, AutoConditionalResponseView):
     """
     Генерик для редактирования объекта.
+    track_changes: Писать ли в БД только измененные колонки и не писать ничего, если изменений нет.
+                   None - берется из настроек.
 
     """
+    track_changes = None
+
     def put(self, request, *args, **kwargs):
         """
         Обновляет объект.
@@ -422,6 +1476,11 @@ class RestUpdateAPIView(AutoRequestSerializerView, UpdateAPIView, AutoResponseSe
         return super().patch(request, *args, **kwargs)
 
     def update(self, request, *args, **kwargs):
+        # Устаревшую запись отклоняем до любой работы с объектом.
+        failed = self.check_preconditions(request)
+        if failed is not None:
+            return failed
+
         partial = kwargs.pop('partial', False)
         instance = self.get_object()
         serializer = self.get_serializer(instance, data=request.data, partial=partial)
@@ -433,7 +1492,40 @@ class RestUpdateAPIView(AutoRequestSerializerView, UpdateAPIView, AutoResponseSe
             # forcibly invalidate the prefetch cache on the instance.
             instance._prefetched_objects_cache = {}
 
-        return self.get_response(code=200, data=instance)
+        return self.get_response(code=200, data=self.get_response_data(instance, serializer), is_serializer=True)
+
+    def is_track_changes(self):
+        """
+        Включено ли отслеживание изменений.
+
+        :rtype: bool
+
+        """
+        if self.track_changes is not None:
+            return self.track_changes
+        return DefaultSettings.AUTO_REST.TRACK_CHANGES.ENABLED
+
+    def perform_update(self, serializer):
+        """
+        Сохраняем через `save(update_fields=...)` только измененные колонки, а если ничего не изменилось,
+        то не пишем вовсе. Работает для `ModelSerializer` без своего `update`, иначе сохраняем как обычно.
+
+        :param rest_framework.serializers.ModelSerializer serializer: Проверенный сериалайзер.
+
+        """
+        instance = serializer.instance
+        if not self.is_track_changes() or getattr(type(serializer), 'update', None) is not ModelSerializer.update:
+            return super().perform_update(serializer)
+
+        changed = get_changed_fields(instance, serializer.validated_data)
+        if changed is None:
+            return super().perform_update(serializer)
+        if not changed:
+            logger.debug('%s: объект %s не изменился, запись пропущена', self.__class__.__name__, instance.pk)
+            return
+
+        # `ModelSerializer.update` вызывает `instance.save()` без аргументов, поэтому обновляем объект сами.
+        save_changed(serializer, get_update_fields(instance, changed))
 
 
 class RestCreateAPIView(AutoRequestSerializerView, CreateAPIView, AutoResponseSerializerView):
@@ -452,8 +1544,10 @@ class RestCreateAPIView(AutoRequestSerializerView, CreateAPIView, AutoResponseSe
         serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         self.perform_create(serializer)
-        headers = self.get_success_headers(serializer.data)
-        return self.get_response(code=201, data=serializer.instance, headers=headers, is_serializer=self.is_serializer)
+        # Заголовки и тело ответа строятся по одному и тому же представлению объекта.
+        data = self.get_response_data(serializer.instance, serializer)
+        headers = self.get_success_headers(data)
+        return self.get_response(code=201, data=data, headers=headers, is_serializer=True)
 
 
 class RestDestroyAPIView(AutoRequestSerializerView, DestroyAPIView, AutoResponseSerializerView):
@@ -470,5 +1564,527 @@ class RestDestroyAPIView(AutoRequestSerializerView, DestroyAPIView, AutoResponse
 
     def destroy(self, request, *args, **kwargs):
         instance = self.get_object()
+        # После delete() у объекта уже нет pk, поэтому забываем его заранее.
+        self.discard_object(instance)
         self.perform_destroy(instance)
         return self.get_response(code=204)
+
+
+class AutoBulkRequestView(AutoRequestSerializerView):
+    """
+    Класс, с общей логикой массовых операций. Принимает JSON массив и пишет в БД пачками в одной транзакции.
+    bulk_batch_size: Размер пачки для bulk операций ORM. None - берется из настроек.
+    bulk_max_items: Максимальное количество объектов в одном запросе. None - берется из настроек.
+
+    """
+    bulk_batch_size = None
+    bulk_max_items = None
+
+    def get_bulk_batch_size(self):
+        """
+        Размер пачки для bulk операций ORM.
+
+        :rtype: int
+
+        """
+        return self.bulk_batch_size or DefaultSettings.AUTO_REST.BULK.BATCH_SIZE
+
+    def get_bulk_data(self, request):
+        """
+        Достает и проверяет массив объектов из запроса.
+
+        :param rest_framework.request.Request request: Запрос.
+
+        :return: Список объектов.
+        :rtype: list
+
+        :raises:
+            drf_auto.exceptions.FailPointRequest: Пришел не массив или он слишком большой.
+
+        """
+        data = request.data
+        if not isinstance(data, list):
+            raise FailPointRequest(status=400, message='Ожидался массив объектов.')
+
+        max_items = self.bulk_max_items or DefaultSettings.AUTO_REST.BULK.MAX_ITEMS
+        if max_items and len(data) > max_items:
+            raise FailPointRequest(
+                status=400, message='Слишком много объектов: {}. Максимум: {}.'.format(len(data), max_items)
+            )
+        return data
+
+    def get_bulk_model(self):
+        """
+        Модель, с которой работаем.
+
+        :rtype: django.db.models.Model
+
+        """
+        return self.get_queryset().model
+
+    def get_bulk_pks(self, data):
+        """
+        Достает pk из элементов массива. Элемент может быть самим pk или объектом с ним.
+
+        :param list data: Элементы запроса.
+
+        :return: pk, приведенные к типу модели. None для элементов без валидного pk.
+        :rtype: list
+
+        """
+        pk_field = self.get_bulk_model()._meta.pk
+        result = []
+        for item in data:
+            value = item.get(pk_field.name, item.get('pk')) if isinstance(item, dict) else item
+            try:
+                result.append(pk_field.to_python(value) if value is not None else None)
+            except Exception:
+                result.append(None)
+        return result
+
+    def fail_items(self, errors):
+        """
+        Отвечает ошибками по конкретным элементам, в формате `fail` для ошибок валидации.
+
+        :param list errors: Ошибки по каждому элементу запроса. Пустое значение - элемент валиден.
+
+        :return: Ответ сервера об ошибке.
+        :rtype: rest_framework.response.Response
+
+        """
+        kwargs = {
+            key: value
+            for key, value in DefaultSettings.AUTO_REST.EXCEPTIONS.EXCEPTION_DICT.get(ValidationError, {}).items()
+            if key != 'data_attr'
+        }
+        kwargs.setdefault('status', 400)
+        data = [{'index': index, 'errors': error} for index, error in enumerate(errors) if error]
+        return self.fail(data=data, **kwargs)
+
+    def _split_relations(self, attrs):
+        """
+        Отделяет many-to-many значения, которые нельзя записать через bulk операции.
+
+        :param dict attrs: Провалидированные данные одного объекта.
+
+        :return: Данные для колонок и данные для many-to-many.
+        :rtype: tuple
+
+        """
+        m2m_names = {field.name for field in self.get_bulk_model()._meta.many_to_many}
+        columns = {key: value for key, value in attrs.items() if key not in m2m_names}
+        relations = {key: value for key, value in attrs.items() if key in m2m_names}
+        return columns, relations
+
+    def can_bulk_write(self, serializer, method, validated_data):
+        """
+        Можно ли записать данные bulk операциями в обход `create()`/`update()` сериалайзера.
+        Нельзя, если сериалайзер не `ModelSerializer` или переопределяет метод записи,
+        либо в данных есть то, что не ложится в колонки и many-to-many модели (вложенные объекты, обратные связи).
+
+        :param rest_framework.serializers.BaseSerializer serializer: Сериалайзер одного объекта.
+        :param str method: Метод записи сериалайзера: `create` или `update`.
+        :param list validated_data: Провалидированные данные объектов.
+
+        :rtype: bool
+
+        """
+        if not isinstance(serializer, ModelSerializer) or \
+                getattr(type(serializer), method) is not getattr(ModelSerializer, method):
+            return False
+
+        opts = self.get_bulk_model()._meta
+        for attrs in validated_data:
+            for name, value in attrs.items():
+                try:
+                    field = opts.get_field(name)
+                except FieldDoesNotExist:
+                    return False
+                if field.many_to_many and not field.auto_created:
+                    if any(isinstance(item, dict) for item in value):
+                        return False
+                elif not field.concrete or field.auto_created:
+                    return False
+                elif field.is_relation and value is not None and not isinstance(value, Model):
+                    return False
+        return True
+
+
+class RestBulkCreateAPIView(AutoBulkRequestView, AutoResponseSerializerView):
+    """
+    Генерик для массового создания объектов через `bulk_create`.
+
+    """
+    def post(self, request, *args, **kwargs):
+        """
+        Массовое создание объектов.
+
+        """
+        return self.bulk_create(request, *args, **kwargs)
+
+    def bulk_create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=self.get_bulk_data(request), many=True)
+        if not serializer.is_valid():
+            return self.fail_items(serializer.errors)
+        self.perform_bulk_create(serializer)
+        return self.get_response(code=201, data=serializer.instance, many=True, is_serializer=self.is_serializer)
+
+    def perform_bulk_create(self, serializer):
+        """
+        Пишет объекты в БД пачками в одной транзакции.
+
+        :param rest_framework.serializers.ListSerializer serializer: Провалидированный сериалайзер.
+
+        """
+        serializer.instance = self.bulk_create_objects(serializer.validated_data, serializer.child)
+
+    def bulk_create_objects(self, validated_data, child=None):
+        """
+        Создает объекты пачками в одной транзакции.
+        Если данные нельзя записать в обход сериалайзера (см. `can_bulk_write`), объекты создаются по одному
+        через `child.create()`.
+
+        :param list validated_data: Провалидированные данные объектов.
+        :param rest_framework.serializers.BaseSerializer child: Сериалайзер одного объекта.
+
+        :return: Созданные объекты.
+        :rtype: list
+
+        """
+        model = self.get_bulk_model()
+        using = router.db_for_write(model)
+        if child is not None and not self.can_bulk_write(child, 'create', validated_data):
+            with transaction.atomic(using=using):
+                return [child.create(attrs) for attrs in validated_data]
+
+        objs, relations = [], []
+        for attrs in validated_data:
+            columns, m2m = self._split_relations(attrs)
+            objs.append(model(**columns))
+            relations.append(m2m)
+
+        with transaction.atomic(using=using):
+            if any(relations) and not _can_return_bulk_pks(using):
+                # Без pk после bulk_create many-to-many не привязать, поэтому сохраняем по одному.
+                for obj in objs:
+                    obj.save(using=using)
+            else:
+                objs = model._default_manager.db_manager(using).bulk_create(
+                    objs, batch_size=self.get_bulk_batch_size()
+                )
+            self._bulk_add_relations(model, objs, relations, using)
+
+        # bulk_create не шлет сигналы, поэтому кэш ответов сбрасываем сами.
+        invalidate_model(model)
+        return objs
+
+    def _bulk_add_relations(self, model, objs, relations, using):
+        """
+        Привязывает many-to-many к только что созданным объектам.
+        Для автоматических промежуточных таблиц пишем все связи одним `bulk_create` на таблицу.
+
+        :param django.db.models.Model model: Модель объектов.
+        :param list objs: Созданные объекты.
+        :param list relations: Many-to-many значения по каждому объекту.
+        :param str using: Алиас БД.
+
+        """
+        for field in model._meta.many_to_many:
+            through = field.remote_field.through
+            pairs = [(obj, m2m[field.name]) for obj, m2m in zip(objs, relations) if field.name in m2m]
+            if not pairs:
+                continue
+            if not through._meta.auto_created:
+                # У своей промежуточной модели могут быть обязательные поля, пусть разбирается `set`.
+                for obj, value in pairs:
+                    getattr(obj, field.name).set(value)
+                continue
+            source, target = field.m2m_field_name(), field.m2m_reverse_field_name()
+            rows = [
+                through(**{source: obj, target: related})
+                for obj, value in pairs for related in value
+            ]
+            through._default_manager.db_manager(using).bulk_create(rows, batch_size=self.get_bulk_batch_size())
+            # m2m_changed тоже не отправлен, сбрасываем кэш второй стороны связи.
+            invalidate_model(field.related_model)
+
+
+class RestStreamCreateAPIView(RestBulkCreateAPIView):
+    """
+    Генерик для массового создания объектов из большого JSON массива.
+    Тело не читается целиком: элементы валидируются и пишутся пачками по `bulk_batch_size` по мере чтения.
+    Невалидные элементы пропускаются, пока их не больше `stream_error_budget`, после чего чтение прекращается.
+    stream_error_budget: Сколько невалидных элементов допускается. None - берется из настроек.
+    stream_atomic: Писать ли весь поток в одной транзакции. Тогда при превышении бюджета ошибок или неверном JSON
+                   ничего не сохранится. Иначе каждая пачка сохраняется в своей транзакции, а ошибка сообщает,
+                   до какого элемента поток записан.
+
+    """
+    parser_classes = (StreamingJSONParser,)
+    stream_error_budget = None
+    stream_atomic = True
+
+    def get_stream_error_budget(self):
+        """
+        Сколько невалидных элементов допускается.
+
+        :rtype: int
+
+        """
+        if self.stream_error_budget is not None:
+            return self.stream_error_budget
+        return DefaultSettings.AUTO_REST.BULK.ERROR_BUDGET
+
+    def get_bulk_data(self, request):
+        """
+        Возвращает ленивый поток элементов. Обычный массив (например, от другого парсера) тоже подходит.
+
+        """
+        data = request.data
+        if isinstance(data, JSONArrayStream):
+            return data
+        return super().get_bulk_data(request)
+
+    def iter_batches(self, items):
+        """
+        Режет поток элементов на пачки.
+
+        :param iter items: Элементы.
+
+        :return: Генератор пачек (индекс первого элемента, элементы).
+        :rtype: generator
+
+        """
+        batch_size, batch, start = self.get_bulk_batch_size(), [], 0
+        for index, item in enumerate(items):
+            if not batch:
+                start = index
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield start, batch
+                batch = []
+        if batch:
+            yield start, batch
+
+    def validate_batch(self, child, start, batch):
+        """
+        Валидирует пачку поэлементно, как это делает `ListSerializer`, но не отбрасывая валидные элементы.
+
+        :param rest_framework.serializers.Serializer child: Сериалайзер одного элемента.
+        :param int start: Индекс первого элемента пачки в потоке.
+        :param list batch: Элементы.
+
+        :return: Провалидированные данные и ошибки вида {'index': ..., 'errors': ...}.
+        :rtype: tuple
+
+        """
+        validated, errors = [], []
+        for index, item in enumerate(batch, start):
+            try:
+                validated.append(child.run_validation(item))
+            except ValidationError as e:
+                errors.append({'index': index, 'errors': e.detail})
+        return validated, errors
+
+    def bulk_create(self, request, *args, **kwargs):
+        items = self.get_bulk_data(request)
+        if self.stream_atomic:
+            # Исключение при превышении бюджета откатит все пачки.
+            with transaction.atomic(using=router.db_for_write(self.get_bulk_model())):
+                created, errors = self.perform_stream_create(items)
+        else:
+            created, errors = self.perform_stream_create(items)
+        return self.get_response(code=201, data={'created': created, 'errors': errors}, is_serializer=True)
+
+    def perform_stream_create(self, items):
+        """
+        Валидирует и пишет поток пачками.
+
+        :param iter items: Элементы.
+
+        :return: Количество созданных объектов и ошибки по элементам.
+        :rtype: tuple
+
+        :raises:
+            drf_auto.exceptions.FailPointRequest: Превышен бюджет ошибок или неверный JSON.
+
+        """
+        child = self.get_serializer(data=[], many=True).child
+        budget = self.get_stream_error_budget()
+        created, processed, errors = 0, 0, []
+        try:
+            for start, batch in self.iter_batches(items):
+                validated, batch_errors = self.validate_batch(child, start, batch)
+                errors.extend(batch_errors)
+                if len(errors) > budget:
+                    raise self.get_stream_error(
+                        'Превышен бюджет ошибок: {}.'.format(budget), created, processed, errors
+                    )
+                if validated:
+                    created += len(self.bulk_create_objects(validated, child))
+                processed = start + len(batch)
+        except ParseError as e:
+            raise self.get_stream_error(str(e.detail), created, processed, errors)
+        return created, errors
+
+    def get_stream_error(self, message, created, processed, errors):
+        """
+        Ошибка прерванной загрузки с тем, что уже записано: `created` объектов из первых `processed` элементов потока.
+        Элементы с индексом меньше `processed`, которых нет в `errors`, сохранены.
+        В режиме `stream_atomic` все откатывается, поэтому записанного нет.
+
+        :param str message: Сообщение об ошибке.
+        :param int created: Сколько объектов создано.
+        :param int processed: Сколько элементов потока обработано и записано.
+        :param list errors: Ошибки по элементам.
+
+        :rtype: drf_auto.exceptions.FailPointRequest
+
+        """
+        if self.stream_atomic:
+            created, processed = 0, 0
+        return FailPointRequest(
+            status=400, message=message, data={'created': created, 'processed': processed, 'errors': errors}
+        )
+
+
+class RestBulkUpdateAPIView(AutoBulkRequestView, AutoResponseSerializerView):
+    """
+    Генерик для массового изменения объектов через `bulk_update`, а где его нет (Django < 2.2) - через
+    UPDATE по каждому объекту. Каждый элемент массива должен содержать pk объекта.
+
+    """
+    def put(self, request, *args, **kwargs):
+        """
+        Массовое изменение объектов.
+
+        """
+        return self.bulk_update(request, *args, **kwargs)
+
+    def patch(self, request, *args, **kwargs):
+        """
+        Массовое частичное изменение объектов.
+
+        """
+        kwargs['partial'] = True
+        return self.bulk_update(request, *args, **kwargs)
+
+    def bulk_update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        data = self.get_bulk_data(request)
+        pks = self.get_bulk_pks(data)
+        # Все объекты одним запросом.
+        instances = self.filter_queryset(self.get_queryset()).in_bulk([pk for pk in pks if pk is not None])
+
+        serializers, errors = [], []
+        for item, pk in zip(data, pks):
+            instance = instances.get(pk)
+            if instance is None:
+                errors.append({'pk': ['Объект `{}` не найден.'.format(pk)]})
+                continue
+            serializer = self.get_serializer(instance, data=item, partial=partial)
+            errors.append({} if serializer.is_valid() else serializer.errors)
+            serializers.append(serializer)
+
+        if any(errors):
+            return self.fail_items(errors)
+        self.perform_bulk_update(serializers)
+        data = [serializer.instance for serializer in serializers]
+        return self.get_response(code=200, data=data, many=True, is_serializer=self.is_serializer)
+
+    def perform_bulk_update(self, serializers):
+        """
+        Пишет изменения пачками в одной транзакции.
+
+        :param list serializers: Провалидированные сериалайзеры по каждому объекту.
+
+        """
+        model = self.get_bulk_model()
+        using = router.db_for_write(model)
+        if serializers and not self.can_bulk_write(
+                serializers[0], 'update', [serializer.validated_data for serializer in serializers]):
+            with transaction.atomic(using=using):
+                for serializer in serializers:
+                    serializer.save()
+            return
+
+        fields, relations = set(), []
+        for serializer in serializers:
+            columns, m2m = self._split_relations(serializer.validated_data)
+            for attr, value in columns.items():
+                setattr(serializer.instance, attr, value)
+            fields.update(columns)
+            relations.append((serializer.instance, m2m))
+
+        with transaction.atomic(using=using):
+            if fields:
+                self.bulk_update_objects(
+                    model, [serializer.instance for serializer in serializers], sorted(fields), using
+                )
+            for instance, m2m in relations:
+                for name, value in m2m.items():
+                    getattr(instance, name).set(value)
+
+        # bulk_update не шлет сигналы, поэтому кэш ответов сбрасываем сами.
+        invalidate_model(model)
+
+    def bulk_update_objects(self, model, objs, fields, using):
+        """
+        Пишет колонки объектов: `bulk_update` пачками, если он есть (Django 2.2+), иначе UPDATE по каждому объекту.
+
+        :param django.db.models.Model model: Модель объектов.
+        :param list objs: Измененные объекты.
+        :param list fields: Имена изменившихся филдов.
+        :param str using: Алиас БД.
+
+        """
+        manager = model._default_manager.db_manager(using)
+        if hasattr(manager, 'bulk_update'):
+            manager.bulk_update(objs, fields, batch_size=self.get_bulk_batch_size())
+            return
+        for obj in objs:
+            manager.filter(pk=obj.pk).update(**{name: getattr(obj, name) for name in fields})
+
+
+class RestBulkDestroyAPIView(AutoBulkRequestView, AutoResponseSerializerView):
+    """
+    Генерик для массового удаления объектов. Принимает массив pk или объектов с pk.
+
+    """
+    def delete(self, request, *args, **kwargs):
+        """
+        Массовое удаление объектов.
+
+        """
+        return self.bulk_destroy(request, *args, **kwargs)
+
+    def bulk_destroy(self, request, *args, **kwargs):
+        pks = self.get_bulk_pks(self.get_bulk_data(request))
+        errors = [{'pk': ['Неверный pk.']} if pk is None else {} for pk in pks]
+        if any(errors):
+            return self.fail_items(errors)
+        self.perform_bulk_destroy(self.filter_queryset(self.get_queryset()), pks)
+        return self.get_response(code=204)
+
+    def perform_bulk_destroy(self, queryset, pks):
+        """
+        Удаляет объекты пачками `filter(pk__in=...).delete()` в одной транзакции.
+
+        :param django.db.models.QuerySet queryset: Объекты, которые разрешено удалять.
+        :param list pks: pk объектов.
+
+        """
+        batch_size = self.get_bulk_batch_size()
+        with transaction.atomic(using=router.db_for_write(queryset.model)):
+            for start in range(0, len(pks), batch_size):
+                queryset.filter(pk__in=pks[start:start + batch_size]).delete()
+
+
+def _can_return_bulk_pks(using):
+    """
+    Проставляет ли бэкенд pk объектам после bulk_create.
+
+    """
+    features = connections[using].features
+    return getattr(features, 'can_return_rows_from_bulk_insert',
+                   getattr(features, 'can_return_ids_from_bulk_insert', False))